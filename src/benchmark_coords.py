@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+    Micro-benchmark of the two Coord implementations in utils/coords.py.
+
+    Usage:
+        python src/benchmark_coords.py
+        python src/benchmark_coords.py --number 200000 --output coords.json
+
+    Times the Coord operations that show up in movement, collisions, shadows and
+    pathfinding for NumpyCoord and FastCoord and prints the speedup per operation.
+    COORD_IMPL (or the DRAGON_COORD environment variable) picks the one the game uses.
+"""
+
+import sys
+import json
+import timeit
+import logging
+import argparse
+import platform
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+
+from utils.coords import FastCoord, NumpyCoord
+
+# -------------------------------
+# Setup logging
+# -------------------------------
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Argument Parser
+# -------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Coord implementations.")
+    parser.add_argument("--number", "-n", type=int, default=100_000, help="Calls per operation and repeat")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Repeats per operation, the fastest one is kept")
+    parser.add_argument("--output", "-o", type=Path, help="Write the results to this JSON file")
+    return parser.parse_args()
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+# name -> statement, run with a, b (Coords) and s (a float) in scope
+OPERATIONS = {
+    "world": "C.world(1.5, -2.5, 0.5)",
+    "copy": "a.copy()",
+    "read x/y/z": "a.x + a.y + a.z",
+    "add": "a + b",
+    "sub": "a - b",
+    "mul scalar": "a * s",
+    "iadd": "a += b",
+    "eq": "a == b",
+    "euclidean_2D": "a.euclidean_2D(b)",
+    "manhattan": "a.manhattan(b)",
+    "as_view_coord": "a.as_view_coord()",
+    "as_chunk_coord": "a.as_chunk_coord()",
+    "update_as_world": "a.update_as_world_coord(0.1, -0.1)",
+    "update_as_view": "a.update_as_view_coord(1, 1)",
+    "move (copy + update)": "a.copy().update_as_world_coord(1, 0)",
+    "hitbox (sub, mul, add)": "(a - b * 0.5) + b",
+}
+
+
+def time_operation(cls, statement, number, repeat) -> float:
+    """ Fastest time of one call in ns """
+    scope = {"C": cls, "A": cls.world(3.25, -7.5, 1), "B": cls.world(0.5, 1.25, 0)}
+    setup = "a, b, s = A.copy(), B.copy(), 0.5" # Locals, so in-place statements work
+    return min(timeit.repeat(statement, setup, globals=scope, number=number, repeat=repeat)) / number * 1e9
+
+
+def benchmark(number, repeat) -> dict:
+    operations = {}
+    for name, statement in OPERATIONS.items():
+        numpy_ns = time_operation(NumpyCoord, statement, number, repeat)
+        fast_ns = time_operation(FastCoord, statement, number, repeat)
+        operations[name] = {"numpy_ns": numpy_ns, "fast_ns": fast_ns, "speedup": numpy_ns / fast_ns}
+
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "number": number,
+            "repeat": repeat,
+        },
+        "operations": operations,
+    }
+
+
+def report(results) -> None:
+    print(f"\n{'operation':<24}{'numpy ns':>10}{'fast ns':>10}{'speedup':>9}")
+    for name, op in results["operations"].items():
+        print(f"{name:<24}{op['numpy_ns']:>10.0f}{op['fast_ns']:>10.0f}{op['speedup']:>8.1f}x")
+
+    speedups = [op["speedup"] for op in results["operations"].values()]
+    print(f"\ngeometric mean speedup: {np.exp(np.mean(np.log(speedups))):.1f}x")
+
+# -------------------------------
+# Entry point
+# -------------------------------
+if __name__ == "__main__":
+    args = parse_args()
+    results = benchmark(args.number, args.repeat)
+    report(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        logger.info(f"Results written to {args.output}")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+    Benchmark terrain generation and break it down per pipeline stage.
+
+    Usage:
+        python src/benchmark_terrain.py --chunks 40 --output bench.json
+        python src/benchmark_terrain.py --chunks 40 --baseline bench.json
+        python src/benchmark_terrain.py --baseline      # against the reference results
+
+    Builds complete chunks (terrain arrays, spawners, Tile objects and tile groups) on
+    the calling process for every Degree setting and seed, then reports chunks/s and the
+    time spent per stage. A second, smaller pass runs with tracemalloc to count
+    allocations per stage. Runs headless, nothing is drawn.
+
+    Results are written as JSON. With --baseline the run is compared to an earlier
+    result file and the exit code is 1 if anything got slower than --tolerance allows.
+
+    Reference results are kept in src/metrics/terrain_baseline.json. They were recorded
+    with the default settings and the versions pinned in requirements.txt; the machine,
+    settings and versions are in its "meta". Compare a
+    terrain_generator.py change against it with --baseline and no file. Timings only
+    compare on similar machines, so record a new reference (--output on that path) when
+    the generator gets faster on purpose or the reference machine changes.
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import pygame
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+
+import system.entities.spawners # Registers chunk spawners
+from utils.coords import Coord
+from world.chunk import Chunk
+from world.generation.types import Degree
+from world.generation.terrain_generator import TerrainGenerator
+from world.generation.chunk_workers import generate_chunk_data
+from metrics.stage_profiler import StageProfiler, profiling
+
+# Reference results, recorded with the default settings
+BASELINE_PATH = Path(__file__).parent / "metrics" / "terrain_baseline.json"
+
+# -------------------------------
+# Setup logging
+# -------------------------------
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Argument Parser
+# -------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark terrain generation.")
+    parser.add_argument("--chunks", "-n", type=int, default=20, help="Chunks per (degree, seed) setting")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2], help="World seeds to generate")
+    parser.add_argument("--alloc-chunks", type=int, default=3, help="Chunks per setting in the allocation pass (0 to skip)")
+    parser.add_argument("--output", "-o", type=Path, help="Write the results to this JSON file")
+    parser.add_argument(
+        "--baseline", "-b", type=Path, nargs="?", const=BASELINE_PATH,
+        help=f"Compare against this results file (default: {BASELINE_PATH.name})"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown against the baseline")
+    return parser.parse_args()
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def chunk_locations(n):
+    """ n distinct chunks spread out over the world so no two share biome lattice blocks """
+    return [(7 * i - 3 * n, (13 * i) % 41 - 20) for i in range(n)]
+
+
+def build_chunk(generator, cx, cy) -> Chunk:
+    chunk = Chunk(Coord.chunk(cx, cy), terrain_generator=generator, auto_gen=False)
+    chunk.start_generation(generate_chunk_data(generator, cx, cy, chunk.SIZE))
+    chunk.step_generation(chunk.SIZE * chunk.SIZE)
+    return chunk
+
+
+def run_pass(profiler, settings, n) -> float:
+    """ Generate n chunks for every (degree, seed) setting, returns the wall time """
+    start = time.perf_counter()
+    with profiling(profiler):
+        for degree, seed in settings:
+            # A fresh generator per setting, so caches start cold like a new world
+            generator = TerrainGenerator(seed, degree, degree, degree)
+            for cx, cy in chunk_locations(n):
+                build_chunk(generator, cx, cy)
+    return time.perf_counter() - start
+
+
+def benchmark(chunks, seeds, alloc_chunks) -> dict:
+    settings = [(degree, seed) for degree in Degree for seed in seeds]
+    total = chunks * len(settings)
+
+    # Warm up imports, numpy and lazily built tables outside of the measurement
+    build_chunk(TerrainGenerator(seeds[0], *[Degree.Medium] * 3), 10_000, 10_000)
+
+    timer = StageProfiler()
+    elapsed = run_pass(timer, settings, chunks)
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+            "chunks": total,
+            "chunks_per_setting": chunks,
+            "alloc_chunks": alloc_chunks,
+            "seeds": seeds,
+            "degrees": [degree.name for degree in Degree],
+        },
+        "chunks_per_sec": total / elapsed,
+        "ms_per_chunk": 1000 * elapsed / total,
+        "stages": {
+            name: {"ms_per_chunk": 1000 * t / total, "share": t / elapsed}
+            for name, t in timer.times.items()
+        },
+    }
+
+    if alloc_chunks > 0:
+        tracker = StageProfiler(track_allocations=True)
+        run_pass(tracker, settings, alloc_chunks)
+        alloc_total = alloc_chunks * len(settings)
+        results["allocations"] = {
+            name: {
+                "peak_kib": tracker.peak_bytes[name] / 1024,
+                "net_blocks_per_chunk": tracker.net_blocks[name] / alloc_total,
+            }
+            for name in tracker.times
+        }
+    return results
+
+
+def report(results) -> None:
+    print(f"\n{results['meta']['chunks']} chunks: {results['chunks_per_sec']:.2f} chunks/s "
+          f"({results['ms_per_chunk']:.2f} ms/chunk)\n")
+    print(f"{'stage':<16}{'ms/chunk':>10}{'share':>8}{'peak KiB':>11}{'net blocks':>12}")
+    allocations = results.get("allocations", {})
+    for name, stage in sorted(results["stages"].items(), key=lambda s: -s[1]["ms_per_chunk"]):
+        alloc = allocations.get(name)
+        print(
+            f"{name:<16}{stage['ms_per_chunk']:>10.3f}{100 * stage['share']:>7.1f}%"
+            + (f"{alloc['peak_kib']:>11.1f}{alloc['net_blocks_per_chunk']:>12.1f}" if alloc else "")
+        )
+
+
+def compare(results, baseline, tolerance) -> bool:
+    """ Print the change against baseline, False if something slowed down by more than tolerance """
+    settings = ("chunks", "seeds", "degrees")
+    if any(baseline["meta"].get(key) != results["meta"][key] for key in settings):
+        logger.warning("Baseline was recorded with other settings, " + ", ".join(
+            f"{key}: {baseline['meta'].get(key)} vs {results['meta'][key]}" for key in settings
+        ))
+    versions = ("python", "numpy", "pygame")
+    if any(baseline["meta"].get(key) != results["meta"][key] for key in versions):
+        logger.warning("Baseline was recorded with other versions, " + ", ".join(
+            f"{key}: {baseline['meta'].get(key)} vs {results['meta'][key]}" for key in versions
+        ))
+    logger.info(f"Baseline recorded {baseline['meta'].get('date')} on {baseline['meta'].get('platform')} "
+                f"({baseline['meta'].get('processor')}, {baseline['meta'].get('cpus')} cpus)")
+
+    rows = [("total", baseline["ms_per_chunk"], results["ms_per_chunk"])] + [
+        (name, stage["ms_per_chunk"], results["stages"][name]["ms_per_chunk"])
+        for name, stage in baseline["stages"].items() if name in results["stages"]
+    ]
+
+    ok = True
+    print(f"\n{'vs baseline':<16}{'before':>10}{'after':>10}{'change':>9}")
+    for name, before, after in rows:
+        change = after / before - 1 if before > 0 else 0.0
+        slower = change > tolerance
+        ok &= not slower
+        print(f"{name:<16}{before:>10.3f}{after:>10.3f}{100 * change:>+8.1f}%" + ("  SLOWER" if slower else ""))
+    return ok
+
+# -------------------------------
+# Entry point
+# -------------------------------
+if __name__ == "__main__":
+    args = parse_args()
+    results = benchmark(args.chunks, args.seeds, args.alloc_chunks)
+    report(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        logger.info(f"Results written to {args.output}")
+
+    if args.baseline:
+        if not compare(results, json.loads(args.baseline.read_text()), args.tolerance):
+            logger.warning(f"Slower than {args.baseline} by more than {100 * args.tolerance:.0f}%")
+            sys.exit(1)
@@ -1,3 +1,4 @@
+import os
 import math
 
 # Game system constants
@@ -14,6 +15,7 @@ TRACKING_BOX_SCALE = 0.35
 GRID_RATIO = [2, 1]
 BANNER_SIZE = (384, 32)
 DEFAULT_BUTTON_COOLDOWN = 100
+COORD_IMPL = os.environ.get("DRAGON_COORD", "fast") # Coord backing, "fast" (slotted floats) or "numpy" (see utils/coords.py)
 
 # Map constants
 TILE_SIZE = 32
@@ -25,12 +27,22 @@ TILE_ASSET_SHOWN_SIZE = (32, 16)
 
 # Chunk constants
 CHUNK_SIZE = 64
-TILES_GEN_PER_STEP = 96 # Tiles created in chunk when generated per cycle
-TILES_LOAD_PER_STEP = 192 # Tiles loaded in new chunk per cycle
+TILES_GEN_PER_STEP = 96 # Tiles scanned for trees per cycle when a chunk is generated
 ENTITY_LOAD_STEP = 32 # Entities in new chunk per cycle
-TOTAL_LOAD_BUDGET = 192
+CHUNK_SAVE_DELTAS = True # Save chunks as changes from their regenerated terrain instead of every tile
+CHUNK_SAVE_BINARY = True # Save chunks in the binary format of world/chunk_format.py instead of JSON
+CHUNK_LOAD_RADIUS = None # Chunks loaded around the center chunk (1 => 3x3), None => enough to cover DISPLAY_SIZE
+CHUNK_RECENTER_MARGIN = 8 # Tiles the screen center must be past the center chunk before the chunk window moves
+PREFETCH_LOOKAHEAD_MS = 4000 # How far ahead the map predicts the screen center to stage the next chunks
+PREFETCH_MIN_SPEED = 1 # Tiles per second, slower movement doesn't prefetch
+PREFETCH_SMOOTHING_MS = 250 # Time constant of the smoothed movement used for the prediction
+CHUNK_CACHE_BYTES = 128 * 1024 * 1024 # Memory for chunks that recently left the map (see world/chunk_cache.py)
+CHUNK_WORKERS = 3 # Processes generating new chunks in the background (0 => generate on the main process)
+TILE_BAKE_BUDGET_MS = 3 # Time per frame spent baking tile groups, nearest to the screen center first (see world/tile_baker.py)
 
+assert COORD_IMPL in ("fast", "numpy")
 assert CHUNK_SIZE % TILE_GROUP_DRAW_SIZE == 0
+assert 0 <= CHUNK_RECENTER_MARGIN < CHUNK_SIZE
 
 # Physics system constants
 SPATIAL_GRID_PARITION_SIZE = 8
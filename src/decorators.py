@@ -57,7 +57,10 @@ def register_page(_cls=None, *, default=False):
 
 
 def spawn_with_chunk_creation(size, spawn_probability, can_spawn_spawner):
-    """Adds cls to regestry and append key attrs to class to allow it be generated later"""
+    """
+    Adds cls to regestry and append key attrs to class to allow it be generated later
+    can_spawn_spawner maps a ChunkTerrain to a bool mask of the tiles the spawner may cover
+    """
     def decorator(cls):
         from system.entities.spawner import Entity
         if not issubclass(cls, Entity):
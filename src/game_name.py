@@ -3,6 +3,7 @@ import sys
 import os
 import logging
 import argparse
+import multiprocessing
 
 from main import runGame
 from utils.app_helpers import setup_file_structure
@@ -66,4 +67,5 @@ def main():
 # Entry point
 # -------------------------------
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Chunk worker processes in frozen builds
     main()
@@ -0,0 +1,65 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from collections import defaultdict
+from typing import Dict, Optional
+
+
+class StageProfiler:
+    """
+        Accumulates wall time per named pipeline stage (see profile_stage).
+
+        With track_allocations the profiler also records, per stage, the peak traced
+        memory above the stage's starting point and the net number of memory blocks it
+        left allocated. tracemalloc slows everything down a lot, so timings from an
+        allocation tracking run should not be compared to normal runs.
+    """
+
+    def __init__(self, track_allocations: bool = False):
+        self.track_allocations = track_allocations
+        self.times: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.peak_bytes: Dict[str, int] = defaultdict(int)
+        self.net_blocks: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name: str):
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            start_blocks = sys.getallocatedblocks()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] += time.perf_counter() - start
+            self.calls[name] += 1
+            if self.track_allocations:
+                peak = tracemalloc.get_traced_memory()[1] - start_bytes
+                self.peak_bytes[name] = max(self.peak_bytes[name], peak)
+                self.net_blocks[name] += sys.getallocatedblocks() - start_blocks
+
+
+# Profiler stages report to, None when nothing is being profiled
+_active_profiler: Optional[StageProfiler] = None
+
+
+def profile_stage(name: str):
+    """ Context manager timing a stage on the active profiler, a no-op otherwise """
+    return _active_profiler.stage(name) if _active_profiler is not None else nullcontext()
+
+
+@contextmanager
+def profiling(profiler: StageProfiler):
+    """ Make `profiler` the active profiler (and start tracemalloc if it tracks allocations) """
+    global _active_profiler
+    previous, _active_profiler = _active_profiler, profiler
+    started = profiler.track_allocations and not tracemalloc.is_tracing()
+    if started: tracemalloc.start()
+    try:
+        yield profiler
+    finally:
+        if started: tracemalloc.stop()
+        _active_profiler = previous
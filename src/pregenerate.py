@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+    Pregenerate (and save) every chunk within a square radius of a saved world.
+
+    Usage: python src/pregenerate.py <save name> --radius 16
+
+    Chunks are saved in full rather than as deltas, so the game loads them without
+    generating their terrain again. Chunks that already exist on disk are skipped, so an interrupted run can simply
+    be started again. The game must not be running on the same save at the same time.
+"""
+
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import system.entities.spawners # Registers chunk spawners so saved chunks get their entities
+from utils.coords import Coord
+from utils.app_helpers import setup_file_structure
+from world.chunk import Chunk
+from world.chunk_writer import chunk_writer
+from system.id_generator import id_generator
+from world.generation.chunk_workers import ChunkWorkerPool
+from world.generation.terrain_generator import TerrainGenerator
+from constants import CHUNK_WORKERS
+
+# -------------------------------
+# Setup logging
+# -------------------------------
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Argument Parser
+# -------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pregenerate the chunks of a saved world.")
+    parser.add_argument("name", type=str, help="Name of the save")
+    parser.add_argument("--radius", "-r", type=int, required=True, help="Radius in chunks around the center")
+    parser.add_argument("--center", type=int, nargs=2, default=(0, 0), metavar=("CX", "CY"), help="Center chunk")
+    parser.add_argument("--workers", "-w", type=int, default=max(CHUNK_WORKERS, 1), help="Worker processes")
+    return parser.parse_args()
+
+# -------------------------------
+# Pregeneration
+# -------------------------------
+def chunks_in_radius(cx, cy, radius):
+    """ Chunk locations in the square, nearest to the center first """
+    locations = [
+        (x, y)
+        for x in range(cx - radius, cx + radius + 1)
+        for y in range(cy - radius, cy + radius + 1)
+    ]
+    return sorted(locations, key=lambda c: max(abs(c[0] - cx), abs(c[1] - cy)))
+
+
+def save_chunk(name, generator, x, y, terrain) -> None:
+    chunk = Chunk(Coord.chunk(x, y), terrain_generator=generator, auto_gen=False)
+    chunk.start_generation(terrain)
+    chunk.step_generation(chunk.SIZE * chunk.SIZE)
+
+    # Persist the id counter before the chunk that uses the ids, so a resumed run never reuses them
+    id_generator.save()
+
+    # Full saves, so loading a pregenerated chunk never has to regenerate its terrain
+    chunk.save(name, delta=False)
+
+
+def pregenerate(name, center, radius, workers) -> int:
+    generator = TerrainGenerator.load(name)
+    if generator is None:
+        logger.error(f"No saved world named '{name}' (create it in game first)")
+        return 1
+
+    id_generator.load_game(name)
+    locations = chunks_in_radius(*center, radius)
+    todo = [(x, y) for x, y in locations if not Chunk.exists(x, y, name)]
+    logger.info(f"{len(locations) - len(todo)} of {len(locations)} chunks already exist, generating {len(todo)}")
+
+    pool = ChunkWorkerPool(workers)
+    pending, queued = {}, iter(todo)
+    done, start = 0, time.perf_counter()
+    try:
+        while True:
+            # Keep the workers busy without holding every result in memory
+            while len(pending) < workers * 4 and (location := next(queued, None)):
+                pending[pool.submit(generator, *location)] = location
+            if not pending: break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                save_chunk(name, generator, *pending.pop(future), future.result())
+                done += 1
+
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed > 0 else 0
+            eta = (len(todo) - done) / rate if rate > 0 else 0
+            print(
+                f"\r[{done}/{len(todo)}] {100 * done / max(len(todo), 1):5.1f}%  "
+                f"{rate:6.1f} chunks/s  eta {eta:6.0f}s", end="", flush=True
+            )
+    except KeyboardInterrupt:
+        print()
+        logger.info(f"Interrupted after {done} chunks, run again to resume")
+        return 130
+    finally:
+        pool.shutdown()
+        chunk_writer.shutdown()
+
+    print()
+    logger.info(f"Generated {done} chunks in {time.perf_counter() - start:.1f}s")
+    return 0
+
+# -------------------------------
+# Entry point
+# -------------------------------
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    args = parse_args()
+    setup_file_structure()
+    sys.exit(pregenerate(args.name, tuple(args.center), args.radius, args.workers))
@@ -17,8 +17,13 @@ class ChunkSpawnerRegistry:
         for t in self.types:
             self.weights.append(self.weights[-1] + t.SPAWN_WEIGHT)
     
-    def choose_random_type(self) -> Optional[type]:
-        rand_num = random.randint(0, math.floor(self.weights[-1]))
+    @property
+    def max_roll(self) -> int:
+        return math.floor(self.weights[-1])
+
+    def choose_random_type(self, roll: Optional[int] = None) -> Optional[type]:
+        """ Pick a spawner type (or None) from a roll in [0, max_roll]; rolls randomly if none is given """
+        rand_num = random.randint(0, self.max_roll) if roll is None else roll
         index = bisect_left(self.weights, rand_num)
         if index == 0: return None
         return self.types[index - 1]
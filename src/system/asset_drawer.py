@@ -1,14 +1,14 @@
 import pygame
 import numpy as np
 from utils.paths import assets_root
-from utils.coords import Coord
+from utils.coords import Coord, CoordArray
 from utils.types.colors import RGB, RGBA
 from system.entities.physics.collisions import center_hit_box
 from world.tile import Tile
 from numpy.typing import NDArray
 from system.render_obj import RenderObj
 from system.entities.sheet import SheetManager
-from typing import List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 from system.global_vars import game_globals
 
@@ -78,6 +78,35 @@ class AssetDrawer:
         rect = img.get_rect(center=center)
         target.blit(img, rect)
 
+    @timeit()
+    def draw_tiles(
+        self,
+        tiles: Sequence[Tile],
+        cam_offset: NDArray[np.float64],
+        tints: Optional[Sequence[Optional[RGBA]]] = None,
+        display: Optional[pygame.Surface] = None
+    ) -> None:
+        """
+        Draw many tiles like draw_tile, projecting all of their locations in one call.
+
+        Args:
+            tiles: Tiles to draw, in draw order.
+            cam_offset: View-space camera offset (vx, vy).
+            tints: Optional tint per tile (None entries are drawn untinted).
+            display: Optional target surface; defaults to self.display.
+        """
+
+        if not tiles: return
+        target = self.display if display is None else display
+        centers = (CoordArray.from_coords(tile.location for tile in tiles).as_view_coord() - cam_offset).tolist()
+        tints = tints if tints is not None else [None] * len(tiles)
+
+        blits = []
+        for tile, center, tint in zip(tiles, centers, tints):
+            img = self.tiles[tile.id] if tint is None else self._tint_surface(self.tiles[tile.id].copy(), tint)
+            blits.append((img, img.get_rect(center=center)))
+        target.blits(blits, doreturn=False)
+
     # -------------------------------------------------------------------------
     # Tile Groups
     # -------------------------------------------------------------------------
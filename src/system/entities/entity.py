@@ -12,6 +12,9 @@ from decorators import register_entity
 
 @register_entity 
 class Entity(BaseEntity):
+    # View coords of location, only set while EntityManager collects render objs (see project_entities)
+    view_location: Optional[np.ndarray] = None
+
     def __init__(self, location: Coord, size: Coord, img_id: int, render_offset: Coord, id: Optional[int] = None, solid: Optional[bool] = True): 
         super().__init__(location, size)
         self.id = id if id is not None else id_generator.get_id()
@@ -117,7 +120,8 @@ class Entity(BaseEntity):
         return self.draw_location() - self.render_offset.location[:-1]
 
     def draw_location(self):
-        return self.location.as_view_coord() + self.render_offset.location[:-1]
+        view_location = self.location.as_view_coord() if self.view_location is None else self.view_location
+        return view_location + self.render_offset.location[:-1]
 
     def get_render_objs(self) -> List[RenderObj]:
         return [RenderObj(
@@ -1,7 +1,7 @@
 from typing import List, Optional, Callable, Dict
 
 from world.chunk import Chunk
-from utils.coords import Coord
+from utils.coords import Coord, CoordArray
 from system.screen import Screen
 from system.render_obj import RenderObj
 from system.entities.entity import Entity
@@ -37,6 +37,7 @@ class EntityManager:
 
         self.kill_listener_subscribers = []
         self.entities_on_screen = []
+        self._projected: List[Entity] = []
         self.queued_additions = set()
         self.queued_removals = set()
 
@@ -147,15 +148,29 @@ class EntityManager:
             - computed projected shadows from the Shadows system (ellipse caster)
         """
         render_objs = []
+        self.project_entities(self.entities_on_screen)
         for entity in self.entities_on_screen:
             render_objs.extend(entity.get_render_objs())
             if (shadow:= entity.serve_shadow()): render_objs.append(shadow)
-        
+        self.project_entities([])
+
         if player: render_objs.extend(self.shadows.get_shadow_objs(player.get_shadow()))
         render_objs.sort(key= lambda r_obj: r_obj.render_order)
 
         return render_objs
     
+    def project_entities(self, entities: List[Entity]) -> None:
+        """
+            Project the locations of entities to view coords in one batch and hand them to
+            Entity.draw_location. Entities projected by the previous call are reset first,
+            so project_entities([]) drops the batch once the render objs are built.
+        """
+        for entity in self._projected: entity.view_location = None
+        self._projected = entities
+        if entities:
+            for entity, view_location in zip(entities, CoordArray.from_coords(e.location for e in entities).as_view_coord()):
+                entity.view_location = view_location
+
     def get_and_removed_chunk_entities(self, chunk: Chunk) -> set[Entity]:
         """ Return entities in a chunk region AND remove them from both """
         x, y, _ = chunk.location.location
@@ -4,7 +4,7 @@ import numpy as np
 from dataclasses import dataclass
 from typing import Optional, List, Tuple
 
-from utils.coords import Coord
+from utils.coords import Coord, CoordArray
 from utils.types.shade_levels import ShadeLevel
 from system.render_obj import RenderObj
 
@@ -205,31 +205,19 @@ class Shadows:
             higher.append(receiver)
 
             # Project base + holes to screen using this receiver’s plane
-            min_x = min_y = float("inf")
-            max_x = max_y = float("-inf")
-            base_screen, holes_screen = [], []
-
             # Construct shadow poly in view coords that hits reciever
-            for point in region_in_shadow:
-                point_3d = receiver.project_to_world(point.x, point.y)
-                point_3d.z = min(point_3d.z, max(ellipse.center.z - SHADOW_CLAMP, 1)) # Keeps shadows from being above player
-                px, py = point_3d.as_view_coord()
-                base_screen.append((px, py))
-                min_x, max_x, min_y, max_y = min(min_x, px), max(max_x, px), min(min_y, py), max(max_y, py)
+            base_view = self._project_to_view(
+                receiver, region_in_shadow, max(ellipse.center.z - SHADOW_CLAMP, 1) # Keeps shadows from being above player
+            )
 
             # Construct polys to remove from reciever shadow poly in view coords
-            for hole_xy in hole_polys_xy:
-                holes = []
-                for point in hole_xy:
-                    point_3d = receiver.project_to_world(point.x, point.y)
-                    point_3d.z = min(point_3d.z, ellipse.center.z)
-                    px, py = point_3d.as_view_coord()
-                    holes.append((px, py))
-                    min_x, max_x, min_y, max_y = min(min_x, px), max(max_x, px), min(min_y, py), max(max_y, py)
-                holes_screen.append(holes)
-
+            holes_view = [self._project_to_view(receiver, hole_xy, ellipse.center.z) for hole_xy in hole_polys_xy]
 
-            if not base_screen: continue
+            if not len(base_view): continue
+            all_view = np.concatenate([base_view, *holes_view])
+            (min_x, min_y), (max_x, max_y) = all_view.min(axis=0).tolist(), all_view.max(axis=0).tolist()
+            base_screen = base_view.tolist()
+            holes_screen = [hole.tolist() for hole in holes_view]
 
             # Alpha & softness from height
             centriod = self.poly_centroid(region_in_shadow)
@@ -277,6 +265,13 @@ class Shadows:
     # -------------------------------------------------------------------------
     
 
+    @staticmethod
+    def _project_to_view(receiver: Receiver, poly: List[Coord], max_z: float) -> np.ndarray:
+        """ Lift XY points onto receiver (z capped at max_z) and project them to view coords in one batch """
+        return CoordArray.world(
+            [p.x for p in poly], [p.y for p in poly], [min(receiver.z_at(p.x, p.y), max_z) for p in poly]
+        ).as_view_coord()
+
     @staticmethod
     def _get_local_poly(offset_x: int, offset_y: int, poly: List[Coord]) -> List[Coord]:
         """Convert screen-space points into local surface pixel coordinates."""
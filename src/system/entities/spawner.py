@@ -1,11 +1,15 @@
+import numpy as np
 from system.entities.entity import Entity
 from system.game_clock import game_clock
 from system.entities.entity_manager import EntityManagerSubscriber
 from utils.coords import Coord
 from world.tile import Tile
-from typing import List, Dict, Callable, Any
+from typing import List, Dict, Callable, Any, TYPE_CHECKING
 from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    from world.generation.terrain_generator import ChunkTerrain
+
 
 @dataclass
 class SpawnerArgs:
@@ -16,7 +20,7 @@ class SpawnerArgs:
 class Spawner(Entity, EntityManagerSubscriber):
     SIZE: Coord = Coord.math(0, 0, 0)
     SPAWN_PROBABLITY: float = 0
-    CAN_SPAWN_SPAWNER: Callable[[Tile], None] = lambda _: False
+    CAN_SPAWN_SPAWNER: Callable[["ChunkTerrain"], np.ndarray] = lambda terrain: np.zeros(terrain.ids.shape, dtype=bool)
 
     def __init__(self, location, size, img_id, render_offset, spawner_args, id=None):
         super().__init__(location, size, img_id, render_offset, id=id)
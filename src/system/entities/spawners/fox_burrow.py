@@ -1,3 +1,4 @@
+import numpy as np
 from utils.coords import Coord
 from system.entities.entity_manager import EntityManager
 from system.entities.sprites.fox import Fox
@@ -6,11 +7,15 @@ from utils.types.shade_levels import ShadeLevel
 from world.tile import Tile
 from decorators import register_entity, spawn_with_chunk_creation
 from constants import FOX_BURROW_WIEGHT
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from world.generation.terrain_generator import ChunkTerrain
 
 FOX_BURROW_SIZE = Coord.math(1, 1, 0)
-def _fb_valid_spawner_location(tile: Tile) -> bool:
-    return not tile.has_obsticle and not tile.is_water and tile.id != 12
+def _fb_valid_spawner_location(terrain: "ChunkTerrain") -> np.ndarray:
+    """ Mask of generated tiles this spawner may cover """
+    return ~terrain.has_obstacle & ~terrain.is_water & (terrain.ids != 12)
 
 @register_entity
 @spawn_with_chunk_creation(
@@ -1,3 +1,4 @@
+import numpy as np
 from world.tile import Tile
 from utils.coords import Coord
 from system.render_obj import RenderObj
@@ -6,12 +7,16 @@ from system.entities.spawner import Spawner, SpawnerArgs
 from system.entities.sprites.wizard import Wizard
 from decorators import register_entity, spawn_with_chunk_creation, generate_shadow
 from constants import WORLD_HEIGHT, TILE_SIZE, OUTPOST_WEIGHT
-from typing import List, Optional
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from world.generation.terrain_generator import ChunkTerrain
 
 
 OUTPOST_SIZE = Coord.math(2, 2, 1 + WORLD_HEIGHT // TILE_SIZE)
-def _op_valid_spawner_location(tile: Tile) -> bool:
-    return not tile.has_obsticle and not tile.is_water
+def _op_valid_spawner_location(terrain: "ChunkTerrain") -> np.ndarray:
+    """ Mask of generated tiles this spawner may cover """
+    return ~terrain.has_obstacle & ~terrain.is_water
 
 
 @register_entity
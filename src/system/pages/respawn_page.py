@@ -57,7 +57,7 @@ class Respawn(Page):
     def _respawn_player(context: PageContext):
         game = GameManager().game
         game.map.finish_chunk_loading()
-        for chunk in game.map.chunks:
+        for chunk in game.map.chunks.values():
             chunk.entities = list(game.map.entity_manager.get_and_removed_chunk_entities(chunk))
             chunk.save(game.name)
 
@@ -33,22 +33,28 @@ class Renderer:
         num_tiles = 0
 
         if optimize:
-            surfaces_to_render = map.get_tile_surfaces_to_render(*screen.get_bounding_box())
-            num_tiles = len(surfaces_to_render)
-            for (surface, top_left) in surfaces_to_render:
-                self.asset_drawer.draw_tile_group(surface, top_left, cam_screen_i)
+            for item in map.get_tile_surfaces_to_render(*screen.get_bounding_box()):
+                if isinstance(item, list):
+                    # Tile groups the TileBaker hasn't baked yet are drawn tile by tile, in their place
+                    num_tiles += len(item)
+                    self.asset_drawer.draw_tiles(item, cam_screen_i)
+                else:
+                    num_tiles += 1
+                    self.asset_drawer.draw_tile_group(*item, cam_screen_i)
             
         if not optimize:
             tiles_to_render = map.get_tiles_to_render(*screen.get_bounding_box())
             num_tiles = len(tiles_to_render)
-            for tile in tiles_to_render:
-                # Optional overlay: highlight chunk borders in red when toggled on.
-                tint = (255, 0, 0) if game_globals.chunk_borders_on and tile.is_chunk_border else None
-                
-                # Helps show where the "floor" is
-                # tint = (0, 0, 255, 128) if tile.location == map.player.location.floor_world() else None
-
-                self.asset_drawer.draw_tile(tile, cam_screen_i, tint)
+
+            # Optional overlay: highlight chunk borders in red when toggled on.
+            tints = [
+                (255, 0, 0) if tile.is_chunk_border else None for tile in tiles_to_render
+            ] if game_globals.chunk_borders_on else None
+
+            # Helps show where the "floor" is
+            # tints = [(0, 0, 255, 128) if tile.location == map.player.location.floor_world() else None for tile in tiles_to_render]
+
+            self.asset_drawer.draw_tiles(tiles_to_render, cam_screen_i, tints)
 
          # --- Entities ---
         for entity in map.get_entities_to_render():
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from constants import CHUNK_SIZE
+from world.generation.types import Degree
+from world.generation.terrain_generator import TerrainGenerator, BIOME_BLEND_WIDTH
+from world.generation.biome_field import BiomeFieldCache
+
+
+def _chunk_xy(cx, cy):
+    local_x, local_y = np.divmod(np.arange(CHUNK_SIZE ** 2), CHUNK_SIZE)
+    return (cx * CHUNK_SIZE + local_x).astype(np.float64), (cy * CHUNK_SIZE - local_y).astype(np.float64)
+
+
+@pytest.mark.parametrize('seed, temperature', [(0, Degree.Medium), (9, Degree.Low), (31, Degree.High)])
+def test_cached_biome_weights_are_exact(seed, temperature):
+    generator = TerrainGenerator(seed, Degree.Medium, Degree.Medium, temperature)
+    rng = np.random.default_rng(seed)
+    chunks = [(int(cx), int(cy)) for cx, cy in rng.integers(-300, 300, (40, 2))]
+    chunks += [(0, cy) for cy in range(-12, 12)] # Crosses the latitude driven biome borders
+
+    crossed_border = False
+    for cx, cy in chunks:
+        xs, ys = _chunk_xy(cx, cy)
+        exact = generator._biome_weights_array(xs, ys)
+        cached = generator._biome_weights_from_values(generator.biome_field.chunk_field(
+            cx, cy, CHUNK_SIZE, (generator._t_desert, generator._t_tundra), BIOME_BLEND_WIDTH
+        ))
+        crossed_border |= len(np.unique(np.argmax(exact, axis=0))) > 1
+        assert np.array_equal(cached, exact)
+
+    assert crossed_border
+
+
+def test_lattice_blocks_are_reused_and_evicted():
+    calls = []
+    def sample(xs, ys):
+        calls.append(len(xs))
+        return xs * 0.001 + ys * 0.002
+
+    cache = BiomeFieldCache(sample, step=8, tolerance=0.0, max_blocks=2)
+    values = cache.chunk_field(0, 0, CHUNK_SIZE, (), 0.0)
+    xs, ys = _chunk_xy(0, 0)
+    assert np.allclose(values, xs * 0.001 + ys * 0.002) # Bilinear is exact for a linear field
+    assert calls == [81]
+
+    cache.chunk_field(0, 0, CHUNK_SIZE, (), 0.0)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.chunk_field(1, 0, CHUNK_SIZE, (), 0.0)
+    cache.chunk_field(2, 0, CHUNK_SIZE, (), 0.0)
+    cache.chunk_field(0, 0, CHUNK_SIZE, (), 0.0)
+    assert cache.misses == 4
+
+
+def test_values_near_thresholds_are_sampled_exactly():
+    cache = BiomeFieldCache(lambda xs, ys: np.sin(xs / 3.0), step=8, tolerance=0.0)
+    values = cache.chunk_field(0, 0, CHUNK_SIZE, (0.0,), 0.1)
+    xs, _ = _chunk_xy(0, 0)
+    near = np.abs(values) < 0.1
+    assert near.any()
+    assert np.array_equal(values[near], np.sin(xs[near] / 3.0))
+
+
+def test_cache_can_be_shared_between_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    def sample(xs, ys): return xs * 0.001 + ys * 0.002
+
+    cache = BiomeFieldCache(sample, step=8, tolerance=0.0, max_blocks=4)
+    chunks = [(i % 7, i % 5) for i in range(400)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        fields = list(pool.map(lambda c: cache.chunk_field(*c, 16, (), 0.0), chunks))
+
+    for (cx, cy), field in zip(chunks, fields):
+        assert np.allclose(field, BiomeFieldCache(sample, step=8, tolerance=0.0).chunk_field(cx, cy, 16, (), 0.0))
+    assert len(cache._blocks) <= 4 and cache.hits + cache.misses == len(chunks)
@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+from world.chunk_cache import TILE_BYTES, ChunkCache
+
+
+def _chunk(tiles):
+    return SimpleNamespace(tiles=SimpleNamespace(nbytes=0, view_count=tiles), entities=[], tile_groups=[])
+
+
+def test_evicts_least_recently_left_chunks_over_budget():
+    persisted = []
+    cache = ChunkCache(persisted.append, budget=25 * TILE_BYTES)
+    a, b, c = _chunk(10), _chunk(10), _chunk(10)
+
+    cache.put((0, 0), a)
+    cache.put((1, 0), b)
+    assert cache.take((0, 0)) is a and cache.bytes == 10 * TILE_BYTES
+    cache.put((0, 0), a)
+
+    cache.put((2, 0), c) # Over budget, b left the longest time ago
+    assert persisted == [b]
+    assert (1, 0) not in cache and len(cache) == 2 and cache.bytes == 20 * TILE_BYTES
+    assert cache.take((1, 0)) is None and (cache.hits, cache.misses) == (1, 1)
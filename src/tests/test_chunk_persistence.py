@@ -0,0 +1,297 @@
+import json
+import threading
+import pytest
+import system.entities.spawners
+from utils.coords import Coord
+from world import chunk as chunk_module
+from world.chunk import Chunk
+from world.region_store import close_chunk_stores
+from world import chunk_writer as chunk_writer_module
+from world.chunk_writer import chunk_writer
+from world.chunk_cache import ChunkCache
+from world.chunk_format import CHUNK_FORMAT_VERSION, CHUNK_HEADER, decode_chunk
+from world.generation.types import Degree
+from world.generation.chunk_workers import generate_chunk_data
+from world.generation.terrain_generator import TerrainGenerator
+
+GAME = "test_game"
+
+
+@pytest.fixture
+def generator():
+    return TerrainGenerator(17, Degree.Medium, Degree.Medium, Degree.Medium)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunk_module, "data_root", lambda: tmp_path)
+    yield tmp_path
+    chunk_writer.flush()
+    close_chunk_stores()
+
+
+def _write_legacy(data_dir, chunk, data):
+    """ Chunk file as saved before region files """
+    x, y, _ = chunk.location.as_chunk_coord()
+    path = data_dir / "games" / GAME / "chunks" / f"{x}" / f"{y}"
+    path.mkdir(parents=True)
+    (path / f"{chunk.id}.chunk").write_text(json.dumps(data), encoding='utf-8')
+
+
+def _saved_record(x, y):
+    chunk_writer.flush()
+    return Chunk.read_record(x, y, GAME)
+
+
+def _edited_chunk(generator, x, y, id):
+    chunk = Chunk(Coord.chunk(x, y), terrain_generator=generator, id=id)
+    chunk.tiles[10].id = 3
+    chunk.tiles[77].has_obsticle = True
+    chunk.tiles[4000].is_water = not chunk.tiles[4000].is_water
+    return chunk
+
+
+def _assert_loads_back(chunk, x, y, generator):
+    loaded = Chunk.load(x, y, GAME, terrain_generator=generator)
+    assert _snapshot(loaded) == _snapshot(chunk)
+
+    stepped = Chunk.begin_load(x, y, GAME, terrain_generator=generator)
+    while not stepped.step_load(): pass
+    assert _snapshot(stepped) == _snapshot(chunk)
+
+
+def _snapshot(chunk):
+    return [t.jsonify() for t in chunk.tiles], sorted(type(e).__name__ for e in chunk.entities)
+
+
+def test_delta_save_round_trip(generator):
+    chunk = _edited_chunk(generator, 2, -1, 5)
+    chunk.save(GAME)
+
+    record = _saved_record(2, -1)
+    assert record.is_delta and record.baseline == chunk.baseline.fingerprint()
+    assert record.indices.tolist() == [10, 77, 4000] and record.ids[0] == 3
+    _assert_loads_back(chunk, 2, -1, generator)
+
+
+def test_delta_saved_against_other_terrain_is_kept_not_applied(generator, data_dir):
+    chunk = _edited_chunk(generator, 2, 2, 13)
+    chunk.save(GAME)
+    record = _saved_record(2, 2)
+    assert record.generator_version == TerrainGenerator.VERSION
+
+    # The generator changed since the save
+    changed = generate_chunk_data(TerrainGenerator(18, Degree.Medium, Degree.Medium, Degree.Medium), 2, 2)
+    loaded = Chunk.load(2, 2, GAME, terrain_generator=generator, terrain=changed)
+    assert loaded.tiles.ids.tolist() == changed.ids.tolist()
+
+    kept = list((data_dir / "games" / GAME / "unmatched").iterdir())
+    assert len(kept) == 1
+    recovered = decode_chunk(kept[0].read_bytes())
+    assert recovered.baseline == record.baseline and recovered.indices.tolist() == record.indices.tolist()
+    assert recovered.ids.tolist() == record.ids.tolist()
+
+
+def test_loads_see_saves_not_written_yet(generator, monkeypatch):
+    chunk = _edited_chunk(generator, 4, 4, 10)
+    store = Chunk.get_store(GAME)
+    writing, release = threading.Event(), threading.Event()
+    write = store.write
+    def slow_write(*args):
+        writing.set()
+        release.wait()
+        write(*args)
+    monkeypatch.setattr(store, "write", slow_write)
+
+    chunk.save(GAME)
+    writing.wait()
+    chunk.tiles[11].id = 2
+    chunk.tiles[11].notify_subscribers()
+    chunk.save(GAME) # Queued behind the one being written
+
+    assert Chunk.exists(4, 4, GAME)
+    _assert_loads_back(chunk, 4, 4, generator)
+    release.set()
+
+    record = _saved_record(4, 4)
+    assert record.indices.tolist() == [10, 11, 77, 4000]
+
+
+def test_chunk_loaded_from_a_queued_delta_save_keeps_delta_saves(generator, monkeypatch):
+    chunk = _edited_chunk(generator, 5, 5, 15)
+    store = Chunk.get_store(GAME)
+    release = threading.Event()
+    write = store.write
+    monkeypatch.setattr(store, "write", lambda *args: (release.wait(), write(*args)))
+
+    chunk.save(GAME)
+    try:
+        assert Chunk.is_delta(5, 5, GAME)
+        loaded = Chunk.load(5, 5, GAME, terrain_generator=generator)
+        assert loaded.delta_saves is None and not loaded.dirty
+    finally:
+        release.set()
+
+    loaded.tiles[12].id = 1
+    loaded.tiles[12].notify_subscribers()
+    loaded.save(GAME)
+    assert _saved_record(5, 5).is_delta
+
+
+def test_full_binary_save_round_trip(generator, monkeypatch):
+    monkeypatch.setattr(chunk_writer_module, "CHUNK_SAVE_DELTAS", False)
+    chunk = _edited_chunk(generator, -3, 4, 8)
+    chunk.save(GAME)
+
+    record = _saved_record(-3, 4)
+    assert not record.is_delta and len(record.ids) == chunk.SIZE * chunk.SIZE
+    _assert_loads_back(chunk, -3, 4, generator)
+
+
+def test_json_delta_saves_still_load(generator, data_dir):
+    chunk = _edited_chunk(generator, 1, 1, 9)
+    _write_legacy(data_dir, chunk, chunk.jsonify_delta())
+
+    _assert_loads_back(chunk, 1, 1, generator)
+
+
+def test_full_saves_still_load_and_convert(generator, data_dir):
+    chunk = Chunk(Coord.chunk(0, 3), terrain_generator=generator, id=6)
+    chunk.tiles[1].id = 4
+    _write_legacy(data_dir, chunk, chunk.jsonify())
+
+    loaded = Chunk.load(0, 3, GAME, terrain_generator=generator)
+    assert loaded.baseline is None
+    assert _snapshot(loaded) == _snapshot(chunk)
+
+    loaded.save(GAME)
+    record = _saved_record(0, 3)
+    assert record.is_delta and record.indices.tolist() == [1] and record.ids.tolist() == [4]
+    assert not (data_dir / "games" / GAME / "chunks" / "0").exists()
+
+
+def test_newer_format_version_is_rejected(generator):
+    chunk = Chunk(Coord.chunk(0, 0), terrain_generator=generator, id=7)
+    raw = bytearray(chunk.serialize())
+    raw[4:6] = (CHUNK_FORMAT_VERSION + 1).to_bytes(2, "little")
+
+    assert len(raw) > CHUNK_HEADER.size
+    with pytest.raises(ValueError):
+        decode_chunk(bytes(raw))
+
+
+def test_clean_chunks_are_not_saved_again(generator, monkeypatch):
+    chunk = _edited_chunk(generator, 1, 1, 12)
+    assert chunk.save(GAME) # Never saved
+    assert not chunk.save(GAME)
+    chunk_writer.flush()
+
+    loaded = Chunk.load(1, 1, GAME, terrain_generator=generator)
+    assert not loaded.save(GAME)
+
+    for entity in loaded.entities: entity.lifespan += 1000 # Ages every frame, not worth a save
+    assert not loaded.save(GAME)
+
+    loaded.entities.pop()
+    assert loaded.save(GAME) and not loaded.save(GAME)
+
+    loaded.tiles[20].id = 4
+    loaded.tiles[20].notify_subscribers()
+    assert loaded.save(GAME)
+    assert _saved_record(1, 1).ids[list(_saved_record(1, 1).indices).index(20)] == 4
+
+
+def _map(generator, monkeypatch):
+    """ Just enough of a Map to load its chunk window, chunks are generated on this process """
+    from types import SimpleNamespace
+    from world import map as map_module
+    from world.map import Map
+    from world.generation.chunk_workers import ChunkWorkerPool
+
+    monkeypatch.setattr(map_module, "chunk_worker_pool", ChunkWorkerPool(0))
+    game_map = Map.__new__(Map)
+    game_map.game_name, game_map.terrain_generator, game_map.assets = GAME, generator, None
+    game_map.entity_manager = SimpleNamespace(add_entity=lambda entity: None)
+    game_map.load_radius, game_map.chunk_center = 0, Coord.chunk(0, 0).as_chunk_coord()
+    game_map.chunk_cache, game_map.saves_skipped = ChunkCache(game_map._persist_chunk), 0
+    game_map._staged, game_map._staging, game_map._prefetch_target, game_map.prefetch_wasted = {}, None, None, 0
+    game_map._is_loading_chunks = False
+    return game_map
+
+
+def test_listed_chunk_with_missing_region_is_generated(generator, data_dir, monkeypatch):
+    _edited_chunk(generator, 0, 0, 14).save(GAME)
+    chunk_writer.flush()
+    close_chunk_stores()
+    for region in (data_dir / "games" / GAME / "regions").iterdir(): region.unlink()
+    assert Chunk.exists(0, 0, GAME) # Still in the manifest
+
+    game_map = _map(generator, monkeypatch)
+    game_map.init_map_chunks()
+    fresh = Chunk(Coord.chunk(0, 0), terrain_generator=generator, id=14)
+    assert game_map.chunks[(0, 0)].tiles.ids.tolist() == fresh.tiles.ids.tolist()
+    assert not Chunk.exists(0, 0, GAME)
+
+
+def test_respawn_takes_chunks_from_the_cache(generator, monkeypatch):
+    game_map = _map(generator, monkeypatch)
+    game_map.entity_manager.get_chunk_entities = lambda chunk: []
+    game_map.init_map_chunks()
+    game_map.save()
+
+    # The chunk leaves the map with a change its save doesn't have yet
+    chunk = game_map.chunks.pop((0, 0))
+    chunk.tiles[30].id = 5
+    chunk.tiles[30].notify_subscribers()
+    game_map.chunk_cache.put((0, 0), chunk)
+
+    # Respawn, then save
+    game_map.init_map_chunks()
+    assert game_map.chunks[(0, 0)] is chunk and len(game_map.chunk_cache) == 0
+    game_map.save()
+    assert Chunk.load(0, 0, GAME, terrain_generator=generator).tiles[30].id == 5
+
+
+def test_failed_worker_and_reader_jobs_do_not_stop_the_map(generator, monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+    _edited_chunk(generator, 0, 0, 16).save(GAME)
+    chunk_writer.flush()
+
+    def broken(*args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    game_map = _map(generator, monkeypatch)
+    monkeypatch.setattr(game_map, "_submit_load", broken)
+    game_map.init_map_chunks() # Read failed, read again here
+    assert game_map.chunks[(0, 0)].tiles[10].id == 3
+
+    game_map = _map(generator, monkeypatch)
+    game_map.load_radius = 1
+    from world import map as map_module
+    monkeypatch.setattr(map_module.chunk_worker_pool, "submit", broken)
+    game_map.init_map_chunks() # Generation failed, generated here
+    fresh = Chunk(Coord.chunk(1, 1), terrain_generator=generator, id=17)
+    assert game_map.chunks[(1, 1)].tiles.ids.tolist() == fresh.tiles.ids.tolist()
+
+
+def test_pregenerated_chunks_load_without_generating(generator, monkeypatch):
+    import pregenerate
+    from world import map as map_module, chunk_reader as chunk_reader_module
+    from world.map import Map
+
+    pregenerate.save_chunk(GAME, generator, 3, -2, generate_chunk_data(generator, 3, -2))
+    expected = _snapshot(Chunk.load(3, -2, GAME, terrain_generator=generator))
+    assert not _saved_record(3, -2).is_delta and not Chunk.is_delta(3, -2, GAME)
+
+    def no_generation(*args): raise AssertionError("pregenerated chunk was generated again")
+    monkeypatch.setattr(map_module.chunk_worker_pool, "submit", no_generation)
+    monkeypatch.setattr(chunk_reader_module, "generate_chunk_data", no_generation)
+
+    game_map = Map.__new__(Map)
+    game_map.game_name, game_map.terrain_generator, game_map.assets = GAME, generator, None
+    loaded = game_map._begin_chunk_load((3, -2), game_map._submit_load(3, -2))
+    loaded.finish_load()
+    assert _snapshot(loaded) == expected and not loaded.dirty
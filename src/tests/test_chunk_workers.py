@@ -0,0 +1,83 @@
+import numpy as np
+from world.generation.types import Degree
+from world.generation.terrain_generator import TerrainGenerator
+from world.generation.spawner_placement import place_spawners
+from world.generation.chunk_workers import ChunkWorkerPool, generate_chunk_data
+from regestries import ENTITY_REGISTRY, ChunkSpawnerRegistry
+from utils.coords import Coord
+
+
+def _make_generator(seed=5):
+    return TerrainGenerator(seed, Degree.Medium, Degree.Medium, Degree.Medium)
+
+
+def test_worker_terrain_matches_local():
+    pool = ChunkWorkerPool(workers=1)
+    try:
+        terrain = pool.submit(_make_generator(), 2, -1).result(timeout=60)
+    finally:
+        pool.shutdown()
+
+    expected = _make_generator().generate_chunk_terrain(2, -1)
+    assert terrain.origin == expected.origin
+    assert np.array_equal(terrain.ids, expected.ids)
+    assert np.array_equal(terrain.has_tree, expected.has_tree)
+    assert np.array_equal(terrain.is_water, expected.is_water)
+
+
+def test_place_spawners_marks_footprint():
+    terrain = _make_generator().generate_chunk_terrain(0, 0)
+    has_tree = terrain.has_tree.copy()
+    for seed in range(5): place_spawners(terrain, seed)
+
+    assert np.all(terrain.has_obstacle[has_tree])
+    for classname, i in terrain.spawners:
+        e_type = ENTITY_REGISTRY[classname]
+        x, y = divmod(i, terrain.size)
+        assert x + int(e_type.SIZE.x) <= terrain.size and y + int(e_type.SIZE.y) <= terrain.size
+        assert not has_tree[i] and terrain.has_obstacle[i]
+
+
+def test_generate_chunk_data_without_pool():
+    terrain = ChunkWorkerPool(workers=0).submit(_make_generator(), 0, 0).result()
+    assert np.array_equal(terrain.ids, generate_chunk_data(_make_generator(), 0, 0).ids)
+
+
+def test_place_spawners_never_overlaps():
+    class Block:
+        SIZE = Coord.math(2, 2, 0)
+        CAN_SPAWN_SPAWNER = staticmethod(lambda terrain: ~terrain.has_obstacle & ~terrain.is_water)
+
+    registry = ChunkSpawnerRegistry()
+    registry.types, registry.weights = [Block], [1, 1000] # Nearly every tile rolls a Block
+
+    terrain = _make_generator().generate_chunk_terrain(0, 0)
+    before = terrain.copy()
+    place_spawners(terrain, 1, registry)
+
+    covered = np.zeros((terrain.size, terrain.size), dtype=int)
+    for _, i in terrain.spawners:
+        x, y = divmod(i, terrain.size)
+        covered[x:x + 2, y:y + 2] += 1
+    covered = covered.ravel()
+
+    assert len(terrain.spawners) > 100
+    assert covered.max() == 1
+    assert not np.any(covered.astype(bool) & (before.has_obstacle | before.is_water))
+
+
+def test_pool_is_replaced_after_a_worker_dies():
+    import os, signal
+    from concurrent.futures.process import BrokenProcessPool
+    pool = ChunkWorkerPool(workers=1)
+    try:
+        pool.submit(_make_generator(), 0, 0).result(timeout=60)
+        for pid in list(pool._executor._processes): os.kill(pid, signal.SIGKILL)
+        try:
+            pool.submit(_make_generator(), 1, 0).result(timeout=60)
+        except BrokenProcessPool:
+            pass # Submitted before the pool noticed
+        terrain = pool.submit(_make_generator(), 2, -1).result(timeout=60)
+    finally:
+        pool.shutdown()
+    assert np.array_equal(terrain.ids, _make_generator().generate_chunk_terrain(2, -1).ids)
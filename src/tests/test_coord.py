@@ -39,3 +39,65 @@ def test_screen_coord_movement():
 
 def test_chunk_coord_movement():
     pass
+
+
+# ---- FastCoord matches NumpyCoord ---- #
+
+import numpy as np
+from utils.coords import CoordArray, FastCoord, NumpyCoord
+
+POINTS = [(0, 0, 0), (1.5, -2.25, 0.5), (-63.9, 64.1, 3), (130, -70.5, -1), (-0.001, 0.001, 0)]
+
+
+def _same(a, b):
+    if isinstance(a, (FastCoord, NumpyCoord)): a, b = a.location, b.location
+    return np.array_equal(np.asarray(a), np.asarray(b)) or np.allclose(a, b, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("point", POINTS)
+def test_fast_coord_conversions_match(point):
+    fast, ref = FastCoord.world(*point), NumpyCoord.world(*point)
+    for name in ("as_world_coord", "as_view_coord", "as_chunk_coord", "floor_world", "floor_chunk", "tile_center"):
+        assert _same(getattr(fast, name)(), getattr(ref, name)()), name
+
+    assert _same(fast.copy().normalize_in_screen_space(), ref.copy().normalize_in_screen_space())
+    assert _same(fast.copy().update_as_view_coord(17, -5, 1), ref.copy().update_as_view_coord(17, -5, 1))
+    assert _same(fast.copy().update_as_chunk_coord(1, -1), ref.copy().update_as_chunk_coord(1, -1))
+    assert _same(FastCoord.view(*point), NumpyCoord.view(*point))
+    assert fast.jsonify() == ref.jsonify() and str(fast) == str(ref) and hash(fast) == hash(ref)
+
+
+@pytest.mark.parametrize("point", POINTS)
+@pytest.mark.parametrize("other", [(2, -3, 0.5), 4, Ellipsis])
+def test_fast_coord_math_matches(point, other):
+    fast, ref = FastCoord.world(*point), NumpyCoord.world(*point)
+    fast_other, ref_other = (FastCoord.world(7, 1, -2), NumpyCoord.world(7, 1, -2)) if other is Ellipsis else (other, other)
+
+    for op in ("__add__", "__sub__", "__mul__", "__radd__", "__rsub__", "__rmul__", "__iadd__", "__isub__", "__imul__"):
+        assert _same(getattr(fast.copy(), op)(fast_other), getattr(ref.copy(), op)(ref_other)), op
+    for name in ("dot", "dot_2D", "cross_2D", "manhattan", "manhattan_2D", "euclidean", "euclidean_2D", "cross"):
+        assert _same(getattr(fast, name)(fast_other), getattr(ref, name)(ref_other)), name
+    assert (fast == fast_other) == (ref == ref_other)
+
+
+def test_fast_coord_divides_like_numpy():
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = NumpyCoord.world(1, -2, 0) / NumpyCoord.world(0, 0, 0)
+    result = FastCoord.world(1, -2, 0) / FastCoord.world(0, 0, 0)
+    assert result.x == expected.x and result.y == expected.y and np.isnan(result.z)
+    assert FastCoord.world(1, 2, 3) == FastCoord.world(1, 2, 3 + 1e-9) and not FastCoord.world(1, 2, 3) == None
+
+
+def test_coord_array_matches_coord():
+    coords = [Coord.world(*point) for point in POINTS]
+    points = CoordArray.from_coords(coords)
+    for name in ("as_world_coord", "as_view_coord", "as_chunk_coord"):
+        assert np.array_equal(getattr(points, name)(), [getattr(c, name)() for c in coords]), name
+
+    assert all(a == b for a, b in zip(points.tile_center(), [c.tile_center() for c in coords]))
+    assert np.allclose(points.euclidean_2D(coords[1]), [c.euclidean_2D(coords[1]) for c in coords])
+    assert np.allclose(points.manhattan(coords[2]), [c.manhattan(coords[2]) for c in coords])
+
+    moved = points.copy().update_as_view_coord(17, -5, 1)
+    assert all(a == c.copy().update_as_view_coord(17, -5, 1) for a, c in zip(moved, coords))
+    assert CoordArray.view(*moved.as_view_coord().T)[1] == Coord.view(*moved[1].as_view_coord(), 0)
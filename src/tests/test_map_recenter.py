@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from utils.coords import Coord
+from world.map import Map, view_load_radius
+from world.chunk_prefetcher import MotionPredictor
+from constants import CHUNK_SIZE, CHUNK_RECENTER_MARGIN
+
+
+def _map(center: Coord) -> Map:
+    m = Map.__new__(Map)
+    m.screen = SimpleNamespace(get_screen_center=lambda: m.camera)
+    m.camera = center
+    m.load_radius = 1
+    m.chunk_center = center.as_chunk_coord()
+    m._last_center_chunk = m.chunk_center
+    m._is_loading_chunks = False
+    m.recenters = m.recenters_avoided = 0
+    m.motion = MotionPredictor()
+    m._staged, m._staging, m._prefetch_target = {}, None, None
+    return m
+
+
+def test_margin_bounds_follow_chunk_coords():
+    m = _map(Coord.world(CHUNK_SIZE / 2, -CHUNK_SIZE / 2)) # Center of chunk (0, 0)
+    assert not m._past_recenter_margin(Coord.world(-CHUNK_RECENTER_MARGIN, 0))
+    assert m._past_recenter_margin(Coord.world(-CHUNK_RECENTER_MARGIN - 1, 0))
+    assert not m._past_recenter_margin(Coord.world(0, CHUNK_RECENTER_MARGIN))
+    assert m._past_recenter_margin(Coord.world(0, CHUNK_RECENTER_MARGIN + 1))
+    assert not m._past_recenter_margin(Coord.world(CHUNK_SIZE + CHUNK_RECENTER_MARGIN - 1, 0))
+    assert m._past_recenter_margin(Coord.world(0, -CHUNK_SIZE - CHUNK_RECENTER_MARGIN))
+
+
+def test_hovering_on_a_border_does_not_recenter():
+    m = _map(Coord.world(1, -1))
+    for x in (-1, 1, -1, 1, -1):
+        m.camera = Coord.world(x, -1)
+        m.handle_chunk_loading()
+        m.handle_chunk_loading() # Staying put is not another avoided recenter
+
+    assert not m._is_loading_chunks and m.recenters == 0
+    assert m.recenters_avoided == 3 # Each step into the neighbour chunk
+
+
+def test_motion_predictor_follows_steady_movement():
+    motion = MotionPredictor(smoothing_ms=100)
+    for frame in range(60):
+        motion.update(Coord.world(frame * 0.1, 0), dt=16) # 6.25 tiles / second
+
+    assert abs(motion.speed - 6.25) < 0.01
+    predicted = motion.predict(Coord.world(0, 0), 2000)
+    assert abs(predicted.x - 12.5) < 0.05 and abs(predicted.y) < 0.01
+
+
+def test_chunk_locations_cover_the_radius_nearest_first():
+    m = _map(Coord.chunk(3, -2))
+    m.load_radius = 2
+    locations = m.get_chunk_locations()
+
+    assert len(set(locations)) == 25 and locations[0] == (3, -2)
+    assert set(locations[1:5]) == {(2, -2), (4, -2), (3, -1), (3, -3)}
+    assert set(locations[-4:]) == {(1, 0), (5, 0), (1, -4), (5, -4)}
+
+
+def test_loaded_bounds_span_the_corner_tiles():
+    m = _map(Coord.chunk(0, 0))
+    m.chunks = {location: None for location in m.get_chunk_locations()}
+    assert m.loaded_bounds() == (-CHUNK_SIZE, 2 * CHUNK_SIZE - 1, -2 * CHUNK_SIZE + 1, CHUNK_SIZE)
+
+
+def test_view_load_radius_leaves_room_for_the_margin():
+    assert view_load_radius() * CHUNK_SIZE > CHUNK_RECENTER_MARGIN
@@ -0,0 +1,137 @@
+import os
+import pytest
+from world.region_store import REGION_ENTRY, REGION_SECTOR, REGION_SIZE, ChunkStore, RegionFile
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ChunkStore(tmp_path)
+    yield store
+    store.close()
+
+
+def test_chunks_round_trip_across_regions(store, tmp_path):
+    chunks = {(x, y): f"chunk {x} {y}".encode() * (x % 5 + 1) for x in range(-20, 20, 3) for y in range(-20, 20, 7)}
+    for (x, y), data in chunks.items(): store.write(x, y, data)
+    store.close()
+
+    reopened = ChunkStore(tmp_path)
+    assert all(reopened.read(x, y) == data for (x, y), data in chunks.items())
+    assert not reopened.exists(0, 0) and reopened.read(0, 0) is None
+    assert len(list((tmp_path / "regions").iterdir())) == len({(x // REGION_SIZE, y // REGION_SIZE) for x, y in chunks})
+    reopened.close()
+
+
+def test_rewrites_reuse_space(tmp_path):
+    region = RegionFile(tmp_path / "r.0.0.region")
+    first = region.write(0, 0, b"a" * 100)
+    region.write(0, 1, b"b" * 100)
+    size = os.path.getsize(region.path)
+
+    # Never written over its current save: goes to the end, freeing the first slot
+    second = region.write(0, 0, b"c" * 300)
+    assert second != first
+    assert os.path.getsize(region.path) > size
+
+    # The next rewrite takes the freed slot, as does another chunk once that one is free again
+    assert region.write(0, 0, b"d" * 200) == first
+    assert region.write(3, 3, b"e" * 400) == second
+    assert os.path.getsize(region.path) <= second + REGION_SECTOR
+
+    assert region.read(0, 0) == b"d" * 200
+    assert region.read(0, 1) == b"b" * 100
+    assert region.read(3, 3) == b"e" * 400
+    region.close()
+
+
+def test_crash_while_saving_keeps_the_previous_save(tmp_path, monkeypatch):
+    region = RegionFile(tmp_path / "r.0.0.region")
+    region.write(1, 1, b"old" * 50)
+
+    # Payload written, then the game dies before the index entry is
+    write = region._file.write
+    def crash(data):
+        if len(data) == REGION_ENTRY.size: raise OSError("power cut")
+        return write(data)
+    monkeypatch.setattr(region._file, "write", crash)
+    with pytest.raises(OSError): region.write(1, 1, b"new" * 50)
+    monkeypatch.undo()
+    region.close()
+
+    region = RegionFile(tmp_path / "r.0.0.region")
+    assert region.read(1, 1) == b"old" * 50
+    region.close()
+
+
+def test_damaged_payload_is_ignored(tmp_path):
+    region = RegionFile(tmp_path / "r.0.0.region")
+    region.write(2, 5, b"x" * 64)
+    offset = region._index[region._slot(2, 5)][0]
+    region.close()
+
+    with open(tmp_path / "r.0.0.region", "r+b") as f:
+        f.seek(offset)
+        f.write(b"y")
+
+    region = RegionFile(tmp_path / "r.0.0.region")
+    assert region.contains(2, 5) and region.read(2, 5) is None
+    region.close()
+
+
+def test_manifest_answers_existence(store, tmp_path):
+    store.write(3, -40, b"a")
+    store.write(17, 2, b"b")
+    store.close()
+
+    reopened = ChunkStore(tmp_path)
+    assert set(reopened.manifest) == {(3, -40), (17, 2)}
+    assert reopened.exists(3, -40) and not reopened.exists(3, -39)
+    assert not reopened._regions # Nothing had to be opened to answer
+    reopened.close()
+
+
+def test_missing_region_file_reads_as_no_chunk(store, tmp_path):
+    store.write(5, 5, b"a")
+    store.close()
+    (tmp_path / "regions" / "r.0.0.region").unlink()
+
+    reopened = ChunkStore(tmp_path)
+    assert reopened.exists(5, 5) and reopened.read(5, 5) is None
+    reopened.close()
+
+
+def test_stale_manifest_is_reindexed(store, tmp_path):
+    store.write(0, 0, b"a")
+    store.sync()
+    store.write(1, 0, b"b") # Never synced, as if the game crashed here
+
+    reopened = ChunkStore(tmp_path)
+    assert reopened.exists(0, 0) and reopened.exists(1, 0)
+    assert reopened.read(1, 0) == b"b"
+    reopened.close()
+
+
+def test_baked_tile_groups_round_trip(store, tmp_path):
+    import pygame
+    import numpy as np
+    from world.baked_tiles import BakedSnapshot, content_hash, decode_baked
+
+    surfaces = [pygame.Surface((8, 4), pygame.SRCALPHA), pygame.Surface((3, 5), pygame.SRCALPHA)]
+    surfaces[0].fill((10, 20, 30, 40))
+    surfaces[1].fill((200, 0, 0, 255))
+    tiles = [pygame.Surface((2, 2))]
+    ids = np.zeros(16, dtype=np.uint8)
+
+    store.write_baked(-3, 4, BakedSnapshot(content_hash(ids, tiles), [((1, -2), surfaces[0]), ((5, 6), surfaces[1])]).encode())
+    store.close()
+
+    reopened = ChunkStore(tmp_path)
+    baked = decode_baked(reopened.read_baked(-3, 4))
+    assert not reopened.exists(-3, 4) and reopened.read_baked(0, 0) is None
+    assert baked.content_hash == content_hash(ids, tiles)
+    assert [(group.top_left, group.size) for group in baked.groups] == [((1, -2), (8, 4)), ((5, 6), (3, 5))]
+    assert bytes(baked.groups[1].pixels) == pygame.image.tobytes(surfaces[1], "RGBA")
+    reopened.close()
+
+    ids[5] = 2 # Other tiles, the stored bake no longer matches
+    assert content_hash(ids, tiles) != baked.content_hash
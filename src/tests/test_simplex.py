@@ -0,0 +1,44 @@
+import noise
+import numpy as np
+import pytest
+from world.generation import simplex
+
+
+def _reference(xs, ys, **kwargs):
+    return np.array([noise.snoise2(x, y, **kwargs) for x, y in zip(xs.tolist(), ys.tolist())])
+
+
+@pytest.mark.parametrize(
+    'kwargs',
+    [
+        pytest.param({}, id="flat"),
+        pytest.param({'base': 5.0}, id="flat_base"),
+        pytest.param({'octaves': 3, 'persistence': 0.5, 'lacunarity': 1.5}, id="flat_octaves"),
+        pytest.param({'repeatx': 7}, id="repeat_x"),
+        pytest.param({'repeaty': 9, 'octaves': 2, 'base': 2.0}, id="repeat_y"),
+        pytest.param({'repeatx': 3, 'repeaty': 5, 'octaves': 4}, id="repeat_xy"),
+        pytest.param(
+            {'octaves': 3, 'persistence': 0.5, 'lacunarity': 1.5, 'repeatx': 10000, 'repeaty': 10000, 'base': 42},
+            id="terrain_params"
+        ),
+    ]
+)
+@pytest.mark.parametrize('scale', [1, 50, 1000])
+def test_snoise2_matches_noise_extension(kwargs, scale):
+    rng = np.random.default_rng(scale)
+    xs, ys = rng.uniform(-scale, scale, 2000), rng.uniform(-scale, scale, 2000)
+
+    # Exact equality on purpose: terrain must not change when switching implementations
+    assert np.array_equal(simplex.snoise2(xs, ys, **kwargs), _reference(xs, ys, **kwargs))
+
+
+def test_snoise2_keeps_shape():
+    xs, ys = np.meshgrid(np.arange(-4, 4) / 3, np.arange(-2, 3) / 3)
+    values = simplex.snoise2(xs, ys, repeatx=4, repeaty=6)
+    assert values.shape == xs.shape
+    assert np.array_equal(values.ravel(), _reference(xs.ravel(), ys.ravel(), repeatx=4, repeaty=6))
+
+
+def test_snoise2_rejects_bad_octaves():
+    with pytest.raises(ValueError):
+        simplex.snoise2(0.0, 0.0, octaves=0)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from utils.coords import Coord
+from system.id_generator import id_generator
+from world.generation.types import Degree
+from world.generation.terrain_generator import TerrainGenerator
+from world.generation.spawn_locator import SpawnLocator
+
+
+def _is_clear(generator, x, y):
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            tile, _ = generator.generate_tile(x + dx, y + dy, False)
+            if tile.is_water or tile.has_obsticle: return False
+    return True
+
+
+@pytest.mark.parametrize(
+    'seed, origin',
+    [
+        pytest.param(0, (0, 0), id="dry_origin"),
+        pytest.param(4, (0, 0), id="wet_origin"),
+        pytest.param(7, (0, 0), id="diagonal"),
+        pytest.param(4, (130, -70), id="crosses_chunks"),
+    ]
+)
+def test_find_spawn_is_nearest_clear_spot(seed, origin):
+    generator = TerrainGenerator(seed, Degree.High, Degree.High, Degree.Medium)
+    locator = SpawnLocator(generator)
+
+    ids_before = id_generator.current_id
+    spot = locator.find_spawn(Coord.world(*origin))
+    assert id_generator.current_id == ids_before
+
+    ox, oy = origin
+    x, y = int(spot.x), int(spot.y)
+    assert _is_clear(generator, x, y)
+
+    # Brute force over every closer tile
+    best = (x - ox) ** 2 + (y - oy) ** 2
+    r = int(np.ceil(np.sqrt(best)))
+    for cx in range(ox - r, ox + r + 1):
+        for cy in range(oy - r, oy + r + 1):
+            if (cx - ox) ** 2 + (cy - oy) ** 2 < best:
+                assert not _is_clear(generator, cx, cy)
+
+
+def test_peek_blocked_matches_tiles():
+    generator = TerrainGenerator(3, Degree.High, Degree.High, Degree.Medium)
+    blocked = SpawnLocator(generator).peek_blocked(1, -2)
+    for lx, wy in ((0, 0), (5, 17), (63, 63), (20, 40)):
+        tile, _ = generator.generate_tile(64 + lx, -2 * 64 - 63 + wy, False)
+        if tile.is_water or tile.has_obsticle: assert blocked[lx, wy]
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from constants import CHUNK_SIZE
+from world.generation.types import Degree
+from world.generation.terrain_generator import TerrainGenerator
+from world.generation.coord_rng import RngStream, random_floats, random_ints
+
+
+def _make_generator(seed, degree=Degree.Medium):
+    return TerrainGenerator(seed, degree, degree, degree)
+
+
+@pytest.mark.parametrize(
+    'seed, degree, chunk',
+    [
+        pytest.param(0, Degree.Medium, (0, 0), id="origin"),
+        pytest.param(7, Degree.Low, (-3, 2), id="low_negative_chunk"),
+        pytest.param(42, Degree.High, (5, -4), id="high"),
+    ]
+)
+def test_generate_chunk_matches_generate_tile(seed, degree, chunk):
+    batch_generator, tile_generator = _make_generator(seed, degree), _make_generator(seed, degree)
+    cx, cy = chunk
+
+    tiles, entities = batch_generator.generate_chunk(cx, cy)
+
+    expected_tiles, expected_entities = [], []
+    for i in range(CHUNK_SIZE ** 2):
+        x, y = i // CHUNK_SIZE, i % CHUNK_SIZE
+        onborder = x == 0 or x == CHUNK_SIZE - 1 or y == 0 or y == CHUNK_SIZE - 1
+        tile, entity = tile_generator.generate_tile(cx * CHUNK_SIZE + x, cy * CHUNK_SIZE - y, onborder)
+        expected_tiles.append(tile)
+        if entity: expected_entities.append(entity)
+
+    assert [t.jsonify() for t in tiles] == [t.jsonify() for t in expected_tiles]
+    assert [(e.location.x, e.location.y, e.canopy_img_id) for e in entities] == \
+           [(e.location.x, e.location.y, e.canopy_img_id) for e in expected_entities]
+
+
+def test_chunk_terrain_layout():
+    terrain = _make_generator(3).generate_chunk_terrain(1, -1)
+    assert terrain.ids.shape == (CHUNK_SIZE ** 2,)
+    assert terrain.world_location(0) == (CHUNK_SIZE, -CHUNK_SIZE)
+    assert terrain.world_location(CHUNK_SIZE + 1) == (CHUNK_SIZE + 1, -CHUNK_SIZE - 1)
+    assert np.all(terrain.is_border[:CHUNK_SIZE])
+    assert not np.any(terrain.has_tree & terrain.is_water)
+
+
+def test_chunk_is_independent_of_generation_order():
+    fresh = _make_generator(11).generate_chunk_terrain(2, 3)
+
+    generator = _make_generator(11)
+    for cx, cy in ((5, 5), (2, 2), (-1, 0)): generator.generate_chunk_terrain(cx, cy)
+    for x in range(-5, 5): generator.generate_tile(x, x, False)
+    again = generator.generate_chunk_terrain(2, 3)
+
+    assert np.array_equal(fresh.ids, again.ids)
+    assert np.array_equal(fresh.has_tree, again.has_tree)
+
+
+def test_coord_rng_is_pure():
+    xs, ys = np.arange(-50, 50), np.arange(50, -50, -1)
+    a = random_floats(3, xs, ys, RngStream.TREE)
+    assert np.array_equal(a, random_floats(3, xs[::-1], ys[::-1], RngStream.TREE)[::-1])
+    assert random_floats(3, -7, 7, RngStream.TREE)[0] == a[43]
+    assert not np.array_equal(a, random_floats(3, xs, ys, RngStream.TILE))
+    assert not np.array_equal(a, random_floats(4, xs, ys, RngStream.TREE))
+    assert np.all((a >= 0) & (a < 1))
+
+    ints = random_ints(3, xs, ys, RngStream.TILE, 9)
+    assert ints.min() == 0 and ints.max() == 9
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+from utils.coords import Coord
+from world.tile_baker import TileBaker
+
+
+class _Group:
+    def __init__(self, center, baked_order):
+        self.center = center
+        self._baked_order = baked_order
+        self._baked = False
+
+    def is_baked(self):
+        return self._baked
+
+    def bake(self):
+        self._baked = True
+        self._baked_order.append(self.center)
+
+
+def _chunk(centers, order):
+    return SimpleNamespace(needs_bake=True, tile_groups=[_Group(center, order) for center in centers])
+
+
+def test_bakes_nearest_groups_first_and_always_moves_on():
+    order = []
+    far, near = _chunk([(40, 0), (20, 0)], order), _chunk([(5, 5), (0, 1)], order)
+    baker = TileBaker(budget_ms=0)
+
+    while baker.step([far, near], Coord.world(0, 0)): pass
+
+    assert order == [(0, 1), (5, 5), (20, 0), (40, 0)]
+    assert baker.baked == 4 and baker.pending == 0
+    assert not far.needs_bake and not near.needs_bake
@@ -0,0 +1,37 @@
+import numpy as np
+from world.tile_grid import TileGrid
+
+
+class _Listener:
+    def __init__(self):
+        self.updates = []
+
+    def tile_update(self, tile):
+        self.updates.append(tile.index)
+
+
+def test_views_read_and_write_the_arrays():
+    grid = TileGrid.empty(4, (8, 12))
+    tile = grid[6] # local (1, 2)
+
+    assert tile is grid[6] and grid.view_count == 1
+    assert tuple(tile.location.location) == (9, 10, 0)
+
+    tile.id = 5
+    tile.is_water = True
+    tile.has_obsticle = True
+    tile.has_obsticle = False
+    assert grid.ids[6] == 5 and tile.is_water and not tile.has_obsticle
+    assert np.flatnonzero(grid.is_water()).tolist() == [6]
+    assert np.flatnonzero(grid.is_blocked()).tolist() == [6]
+
+
+def test_notifications_reach_grid_and_tile_subscribers():
+    grid = TileGrid.empty(4, (0, 0))
+    everything, one_tile = _Listener(), _Listener()
+    grid.subscribe(everything)
+    grid[3].subscribe(one_tile)
+
+    grid[3].notify_subscribers()
+    grid[7].notify_subscribers()
+    assert everything.updates == [3, 7] and one_tile.updates == [3]
@@ -8,10 +8,18 @@ def close_app():
     from world.game import GameManager
     from system.input_handler import input_handler
     from system.settings import global_settings
+    from world.generation.chunk_workers import chunk_worker_pool
+    from world.region_store import close_chunk_stores
+    from world.chunk_writer import chunk_writer
+    from world.chunk_reader import chunk_reader
 
     GameManager().save_game()
     input_handler.save()
     global_settings.save()
+    chunk_worker_pool.shutdown()
+    chunk_reader.shutdown()
+    chunk_writer.shutdown()
+    close_chunk_stores()
     pygame.quit()
     sys.exit()
 
@@ -1,8 +1,10 @@
 import math
 import numpy as np
-from constants import CHUNK_SIZE
+from numbers import Number
+from typing import Iterable, Tuple
+from constants import CHUNK_SIZE, COORD_IMPL
 
-class Coord:
+class NumpyCoord:
     """
         3D coordinate helper used throughout the game.
 
@@ -83,8 +85,8 @@ class Coord:
         cam_offset is subtracted from the provided view coords before conversion.
         """
         screen = np.array([vx, vy, vz], dtype=np.float64) - cam_offset
-        world_coords = Coord.INV_BASIS @ screen
-        return Coord(world_coords)
+        world_coords = NumpyCoord.INV_BASIS @ screen
+        return NumpyCoord(world_coords)
 
     @classmethod
     def chunk(cls, x, y, z=0):
@@ -116,7 +118,7 @@ class Coord:
         return np.array([x, y, z])
 
     def as_view_coord(self):
-        screen_pos = Coord.BASIS @ self.location
+        screen_pos = NumpyCoord.BASIS @ self.location
         return np.floor(screen_pos).astype(int)[:-1]
        
 
@@ -135,15 +137,15 @@ class Coord:
         return self
 
     def update_as_view_coord(self, dx, dy, dz=0):
-        delta_world = Coord.INV_BASIS @ np.array([dx, dy, dz], dtype=np.float64) 
+        delta_world = NumpyCoord.INV_BASIS @ np.array([dx, dy, dz], dtype=np.float64) 
         self.location += delta_world
         return self
     
     
     def normalize_in_screen_space(self):
-        cam_screen = Coord.BASIS @ self.location 
+        cam_screen = NumpyCoord.BASIS @ self.location 
         cam_screen_i = np.floor(cam_screen)
-        self.location = Coord.INV_BASIS @ cam_screen_i
+        self.location = NumpyCoord.INV_BASIS @ cam_screen_i
 
         return self
 
@@ -153,7 +155,7 @@ class Coord:
         return self
 
     def copy(self):
-        return Coord.world(*self.location)
+        return NumpyCoord.world(*self.location)
     
     def jsonify(self):
         return {
@@ -187,7 +189,7 @@ class Coord:
         - array-like length 3
         """
 
-        if isinstance(other, Coord):
+        if isinstance(other, NumpyCoord):
             return other.location
         if np.isscalar(other):
             return np.array([other, other, other], dtype=np.float64)
@@ -203,7 +205,7 @@ class Coord:
     def is_null(self): return self.x == 0 and self.y == 0 and self.z == 0
     def norm(self): return np.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
     def dot(self, other): return np.dot(self.location, self._coerce(other))
-    def cross(self, other): return Coord(np.cross(self.location, self._coerce(other)))
+    def cross(self, other): return NumpyCoord(np.cross(self.location, self._coerce(other)))
     def norm_2D(self): return np.sqrt(self.x ** 2 + self.y ** 2)
     def dot_2D(self, other): return np.dot(self.location[:2], self._coerce(other)[:2])
     def cross_2D(self, other): return np.cross(self.location[:2], self._coerce(other)[:2])
@@ -215,16 +217,16 @@ class Coord:
      # Common spatial helpers
     def floor_world(self): 
         """ Return a Coord snapped to integer-ish world coords (see as_world_coord) """
-        return Coord(self.as_world_coord())
+        return NumpyCoord(self.as_world_coord())
     def floor_chunk(self): 
         """ Snap this coord to the origin of its chunk in world space """
-        return Coord(np.trunc(self.location / CHUNK_SIZE) * CHUNK_SIZE)
+        return NumpyCoord(np.trunc(self.location / CHUNK_SIZE) * CHUNK_SIZE)
     def tile_center(self): 
         """
         Return the center of the tile containing this coord.
         Preserves your convention: floor_world + (-0.5, +0.5).
         """
-        return self.floor_world() + Coord.world(-0.5, 0.5)
+        return self.floor_world() + NumpyCoord.world(-0.5, 0.5)
 
     def get_angle_2D(self, other, deg=True, signed=True):
         """
@@ -253,16 +255,16 @@ class Coord:
     # -------------------------------------------------------------------------
 
     # --- arithmetic (new object) ---
-    def __add__(self, other):      return Coord(self.location + self._coerce(other))
-    def __sub__(self, other):      return Coord(self.location - self._coerce(other))
-    def __mul__(self, other):      return Coord(self.location * self._coerce(other))
-    def __truediv__(self, other):  return Coord(self.location / self._coerce(other))
+    def __add__(self, other):      return NumpyCoord(self.location + self._coerce(other))
+    def __sub__(self, other):      return NumpyCoord(self.location - self._coerce(other))
+    def __mul__(self, other):      return NumpyCoord(self.location * self._coerce(other))
+    def __truediv__(self, other):  return NumpyCoord(self.location / self._coerce(other))
 
     # --- reflected arithmetic ---
     def __radd__(self, other):     return self.__add__(other)
-    def __rsub__(self, other):     return Coord(self._coerce(other) - self.location)
+    def __rsub__(self, other):     return NumpyCoord(self._coerce(other) - self.location)
     def __rmul__(self, other):     return self.__mul__(other)
-    def __rtruediv__(self, other): return Coord(self._coerce(other) / self.location)
+    def __rtruediv__(self, other): return NumpyCoord(self._coerce(other) / self.location)
 
     # --- in-place arithmetic ---
     def __iadd__(self, other):     self.location += self._coerce(other); return self
@@ -277,3 +279,442 @@ class Coord:
         except TypeError:
 
             return NotImplemented
+
+
+
+def _div(a: float, b: float) -> float:
+    """ a / b with numpy's float semantics (inf or nan instead of ZeroDivisionError) """
+    if b: return a / b
+    if a == 0 or a != a: return math.nan
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+class FastCoord:
+    """
+        Drop-in replacement for NumpyCoord backed by three slotted floats.
+
+        The public API is the same. Conversions still return small int arrays so callers can
+        slice and unpack them as before, but .x / .y / .z, arithmetic, equality and the
+        update_* methods are plain float math without any NumPy call or array allocation.
+
+        `location` builds a new array on every read. Writing to it does not change the Coord,
+        assign a whole vector (coord.location = ...) instead.
+    """
+    __slots__ = ("x", "y", "z")
+
+    BASIS = NumpyCoord.BASIS
+    INV_BASIS = NumpyCoord.INV_BASIS
+
+    def __init__(self, location):
+        """
+        Construct a Coord from an array-like of length 3.
+        Prefer using Coord.world / Coord.view / Coord.chunk for clarity.
+        """
+        self.x, self.y, self.z = self._coerce(location)
+
+    @property
+    def location(self) -> np.ndarray: return np.array((self.x, self.y, self.z), dtype=np.float64)
+
+    @location.setter
+    def location(self, v): self.x, self.y, self.z = self._coerce(v)
+
+    # -------------------------------------------------------------------------
+    # Constructors
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def world(cls, x, y, z=0):
+        """ Create a Coord directly from world coordinates """
+        instance = object.__new__(cls)
+        instance.x, instance.y, instance.z = float(x), float(y), float(z)
+        return instance
+
+    @classmethod
+    def view(cls, vx, vy, vz, cam_offset=(0, 0, 0)):
+        """
+        Convert view coordinates back into world coordinates.
+        cam_offset is subtracted from the provided view coords before conversion.
+        """
+        ox, oy, oz = cam_offset
+        return cls.world(*_view_to_world(float(vx) - ox, float(vy) - oy, float(vz) - oz))
+
+    @classmethod
+    def chunk(cls, x, y, z=0):
+        """ Construct a world coordinate from chunk coordinates """
+        return cls.world(x * CHUNK_SIZE, y * CHUNK_SIZE, z)
+
+    @classmethod
+    def math(cls, x, y, z):
+        """ Alias for world used in some parts of the codebase to emphasize 'math coords' """
+        return cls.world(x, y, z)
+
+    @classmethod
+    def load(cls, data):
+        """ Load a Coord from a JSON-ish dict with keys x, y, z """
+        return cls.world(float(data["x"]), float(data["y"]), float(data["z"]))
+
+    # -------------------------------------------------------------------------
+    # Conversions (world/view/chunk)
+    # -------------------------------------------------------------------------
+
+    def as_world_coord(self):
+        return np.array((math.ceil(self.x), math.floor(self.y), math.floor(self.z)))
+
+    def as_view_coord(self):
+        vx, vy, _ = _world_to_view(self.x, self.y, self.z)
+        return np.array((math.floor(vx), math.floor(vy)))
+
+    def as_chunk_coord(self):
+        # Same rounding as NumpyCoord.as_chunk_coord
+        return np.array((
+            math.floor(self.x / CHUNK_SIZE), math.ceil(self.y / CHUNK_SIZE), math.floor(self.z / CHUNK_SIZE)
+        ))
+
+    def update_as_world_coord(self, dx, dy, dz=0):
+        self.x += dx
+        self.y += dy
+        self.z += dz
+        return self
+
+    def update_as_view_coord(self, dx, dy, dz=0):
+        wx, wy, wz = _view_to_world(dx, dy, dz)
+        self.x += wx
+        self.y += wy
+        self.z += wz
+        return self
+
+    def normalize_in_screen_space(self):
+        vx, vy, vz = _world_to_view(self.x, self.y, self.z)
+        self.x, self.y, self.z = _view_to_world(math.floor(vx), math.floor(vy), math.floor(vz))
+        return self
+
+    def update_as_chunk_coord(self, dx, dy, dz=0):
+        self.x += dx * CHUNK_SIZE
+        self.y += dy * CHUNK_SIZE
+        self.z += dz * CHUNK_SIZE
+        return self
+
+    def copy(self):
+        return _fast(self.x, self.y, self.z)
+
+    def jsonify(self):
+        return {
+            "x": self.x,
+            "y": self.y,
+            "z": self.z,
+        }
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __str__(self):
+        return f"({self.x}, {self.y}, {self.z})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    # -------------------------------------------------------------------------
+    # Internal coercion
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _coerce(other) -> Tuple[float, float, float]:
+        """ Like NumpyCoord._coerce, but returns an (x, y, z) tuple of floats """
+        if isinstance(other, FastCoord):
+            return other.x, other.y, other.z
+        if isinstance(other, (float, int)) or isinstance(other, Number): # Number is a slow ABC check
+            other = float(other)
+            return other, other, other
+        if isinstance(other, np.ndarray) and other.shape != (3,):
+            raise TypeError("Expected coord, scalar, or array-like of length 3")
+        try:
+            x, y, z = other
+            return float(x), float(y), float(z)
+        except (TypeError, ValueError):
+            raise TypeError("Expected coord, scalar, or array-like of length 3") from None
+
+    # -------------------------------------------------------------------------
+    # Vector math
+    # -------------------------------------------------------------------------
+
+    def is_null(self): return self.x == 0 and self.y == 0 and self.z == 0
+    def norm(self): return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
+    def norm_2D(self): return math.sqrt(self.x ** 2 + self.y ** 2)
+
+    def dot(self, other):
+        ox, oy, oz = self._coerce(other)
+        return self.x * ox + self.y * oy + self.z * oz
+
+    def cross(self, other):
+        ox, oy, oz = self._coerce(other)
+        return _fast(self.y * oz - self.z * oy, self.z * ox - self.x * oz, self.x * oy - self.y * ox)
+
+    def dot_2D(self, other):
+        ox, oy, _ = self._coerce(other)
+        return self.x * ox + self.y * oy
+
+    def cross_2D(self, other):
+        ox, oy, _ = self._coerce(other)
+        return self.x * oy - self.y * ox
+
+    def manhattan(self, other):
+        ox, oy, oz = self._coerce(other)
+        return abs(self.x - ox) + abs(self.y - oy) + abs(self.z - oz)
+
+    def manhattan_2D(self, other):
+        ox, oy, _ = self._coerce(other)
+        return abs(self.x - ox) + abs(self.y - oy)
+
+    def euclidean(self, other):
+        ox, oy, oz = self._coerce(other)
+        return math.sqrt((self.x - ox) ** 2 + (self.y - oy) ** 2 + (self.z - oz) ** 2)
+
+    def euclidean_2D(self, other):
+        ox, oy, _ = self._coerce(other)
+        return math.hypot(self.x - ox, self.y - oy)
+
+    # Common spatial helpers
+    def floor_world(self):
+        """ Return a Coord snapped to integer-ish world coords (see as_world_coord) """
+        return FastCoord.world(math.ceil(self.x), math.floor(self.y), math.floor(self.z))
+
+    def floor_chunk(self):
+        """ Snap this coord to the origin of its chunk in world space """
+        return FastCoord.world(
+            math.trunc(self.x / CHUNK_SIZE) * CHUNK_SIZE,
+            math.trunc(self.y / CHUNK_SIZE) * CHUNK_SIZE,
+            math.trunc(self.z / CHUNK_SIZE) * CHUNK_SIZE
+        )
+
+    def tile_center(self):
+        """ Center of the tile containing this coord, floor_world + (-0.5, +0.5) """
+        return FastCoord.world(math.ceil(self.x) - 0.5, math.floor(self.y) + 0.5, math.floor(self.z))
+
+    def get_angle_2D(self, other, deg=True, signed=True):
+        """ Angle between this vector and `other` in the XY plane, see NumpyCoord.get_angle_2D """
+        if signed:
+            value = math.atan2(self.cross_2D(other), self.dot_2D(other))
+        else:
+            value = math.acos(self.dot_2D(other) / (self.norm_2D() * other.norm_2D()))
+
+        return (math.degrees(value) + 360) % 360 if deg else value
+
+    # -------------------------------------------------------------------------
+    # Arithmetic (returns new Coord)
+    # -------------------------------------------------------------------------
+
+    # --- arithmetic (new object) ---
+    def __add__(self, other):
+        ox, oy, oz = self._coerce(other)
+        return _fast(self.x + ox, self.y + oy, self.z + oz)
+
+    def __sub__(self, other):
+        ox, oy, oz = self._coerce(other)
+        return _fast(self.x - ox, self.y - oy, self.z - oz)
+
+    def __mul__(self, other):
+        ox, oy, oz = self._coerce(other)
+        return _fast(self.x * ox, self.y * oy, self.z * oz)
+
+    def __truediv__(self, other):
+        ox, oy, oz = self._coerce(other)
+        return _fast(_div(self.x, ox), _div(self.y, oy), _div(self.z, oz))
+
+    # --- reflected arithmetic ---
+    def __radd__(self, other):     return self.__add__(other)
+    def __rmul__(self, other):     return self.__mul__(other)
+
+    def __rsub__(self, other):
+        ox, oy, oz = self._coerce(other)
+        return _fast(ox - self.x, oy - self.y, oz - self.z)
+
+    def __rtruediv__(self, other):
+        ox, oy, oz = self._coerce(other)
+        return _fast(_div(ox, self.x), _div(oy, self.y), _div(oz, self.z))
+
+    # --- in-place arithmetic ---
+    def __iadd__(self, other):
+        ox, oy, oz = self._coerce(other)
+        self.x += ox; self.y += oy; self.z += oz
+        return self
+
+    def __isub__(self, other):
+        ox, oy, oz = self._coerce(other)
+        self.x -= ox; self.y -= oy; self.z -= oz
+        return self
+
+    def __imul__(self, other):
+        ox, oy, oz = self._coerce(other)
+        self.x *= ox; self.y *= oy; self.z *= oz
+        return self
+
+    def __itruediv__(self, other):
+        ox, oy, oz = self._coerce(other)
+        self.x, self.y, self.z = _div(self.x, ox), _div(self.y, oy), _div(self.z, oz)
+        return self
+
+    # --- equality (float-friendly, same tolerances as np.allclose) ---
+    def __eq__(self, other) -> bool:
+        try:
+            ox, oy, oz = self._coerce(other)
+        except TypeError:
+            return NotImplemented
+        return _close(self.x, ox) and _close(self.y, oy) and _close(self.z, oz)
+
+
+# -------------------------------------------------------------------------
+# Scalar isometric transform (BASIS / INV_BASIS written out)
+# -------------------------------------------------------------------------
+
+def _world_to_view(x, y, z):
+    return 16 * x + 16 * y, 8 * x - 8 * y - 16 * z, z
+
+
+def _view_to_world(vx, vy, vz):
+    return 0.03125 * vx + 0.0625 * vy + vz, 0.03125 * vx - 0.0625 * vy - vz, vz
+
+
+def _fast(x: float, y: float, z: float) -> FastCoord:
+    """ FastCoord.world for values that are already floats """
+    instance = object.__new__(FastCoord)
+    instance.x, instance.y, instance.z = x, y, z
+    return instance
+
+
+def _close(a, b, rtol=1e-05, atol=1e-08):
+    return a == b or abs(a - b) <= atol + rtol * abs(b)
+
+
+
+class CoordArray:
+    """
+        N world coordinates as one (N, 3) float64 array.
+
+        The batch counterpart of Coord for hot loops (tile groups, tile drawing, entity
+        and shadow projection): every conversion, snap and distance query is one
+        vectorized call over all points instead of one Coord call per point. Results use
+        the same rounding as Coord, row i matches Coord i.
+    """
+    __slots__ = ("points",)
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+    # ---- Constructors ---- #
+
+    @classmethod
+    def world(cls, x, y, z=0):
+        """ From world coordinate arrays (scalars are broadcast) """
+        x, y, z = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (x, y, z)))
+        return cls(np.stack((x, y, z), axis=-1))
+
+    @classmethod
+    def view(cls, vx, vy, vz=0, cam_offset=(0, 0, 0)):
+        """ From view coordinate arrays, cam_offset is subtracted first like in Coord.view """
+        ox, oy, oz = cam_offset
+        vx, vy, vz = (np.asarray(v, dtype=np.float64) for v in (vx, vy, vz))
+        return cls.world(*_view_to_world(vx - ox, vy - oy, vz - oz))
+
+    @classmethod
+    def chunk(cls, x, y, z=0):
+        return cls.world(np.asarray(x) * CHUNK_SIZE, np.asarray(y) * CHUNK_SIZE, z)
+
+    @classmethod
+    def from_coords(cls, coords: Iterable["Coord"]):
+        return cls([(coord.x, coord.y, coord.z) for coord in coords])
+
+    @property
+    def x(self) -> np.ndarray: return self.points[:, 0]
+
+    @property
+    def y(self) -> np.ndarray: return self.points[:, 1]
+
+    @property
+    def z(self) -> np.ndarray: return self.points[:, 2]
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __getitem__(self, key):
+        """ An int gives a Coord, anything else (slice, mask, indices) a CoordArray """
+        if isinstance(key, (int, np.integer)): return Coord.world(*self.points[key])
+        return CoordArray(self.points[key])
+
+    def __iter__(self):
+        return (Coord.world(x, y, z) for x, y, z in self.points.tolist())
+
+    def copy(self):
+        return CoordArray(self.points.copy())
+
+    # ---- Conversions (int arrays, one row per point) ---- #
+
+    def as_world_coord(self) -> np.ndarray:
+        return np.column_stack((np.ceil(self.x), np.floor(self.y), np.floor(self.z))).astype(int)
+
+    def as_view_coord(self) -> np.ndarray:
+        vx, vy, _ = _world_to_view(self.x, self.y, self.z)
+        return np.floor(np.column_stack((vx, vy))).astype(int)
+
+    def as_chunk_coord(self) -> np.ndarray:
+        loc = self.points / CHUNK_SIZE
+        return np.column_stack((np.floor(loc[:, 0]), np.ceil(loc[:, 1]), np.floor(loc[:, 2]))).astype(int)
+
+    def update_as_world_coord(self, dx, dy, dz=0):
+        self.points += np.array((dx, dy, dz), dtype=np.float64)
+        return self
+
+    def update_as_view_coord(self, dx, dy, dz=0):
+        self.points += np.array(_view_to_world(dx, dy, dz), dtype=np.float64)
+        return self
+
+    def update_as_chunk_coord(self, dx, dy, dz=0):
+        self.points += np.array((dx, dy, dz), dtype=np.float64) * CHUNK_SIZE
+        return self
+
+    def normalize_in_screen_space(self):
+        vx, vy, vz = (np.floor(v) for v in _world_to_view(self.x, self.y, self.z))
+        self.points = np.column_stack(_view_to_world(vx, vy, vz))
+        return self
+
+    # ---- Snapping ---- #
+
+    def floor_world(self):
+        return CoordArray(self.as_world_coord())
+
+    def tile_center(self):
+        return self.floor_world().update_as_world_coord(-0.5, 0.5)
+
+    # ---- Distances to a single point ---- #
+
+    def manhattan(self, other) -> np.ndarray:
+        return np.abs(self.points - _as_point(other)).sum(axis=1)
+
+    def manhattan_2D(self, other) -> np.ndarray:
+        return np.abs(self.points[:, :2] - _as_point(other)[:2]).sum(axis=1)
+
+    def euclidean(self, other) -> np.ndarray:
+        return np.linalg.norm(self.points - _as_point(other), axis=1)
+
+    def euclidean_2D(self, other) -> np.ndarray:
+        return np.hypot(*(self.points[:, :2] - _as_point(other)[:2]).T)
+
+    def within_2D(self, other, radius: float) -> np.ndarray:
+        """ Mask of the points at most radius away from other in the XY plane """
+        d = self.points[:, :2] - _as_point(other)[:2]
+        return np.einsum("ij,ij->i", d, d) <= radius * radius
+
+    def __str__(self):
+        return f"CoordArray({len(self)} points)"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def _as_point(other) -> np.ndarray:
+    """ A Coord, scalar or length 3 array-like as a float array of shape (3,) """
+    if hasattr(other, "x"): return np.array((other.x, other.y, other.z), dtype=np.float64)
+    return np.broadcast_to(np.asarray(other, dtype=np.float64), (3,))
+
+
+# Every module imports Coord from here, COORD_IMPL picks the implementation behind it
+Coord = FastCoord if COORD_IMPL == "fast" else NumpyCoord
@@ -0,0 +1,95 @@
+"""
+    Baked tile group surfaces, kept next to the chunk saves so a chunk that is loaded
+    again doesn't have to bake its tile groups again (see ChunkStore.write_baked).
+
+    Binary layout of a chunk's baked groups (little endian):
+        header      BAKED_HEADER (magic, version, content hash, group count)
+        groups      BAKED_GROUP per tile group (top left, width, height), in chunk.tile_groups order
+        pixels      zlib( RGBA bytes of every group, in the same order )
+
+    The content hash covers the tile ids and the tile images, so groups baked from other
+    tiles (the chunk changed, or the tile art did) never match and are baked again.
+"""
+
+import zlib
+import struct
+import hashlib
+import pygame
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from constants import TILE_GROUP_DRAW_SIZE
+
+
+BAKED_MAGIC = b"MDGB"
+BAKED_VERSION = 1
+
+# magic, version, content hash, group count
+BAKED_HEADER = struct.Struct("<4sHQH")
+
+# top left (x, y), width, height
+BAKED_GROUP = struct.Struct("<iiHH")
+
+# Fast compression, baked groups are mostly transparent corners and repeated tiles
+BAKED_COMPRESSION = 1
+
+
+def content_hash(ids: np.ndarray, tile_imgs: List[pygame.Surface]) -> int:
+    """ Hash of what a chunk's tile groups look like: its tile ids, the tile images and the group size """
+    digest = hashlib.blake2b(ids.tobytes(), digest_size=8)
+    digest.update(struct.pack("<HH", TILE_GROUP_DRAW_SIZE, len(tile_imgs)))
+    for img in tile_imgs: digest.update(pygame.image.tobytes(img, "RGBA"))
+    return int.from_bytes(digest.digest(), "little")
+
+
+@dataclass
+class BakedGroup:
+    """ A baked tile group read from disk, made into a surface when it is first drawn """
+    top_left: Tuple[int, int]
+    size: Tuple[int, int]
+    pixels: memoryview # RGBA
+
+    def surface(self) -> pygame.Surface:
+        return pygame.image.frombuffer(self.pixels, self.size, "RGBA").convert_alpha()
+
+
+@dataclass
+class BakedTiles:
+    """ Every tile group of a chunk, as stored """
+    content_hash: int
+    groups: List[BakedGroup]
+
+
+@dataclass
+class BakedSnapshot:
+    """
+        A chunk's baked tile group surfaces at the moment it was saved. Baking always makes
+        new surfaces, so these are never drawn to again and can be encoded on any thread.
+    """
+    content_hash: int
+    groups: List[Tuple[Tuple[int, int], pygame.Surface]] # (top left, surface)
+
+    def encode(self) -> bytes:
+        header = BAKED_HEADER.pack(BAKED_MAGIC, BAKED_VERSION, self.content_hash, len(self.groups))
+        layout = b"".join(BAKED_GROUP.pack(*top_left, *surface.get_size()) for top_left, surface in self.groups)
+        pixels = b"".join(pygame.image.tobytes(surface, "RGBA") for _, surface in self.groups)
+        return header + layout + zlib.compress(pixels, BAKED_COMPRESSION)
+
+
+def decode_baked(raw: bytes) -> Optional[BakedTiles]:
+    """ Baked groups stored by BakedSnapshot.encode, None if raw is not a (readable) baked payload """
+    if len(raw) < BAKED_HEADER.size: return None
+    magic, version, chash, count = BAKED_HEADER.unpack_from(raw)
+    if magic != BAKED_MAGIC or version != BAKED_VERSION: return None
+
+    layout = [BAKED_GROUP.unpack_from(raw, BAKED_HEADER.size + i * BAKED_GROUP.size) for i in range(count)]
+    try:
+        pixels = zlib.decompress(raw[BAKED_HEADER.size + count * BAKED_GROUP.size:])
+    except zlib.error:
+        return None
+
+    groups, offset, view = [], 0, memoryview(pixels)
+    for x, y, w, h in layout:
+        groups.append(BakedGroup((x, y), (w, h), view[offset:offset + w * h * 4]))
+        offset += w * h * 4
+    return BakedTiles(chash, groups) if offset == len(pixels) else None
@@ -1,26 +1,50 @@
 import math
 import uuid
 import json
+import logging
 import pygame
 import random
-from world.tile import Tile
+import numpy as np
+from world.tile_grid import TileGrid, TileView
 from pathlib import Path
 from utils.paths import data_root
 from bisect import bisect_left
 from utils.coords import Coord
 from system.asset_drawer import AssetDrawer
-from constants import CHUNK_SIZE, SEED, TILE_GROUP_DRAW_SIZE, TILES_GEN_PER_STEP, TILES_LOAD_PER_STEP, ENTITY_LOAD_STEP, TOTAL_LOAD_BUDGET 
+from constants import CHUNK_SIZE, SEED, TILE_GROUP_DRAW_SIZE, TILES_GEN_PER_STEP, ENTITY_LOAD_STEP
 from world.tile_group import TileGroup
 from world.biome_tile_weights import BIOME_TILE_WEIGHTS
 from system.id_generator import id_generator
-from regestries import ENTITY_REGISTRY, ChunkSpawnerRegistry
+from regestries import ENTITY_REGISTRY
 from metrics.simple_metrics import timeit
-from world.generation.terrain_generator import default_terrain_generator
-from typing import Tuple, List
+from metrics.stage_profiler import profile_stage
+from world.generation.terrain_generator import default_terrain_generator, ChunkTerrain
+from world.generation.chunk_workers import generate_chunk_data
+from world.chunk_format import ChunkRecord, record_to_json
+from world.chunk_reader import ChunkLoad, read_load, read_record
+from world.chunk_writer import ChunkSnapshot, chunk_writer, is_current
+from world.region_store import ChunkStore, chunk_store
+from world.baked_tiles import BakedSnapshot, BakedTiles, content_hash
+from typing import Tuple, List, Optional, Union
 
 
+logger = logging.getLogger(__name__)
 
 
+# What the optimized renderer draws for a tile group: its baked (surface, top left), or its tiles
+TileDrawItem = Union[Tuple[pygame.Surface, Tuple[int, int]], List[TileView]]
+
+# Entity fields that change every frame without changing anything worth saving
+VOLATILE_ENTITY_FIELDS = ("lifespan",)
+
+
+def entity_fingerprint(entity_data: List[dict]) -> int:
+    """ Hash of saved entity data, ignoring VOLATILE_ENTITY_FIELDS and entity order """
+    return hash(tuple(sorted(
+        json.dumps({k: v for k, v in data.items() if k not in VOLATILE_ENTITY_FIELDS}, sort_keys=True)
+        for data in entity_data
+    )))
+
 
 # Chunk Size will be 64 x 64 tiles
 class Chunk:
@@ -34,89 +58,88 @@ class Chunk:
         assets=None,
         auto_gen=True
     ):
-        self.tiles = []
         self.SIZE = size
         self.location = location
+        self.tiles = TileGrid.empty(size, (int(location.x), int(location.y)))
         self.id = id
         self.random_number_generator = random_number_generator
         self.terrain_generator = terrain_generator
         
-        self.chunk_spawn_chances = ChunkSpawnerRegistry()
-        self.tile_groups = [TileGroup(assets) for _ in range((CHUNK_SIZE // TILE_GROUP_DRAW_SIZE) ** 2)]
+        self.tile_groups: List[TileGroup] = [] # Made once the tiles are (see _set_tiles)
+        self.needs_bake = False # Some tile groups aren't baked (see TileBaker)
 
         self.entities = []
 
+        # Terrain this chunk was generated from, the reference for delta saves
+        self.baseline: Optional[ChunkTerrain] = None
+        self.delta_saves: Optional[bool] = None # None => CHUNK_SAVE_DELTAS, False keeps a full save full
+
+        # ---- Dirty tracking, clean chunks are not saved again ---- #
+        self.dirty = True # Tiles changed since the last save (or never saved)
+        self._saved_entities: Optional[int] = None # entity_fingerprint of the last save
+        self._baked_hash: Optional[int] = None # content_hash of the baked tile groups kept on disk
+
         self._load_state = None
-        self._raw_tile_data = None
+        self._load_terrain = None
+        self._load_baked: Optional[BakedTiles] = None
         self._raw_entity_data = None
-        self._tile_load_index = 0
         self._entity_load_index = 0
-        self._group_build_index = 0
         self._assets = assets
 
         if auto_gen: self.generate()
     
     @classmethod
     @timeit()
-    def load(cls, x, y, game_name, assets=None):
-        path = next(cls.get_data_path(x, y, game_name).iterdir())
-        data = json.loads(path.read_text(encoding='utf-8'))
-
-        chunk_id = data["id"]
-        size = int(data["size"])
-        location = Coord.load(data["location"])
-        tiles = [Tile.load(d) for d in data["tiles"]]
-        entities = [ENTITY_REGISTRY.get(e_data["classname"]).load(e_data) for e_data in data["entities"]]
-
-        chunk = cls(location=location, size=size, id=chunk_id, assets=assets, auto_gen=False)
-        chunk.tiles = tiles
-        chunk.entities = entities
-
-        # Add tiles to tile group
-        for i, tile in enumerate(tiles):
-            x, y = i // chunk.SIZE, i % chunk.SIZE
-            groups_per_row = chunk.SIZE // TILE_GROUP_DRAW_SIZE
-            gx = x // TILE_GROUP_DRAW_SIZE
-            gy = y // TILE_GROUP_DRAW_SIZE
-            tile_group_index = gx * groups_per_row + gy
-            chunk.tile_groups[tile_group_index].add_tile(tile)
-
+    def load(cls, x, y, game_name, assets=None, terrain_generator=default_terrain_generator, terrain=None):
+        """ Load a saved chunk right away (blocks on the disk, the game uses begin_load_from) """
+        chunk = cls.begin_load(x, y, game_name, assets, terrain_generator, terrain)
+        chunk.finish_load()
         return chunk
-    
 
     @classmethod
-    def begin_load(cls, x, y, game_name, assets=None):
-        path = next(cls.get_data_path(x, y, game_name).iterdir())
-        raw_text = path.read_text(encoding="utf-8")
-        data = json.loads(raw_text)
-
-        chunk_id = data["id"]
-        size = int(data["size"])
-        location = Coord.load(data["location"])
+    def begin_load(cls, x, y, game_name, assets=None, terrain_generator=default_terrain_generator, terrain=None):
+        """ 
+            Start loading a saved chunk, finish with step_load().
+            `terrain` is the chunk's regenerated terrain if the caller already has it (delta saves).
+        """
+        load = read_load(cls.get_store(game_name), int(x), int(y), terrain_generator, terrain)
+        return cls.begin_load_from(load, terrain_generator, assets)
 
+    @classmethod
+    def begin_load_from(cls, load: ChunkLoad, terrain_generator=default_terrain_generator, assets=None):
+        """ Start building a chunk read by the ChunkReader, finish with step_load() """
         chunk = cls(
-            location=location,
-            size=size,
-            id=chunk_id,
+            location=load.record.location,
+            size=load.record.size,
+            id=load.record.id,
+            terrain_generator=terrain_generator,
             assets=assets,
             auto_gen=False,
         )
 
         chunk._load_state = "tiles"
-        chunk._raw_tile_data = data["tiles"]
-        chunk._raw_entity_data = data["entities"]
+        chunk.dirty = not is_current(load.record, load.delta) # Older saves are rewritten in the current format
+        chunk.baseline = load.baseline
+        if not load.delta and not chunk.dirty: chunk.delta_saves = False
+        chunk._load_terrain = load.terrain
+        chunk._load_baked = load.baked
+        chunk._raw_entity_data = load.entities
         return chunk
 
-    def step_load(self, tile_budget=TILES_LOAD_PER_STEP, entity_budget=ENTITY_LOAD_STEP, group_budget=TOTAL_LOAD_BUDGET):
-        if self._load_state == "tiles":
-            end = min(self._tile_load_index + tile_budget, len(self._raw_tile_data))
-            for i in range(self._tile_load_index, end):
-                self.tiles.append(Tile.load(self._raw_tile_data[i]))
-            self._tile_load_index = end
+    @classmethod
+    def read_record(cls, x, y, game_name) -> ChunkRecord:
+        return read_record(cls.get_store(game_name), int(x), int(y))
 
-            if self._tile_load_index >= len(self._raw_tile_data):
-                self._load_state = "entities"
+    def finish_load(self):
+        """ Run the remaining step_load() work at once """
+        while not self.step_load(math.inf): pass
 
+    def step_load(self, entity_budget=ENTITY_LOAD_STEP):
+        if self._load_state == "tiles":
+            # Tile state is copied as arrays, only entities are built over several steps
+            self._set_tiles(TileGrid.from_terrain(self._load_terrain), self._load_baked)
+            self._load_terrain = self._load_baked = None
+            self._load_state = "entities"
             return False
 
         if self._load_state == "entities":
@@ -128,26 +151,8 @@ class Chunk:
             self._entity_load_index = end
 
             if self._entity_load_index >= len(self._raw_entity_data):
-                self._load_state = "groups"
-
-            return False
-
-        if self._load_state == "groups":
-            groups_per_row = self.SIZE // TILE_GROUP_DRAW_SIZE
-            end = min(self._group_build_index + group_budget, len(self.tiles))
-
-            for i in range(self._group_build_index, end):
-                tile = self.tiles[i]
-                x, y = i // self.SIZE, i % self.SIZE
-                gx = x // TILE_GROUP_DRAW_SIZE
-                gy = y // TILE_GROUP_DRAW_SIZE
-                tile_group_index = gx * groups_per_row + gy
-                self.tile_groups[tile_group_index].add_tile(tile)
-
-            self._group_build_index = end
-
-            if self._group_build_index >= len(self.tiles):
-                self._raw_tile_data = None
+                # Loaded entities don't keep every saved field (e.g. trees get new ids), compare later saves to them as built
+                self._saved_entities = entity_fingerprint(self._entity_data())
                 self._raw_entity_data = None
                 self._load_state = "done"
                 return True
@@ -155,13 +160,76 @@ class Chunk:
             return False
 
         return self._load_state == "done"
+
+    def _set_tiles(self, tiles: TileGrid, baked: Optional[BakedTiles] = None):
+        self.tiles = tiles
+        self.tiles.subscribe(self)
+        groups_per_row = self.SIZE // TILE_GROUP_DRAW_SIZE
+        self.tile_groups = [
+            TileGroup(self._assets, tiles, gx, gy) for gx in range(groups_per_row) for gy in range(groups_per_row)
+        ]
+        self.needs_bake = True
+
+        # Groups baked when the chunk was saved are reused if they were baked from these tiles
+        if baked is not None and self._assets is not None and len(baked.groups) == len(self.tile_groups):
+            if baked.content_hash == (chash := content_hash(tiles.ids, self._assets)):
+                for group, baked_group in zip(self.tile_groups, baked.groups): group.use_baked(baked_group)
+                self._baked_hash = chash
     
     @timeit()
-    def save(self, game_name: str):
+    def save(self, game_name: str, force: bool = False, delta: Optional[bool] = None) -> bool:
+        """ 
+            Queue this chunk's current state to be written in the background (see ChunkWriter).
+            Skipped (returns False) if neither its tiles nor its entities changed since the last save.
+            `delta` overrides delta_saves, e.g. False for a full save that loads without regenerating.
+        """
         x, y, _ = self.location.as_chunk_coord()
-        path = self.get_data_path(x, y, game_name)
-        file_path = path / f"{self.id}.chunk"
-        file_path.write_text(json.dumps(self.jsonify(), ensure_ascii=False), encoding='utf-8')
+        store = self.get_store(game_name)
+        self._save_baked(store, int(x), int(y))
+
+        entities = self._entity_data()
+        fingerprint = entity_fingerprint(entities)
+        if not (force or self.dirty or fingerprint != self._saved_entities): return False
+
+        chunk_writer.submit(store, int(x), int(y), self.snapshot(entities, delta))
+        self.dirty = False
+        self._saved_entities = fingerprint
+        return True
+
+    def _save_baked(self, store: ChunkStore, x: int, y: int) -> None:
+        """ Queue the baked tile groups to be kept on disk, once all of them are baked and if they aren't there already """
+        if self._assets is None or not self.tile_groups: return
+        if not all(group.is_baked() for group in self.tile_groups): return
+
+        chash = content_hash(self.tiles.ids, self._assets)
+        if chash == self._baked_hash: return
+        chunk_writer.submit_baked(store, x, y, BakedSnapshot(chash, [group.baked_surface() for group in self.tile_groups]))
+        self._baked_hash = chash
+
+    def tile_update(self, tile: TileView):
+        self.dirty = True
+        self.needs_bake = True
+        groups_per_row = self.SIZE // TILE_GROUP_DRAW_SIZE
+        gx, gy = (tile.index // self.SIZE) // TILE_GROUP_DRAW_SIZE, (tile.index % self.SIZE) // TILE_GROUP_DRAW_SIZE
+        self.tile_groups[gx * groups_per_row + gy].tile_update(tile)
+
+    def snapshot(self, entities: Optional[List[dict]] = None, delta: Optional[bool] = None) -> ChunkSnapshot:
+        record = ChunkRecord(
+            id=self.id,
+            size=self.SIZE,
+            location=self.location.copy(),
+            ids=self.tiles.ids.copy(),
+            flags=self.tiles.flags.copy(),
+            entities=entities if entities is not None else self._entity_data()
+        )
+        return ChunkSnapshot(record, self.baseline, self.terrain_generator, delta if delta is not None else self.delta_saves)
+
+    def _entity_data(self) -> List[dict]:
+        return [e for entity in self.entities if (e := entity.jsonify())]
+
+    def serialize(self) -> bytes:
+        """ Save file bytes of this chunk (see ChunkSnapshot.encode) """
+        return self.snapshot().encode()
 
     def jsonify(self):
         return {
@@ -169,8 +237,16 @@ class Chunk:
             "size": self.SIZE,
             "location": self.location.jsonify(),
             "tiles": [tile.jsonify() for tile in self.tiles],
-            "entities": [e for entity in self.entities if (e := entity.jsonify())]
+            "entities": self._entity_data()
         }
+
+    def jsonify_delta(self):
+        """ Like jsonify() but only tiles that differ from the regenerated terrain are stored """
+        return record_to_json(self.snapshot().delta_record())
+
+    def tile_state(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """ (ids, is_border, is_water, has_obstacle) of every tile as arrays """
+        return self.tiles.ids.copy(), self.tiles.is_border(), self.tiles.is_water(), self.tiles.has_obstacle()
     
     def add_entity(self, entity):
         pass
@@ -184,68 +260,51 @@ class Chunk:
         if self.random_number_generator is None:
             raise ValueError("random_number_generator must be provided before generating tiles.")
 
-        # Generate tiles in rendering order
-        self.tiles = []
-        num_tiles = self.SIZE ** 2
-        chunk_world_loc = self.location.as_world_coord()
-        for i in range(num_tiles):
-            x, y = i // self.SIZE, i % self.SIZE
-            onborder = (x == 0 or x == self.SIZE - 1 or y == 0 or y == self.SIZE - 1)
-            location = Coord.world(chunk_world_loc[0] + x, chunk_world_loc[1] - y)
-            tile, entity = self.terrain_generator.generate_tile(location.x, location.y, onborder)
-            self.tiles.append(tile)
-            if entity: self.entities.append(entity)
-
-            groups_per_row = self.SIZE // TILE_GROUP_DRAW_SIZE
-            gx = x // TILE_GROUP_DRAW_SIZE
-            gy = y // TILE_GROUP_DRAW_SIZE
-            tile_group_index = gx * groups_per_row + gy
-            self.tile_groups[tile_group_index].add_tile(tile)
-        
-        self._generate_chunk_spawners()
+        self.start_generation()
+        self.step_generation(self.SIZE * self.SIZE)
 
-    def start_generation(self):
-        self.tiles = []
+    def start_generation(self, terrain: Optional[ChunkTerrain] = None):
+        """ 
+            Begin building this chunk from `terrain` (e.g. produced by a chunk worker).
+            If no terrain is given it is generated here on the calling process.
+        """
         self.entities = []
         self._gen_index = 0
         self._gen_done = False
-        self._groups_per_row = self.SIZE // TILE_GROUP_DRAW_SIZE
-        self._chunk_world_loc = self.location.as_world_coord()
+
+        # Terrain arrays are computed up front, trees are built over several steps
+        if terrain is None:
+            cx, cy, _ = self.location.as_chunk_coord()
+            terrain = generate_chunk_data(self.terrain_generator, cx, cy, self.SIZE)
+        self._gen_terrain = terrain
 
     def step_generation(self, tiles_per_step=TILES_GEN_PER_STEP):
         if self._gen_done:
             return True
 
-        end = min(self._gen_index + tiles_per_step, self.SIZE * self.SIZE)
-
-        for i in range(self._gen_index, end):
-            x = i // self.SIZE
-            y = i % self.SIZE
-            onborder = (x == 0 or x == self.SIZE - 1 or y == 0 or y == self.SIZE - 1)
-
-            wx = self._chunk_world_loc[0] + x
-            wy = self._chunk_world_loc[1] - y
+        if self._gen_index == 0:
+            with profile_stage("tiles"):
+                self._set_tiles(TileGrid.from_terrain(self._gen_terrain))
 
-            tile, entity = self.terrain_generator.generate_tile(wx, wy, onborder)
-            self.tiles.append(tile)
-            if entity:
-                self.entities.append(entity)
+        end = min(self._gen_index + tiles_per_step, self.SIZE * self.SIZE)
 
-            gx = x // TILE_GROUP_DRAW_SIZE
-            gy = y // TILE_GROUP_DRAW_SIZE
-            tile_group_index = gx * self._groups_per_row + gy
-            self.tile_groups[tile_group_index].add_tile(tile)
+        with profile_stage("tree_entities"):
+            for i in np.flatnonzero(self._gen_terrain.has_tree[self._gen_index:end]) + self._gen_index:
+                self.entities.append(self._gen_terrain.build_tree(int(i)))
 
         self._gen_index = end
 
         if self._gen_index >= self.SIZE * self.SIZE:
-            self._generate_chunk_spawners()
+            for classname, i in self._gen_terrain.spawners:
+                self.entities.append(ENTITY_REGISTRY[classname](self.tiles[i]))
+            self.baseline = self._gen_terrain
+            self._gen_terrain = None
             self._gen_done = True
             return True
 
         return False
     
-    def get_tile(self, location: Coord) -> Tile | None:
+    def get_tile(self, location: Coord) -> TileView | None:
         if not self.contains_coord(location): return None
         location = location.copy()
         location -= Coord.chunk(*location.as_chunk_coord())
@@ -254,21 +313,6 @@ class Chunk:
         return self.tiles[x * self.SIZE + y]
     
 
-    def _generate_chunk_spawners(self) -> None:
-        entities_spawned = 0
-        for tile in self.tiles:
-            if (e_type := self.chunk_spawn_chances.choose_random_type()):
-                tiles_to_check = [
-                    self.get_tile(tile.location.copy().update_as_world_coord(x, -y))
-                    for x in range(int(e_type.SIZE.x))
-                    for y in range(int(e_type.SIZE.y))
-                ]
-                if all([tile is not None and e_type.CAN_SPAWN_SPAWNER(tile) for tile in tiles_to_check]):
-                    self.entities.append(e_type(tile))
-                    entities_spawned += 1
-                    for tile in tiles_to_check: tile.has_obsticle = True
-
-
     def contains_coord(self, coord):
         new_coord = self.location.copy().update_as_chunk_coord(1, -1)
         return self.location.x <= coord.x < new_coord.x and \
@@ -315,19 +359,37 @@ class Chunk:
 
         return tiles_on_screen
 
-    def get_tile_groups_in_region(self, region: Tuple[Coord, Coord]) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
-        tile_group_surfaces = []
+    def get_tile_groups_in_region(self, region: Tuple[Coord, Coord]) -> List[TileDrawItem]:
+        """
+            Draw items of the tile groups overlapping region, in group (draw) order: a baked
+            group is its (surface, top left), groups that aren't baked yet are their tiles,
+            drawn one by one in the group's place. Neighbouring unbaked groups share a list.
+        """
+        draw_items = []
         for tile_group in self.tile_groups:
             if (tile_group_surface := tile_group.get_surface(region)):
-                tile_group_surfaces.append(tile_group_surface)
-        return tile_group_surfaces
+                draw_items.append(tile_group_surface)
+            elif not tile_group.is_baked() and tile_group.is_overlaping(region):
+                if draw_items and isinstance(draw_items[-1], list): draw_items[-1].extend(tile_group.tiles())
+                else: draw_items.append(tile_group.tiles())
+        return draw_items
     
 
     @staticmethod
-    def get_data_path(x, y, game_name: str):
-        full_path = data_root() / 'games' / game_name / 'chunks' / f'{x}' / f'{y}'
-        full_path.mkdir(parents=True, exist_ok=True)
-        return full_path
+    def get_store(game_name: str) -> ChunkStore:
+        return chunk_store(data_root() / 'games' / game_name)
+
+    @staticmethod
+    def exists(x, y, game_name: str) -> bool:
+        store = Chunk.get_store(game_name)
+        return chunk_writer.pending(store, int(x), int(y)) is not None or store.exists(int(x), int(y))
+
+    @staticmethod
+    def is_delta(x, y, game_name: str) -> bool:
+        """ True if the saved chunk is a delta save, so loading it needs its regenerated terrain """
+        store = Chunk.get_store(game_name)
+        if (snapshot := chunk_writer.pending(store, int(x), int(y))) is not None: return snapshot.is_delta
+        return store.is_delta(int(x), int(y))
 
     @staticmethod
     def weight_decay(weight, distance):
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
+from constants import CHUNK_CACHE_BYTES
+
+if TYPE_CHECKING:
+    from world.chunk import Chunk
+
+
+# Rough in-memory cost of a tile view (TileView + its Coord) and an entity, measured with
+# tracemalloc. Tile arrays and baked tile group surfaces are counted exactly.
+TILE_BYTES = 400
+ENTITY_BYTES = 2048
+
+
+def chunk_bytes(chunk: "Chunk") -> int:
+    """ Estimated memory held by a chunk """
+    surfaces = sum(
+        surface.get_bytesize() * surface.get_width() * surface.get_height()
+        for group in chunk.tile_groups if (surface := group.tile_group_surface) is not None
+    )
+    return chunk.tiles.nbytes + chunk.tiles.view_count * TILE_BYTES + len(chunk.entities) * ENTITY_BYTES + surfaces
+
+
+class ChunkCache:
+    """
+        LRU of chunks that recently left the map, kept whole (tiles, entities and baked
+        tile group surfaces) so coming back to them costs nothing.
+
+        Holds at most `budget` bytes (see chunk_bytes). Chunks are only persisted when they
+        fall out of the cache: `on_evict` is called with every chunk pushed out by put().
+    """
+
+    def __init__(self, on_evict: Callable[["Chunk"], None], budget: int = CHUNK_CACHE_BYTES):
+        self.on_evict = on_evict
+        self.budget = budget
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self._chunks: OrderedDict[Tuple[int, int], "Chunk"] = OrderedDict()
+        self._sizes: Dict[Tuple[int, int], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def __contains__(self, location: Tuple[int, int]) -> bool:
+        return location in self._chunks
+
+    def __iter__(self) -> Iterator["Chunk"]:
+        return iter(list(self._chunks.values()))
+
+    def put(self, location: Tuple[int, int], chunk: "Chunk") -> None:
+        if location in self._chunks:
+            del self._chunks[location]
+            self.bytes -= self._sizes.pop(location)
+
+        self._chunks[location] = chunk
+        self._sizes[location] = size = chunk_bytes(chunk)
+        self.bytes += size
+
+        while self.bytes > self.budget and self._chunks:
+            evicted, chunk = self._chunks.popitem(last=False)
+            self.bytes -= self._sizes.pop(evicted)
+            self.on_evict(chunk)
+
+    def take(self, location: Tuple[int, int]) -> Optional["Chunk"]:
+        """ Remove and return the chunk at location, if cached """
+        if (chunk := self._chunks.pop(location, None)) is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.bytes -= self._sizes.pop(location)
+        return chunk
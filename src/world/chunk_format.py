@@ -0,0 +1,225 @@
+"""
+    Chunk save files.
+
+    Binary layout (little endian):
+        header      CHUNK_HEADER (magic, version, flags, size, id, location, baseline, section lengths, generator version)
+        tiles       zlib( [indices uint32 if delta] + ids uint8 + flags uint8 )
+        entities    zlib( JSON list of entity dicts )
+
+    A full save stores every tile. A delta save only stores the tiles that differ from
+    the chunk's regenerated terrain, plus that terrain's fingerprint as `baseline` and
+    the TerrainGenerator.VERSION that made it (so old deltas can be converted to full
+    saves when the generator changes).
+    Tile locations are never stored, they follow from the chunk location and tile index.
+
+    JSON saves from older versions (full and delta) are still read by read_chunk().
+"""
+
+import json
+import zlib
+import struct
+import numpy as np
+from dataclasses import dataclass, field
+from typing import List, Optional
+from utils.coords import Coord
+
+
+CHUNK_MAGIC = b"MDGC"
+CHUNK_FORMAT_VERSION = 2
+
+# magic, version, flags, size, id, location (x, y, z), baseline, tile entries, tiles bytes, entities bytes, generator version
+CHUNK_HEADER = struct.Struct("<4sHHHq3dIIIIH")
+
+# Version 1 had no generator version
+CHUNK_HEADER_V1 = struct.Struct("<4sHHHq3dIIII")
+
+# Generator version of delta saves made before it was recorded
+LEGACY_GENERATOR_VERSION = 1
+
+# Header flags
+_DELTA = 1
+
+# Tile flag bits
+TILE_BORDER = 1
+TILE_WATER = 2
+TILE_OBSTACLE = 4
+
+# Marks a JSON save that only stores changes from the regenerated terrain
+CHUNK_DELTA_FORMAT = "delta"
+
+
+def pack_tile_flags(is_border: np.ndarray, is_water: np.ndarray, has_obstacle: np.ndarray) -> np.ndarray:
+    return (
+        is_border.astype(np.uint8) * TILE_BORDER |
+        is_water.astype(np.uint8) * TILE_WATER |
+        has_obstacle.astype(np.uint8) * TILE_OBSTACLE
+    )
+
+
+@dataclass
+class ChunkRecord:
+    """
+        Contents of a chunk save as arrays.
+
+        For a full save ids/flags hold every tile in chunk tile order. For a delta save
+        (baseline is set) they hold only the changed tiles, at `indices`, and
+        generator_version is the TerrainGenerator.VERSION the baseline came from.
+    """
+    id: int
+    size: int
+    location: Coord
+    ids: np.ndarray
+    flags: np.ndarray
+    indices: Optional[np.ndarray] = None
+    baseline: Optional[int] = None
+    generator_version: Optional[int] = None
+    entities: List[dict] = field(default_factory=list)
+    version: int = CHUNK_FORMAT_VERSION # Format the record was read from, 0 for JSON saves
+
+    @property
+    def is_delta(self) -> bool:
+        return self.baseline is not None
+
+    def is_border(self) -> np.ndarray: return (self.flags & TILE_BORDER) != 0
+    def is_water(self) -> np.ndarray: return (self.flags & TILE_WATER) != 0
+    def has_obstacle(self) -> np.ndarray: return (self.flags & TILE_OBSTACLE) != 0
+
+
+def encode_chunk(record: ChunkRecord) -> bytes:
+    tiles = record.ids.astype("u1").tobytes() + record.flags.astype("u1").tobytes()
+    if record.is_delta: tiles = record.indices.astype("<u4").tobytes() + tiles
+    tiles = zlib.compress(tiles)
+    entities = zlib.compress(json.dumps(record.entities, ensure_ascii=False).encode("utf-8"))
+
+    header = CHUNK_HEADER.pack(
+        CHUNK_MAGIC,
+        CHUNK_FORMAT_VERSION,
+        _DELTA if record.is_delta else 0,
+        record.size,
+        record.id,
+        *record.location.location,
+        record.baseline or 0,
+        len(record.ids),
+        len(tiles),
+        len(entities),
+        record.generator_version or 0,
+    )
+    return header + tiles + entities
+
+
+def decode_chunk(raw: bytes) -> ChunkRecord:
+    magic, version = struct.unpack_from("<4sH", raw)
+    if magic != CHUNK_MAGIC:
+        raise ValueError("Not a binary chunk file")
+    if version > CHUNK_FORMAT_VERSION:
+        raise ValueError(f"Chunk format version {version} is newer than this game supports ({CHUNK_FORMAT_VERSION})")
+
+    header = CHUNK_HEADER if version >= 2 else CHUNK_HEADER_V1
+    _, _, flags, size, chunk_id, x, y, z, baseline, n, tiles_len, entities_len, *generator = header.unpack_from(raw)
+    generator_version = generator[0] if generator else LEGACY_GENERATOR_VERSION
+
+    start = header.size
+    tiles = zlib.decompress(raw[start:start + tiles_len])
+    entities = zlib.decompress(raw[start + tiles_len:start + tiles_len + entities_len])
+
+    is_delta = bool(flags & _DELTA)
+    indices = np.frombuffer(tiles, dtype="<u4", count=n).astype(np.int64) if is_delta else None
+    offset = 4 * n if is_delta else 0
+    return ChunkRecord(
+        id=chunk_id,
+        size=size,
+        location=Coord.world(x, y, z),
+        ids=np.frombuffer(tiles, dtype=np.uint8, count=n, offset=offset).copy(),
+        flags=np.frombuffer(tiles, dtype=np.uint8, count=n, offset=offset + n).copy(),
+        indices=indices,
+        baseline=baseline if is_delta else None,
+        generator_version=generator_version if is_delta else None,
+        entities=json.loads(entities.decode("utf-8")),
+        version=version,
+    )
+
+
+def _record_from_json(data: dict) -> ChunkRecord:
+    """ Older JSON saves, either every tile as a dict or [index, id, is_water, has_obstacle] changes """
+    tiles = data["tiles"]
+    n = len(tiles)
+    record = ChunkRecord(
+        id=data["id"],
+        size=int(data["size"]),
+        location=Coord.load(data["location"]),
+        ids=np.empty(0, dtype=np.uint8),
+        flags=np.empty(0, dtype=np.uint8),
+        entities=data["entities"],
+        version=0,
+    )
+
+    if data.get("format") == CHUNK_DELTA_FORMAT:
+        changes = np.array(tiles, dtype=np.int64).reshape(n, 4)
+        record.indices, record.baseline = changes[:, 0], data["baseline"]
+        record.generator_version = data.get("generator", LEGACY_GENERATOR_VERSION)
+        record.ids = changes[:, 1].astype(np.uint8)
+        record.flags = pack_tile_flags(np.zeros(n, dtype=bool), changes[:, 2] != 0, changes[:, 3] != 0)
+    else:
+        record.ids = np.fromiter((t["id"] for t in tiles), dtype=np.uint8, count=n)
+        record.flags = pack_tile_flags(
+            np.fromiter((t["is_chunk_border"] for t in tiles), dtype=bool, count=n),
+            np.fromiter((t["is_water"] for t in tiles), dtype=bool, count=n),
+            np.fromiter((t["has_obsticle"] for t in tiles), dtype=bool, count=n),
+        )
+    return record
+
+
+def record_to_json(record: ChunkRecord) -> dict:
+    """ JSON save of record, in the format of the older JSON saves """
+    data = {
+        "id": record.id,
+        "size": record.size,
+        "location": record.location.jsonify(),
+        "entities": record.entities,
+    }
+
+    if record.is_delta:
+        data["format"], data["baseline"] = CHUNK_DELTA_FORMAT, record.baseline
+        data["generator"] = record.generator_version
+        data["tiles"] = [
+            [i, id, int(is_water), int(has_obstacle)] for i, id, is_water, has_obstacle in zip(
+                record.indices.tolist(), record.ids.tolist(), record.is_water().tolist(), record.has_obstacle().tolist()
+            )
+        ]
+        return data
+
+    x0, y0 = int(record.location.x), int(record.location.y)
+    data["tiles"] = [
+        {
+            "id": id,
+            "location": {"x": float(x0 + i // record.size), "y": float(y0 - i % record.size), "z": 0.0},
+            "is_chunk_border": is_border,
+            "is_water": is_water,
+            "has_obsticle": has_obstacle,
+        }
+        for i, (id, is_border, is_water, has_obstacle) in enumerate(zip(
+            record.ids.tolist(), record.is_border().tolist(), record.is_water().tolist(), record.has_obstacle().tolist()
+        ))
+    ]
+    return data
+
+
+def chunk_file_version(raw: bytes) -> int:
+    """ Format version of a chunk file from its first bytes (0 for the older JSON saves) """
+    if raw[:len(CHUNK_MAGIC)] != CHUNK_MAGIC: return 0
+    return struct.unpack_from("<H", raw, len(CHUNK_MAGIC))[0]
+
+
+def chunk_file_is_delta(raw: bytes) -> bool:
+    """ True if the chunk file only stores changes from the regenerated terrain (JSON saves need all of raw) """
+    if raw[:len(CHUNK_MAGIC)] == CHUNK_MAGIC: return bool(struct.unpack_from("<H", raw, len(CHUNK_MAGIC) + 2)[0] & _DELTA)
+    try:
+        return json.loads(raw.decode("utf-8")).get("format") == CHUNK_DELTA_FORMAT
+    except ValueError:
+        return False
+
+
+def read_chunk(raw: bytes) -> ChunkRecord:
+    """ Decode a chunk file in any of the formats the game has written """
+    if raw[:len(CHUNK_MAGIC)] == CHUNK_MAGIC: return decode_chunk(raw)
+    return _record_from_json(json.loads(raw.decode("utf-8")))
@@ -0,0 +1,67 @@
+import os
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+
+# Offset of a chunk still saved in the old one file per chunk layout
+LEGACY_OFFSET = -1
+
+
+class ChunkManifest:
+    """
+        Index of every persisted chunk of a save: (x, y) -> (offset, length, format version, delta).
+        `delta` is 1 for delta saves, which need their regenerated terrain to load.
+
+        Kept in memory by the ChunkStore so "is this chunk saved?" never touches the disk.
+        Written next to the regions as JSON, replaced atomically (temp file + rename).
+    """
+
+    def __init__(self, path: Path, entries: Optional[Dict[Tuple[int, int], Tuple[int, int, int, int]]] = None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["ChunkManifest"]:
+        """ The saved manifest, None if there is none (or it can't be used) """
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION: return None
+
+        entries = {}
+        for key, entry in data["chunks"].items():
+            x, y = key.split(",")
+            entries[(int(x), int(y))] = tuple(entry)
+        return cls(path, entries)
+
+    def __contains__(self, location: Tuple[int, int]) -> bool:
+        return location in self.entries
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(self.entries)
+
+    def set(self, x: int, y: int, offset: int, length: int, version: int, delta: bool) -> None:
+        self.entries[(x, y)] = (offset, length, version, int(delta))
+        self.dirty = True
+
+    def remove(self, x: int, y: int) -> None:
+        if self.entries.pop((x, y), None) is not None: self.dirty = True
+
+    def flush(self) -> None:
+        if not self.dirty: return
+        data = {
+            "version": MANIFEST_VERSION,
+            "chunks": {f"{x},{y}": list(entry) for (x, y), entry in self.entries.items()},
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps(data, separators=(",", ":")), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,66 @@
+import numpy as np
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Optional, Tuple
+from utils.coords import Coord
+from constants import PREFETCH_SMOOTHING_MS
+
+if TYPE_CHECKING:
+    from world.chunk import Chunk
+
+
+class MotionPredictor:
+    """
+        Smoothed velocity of the screen center in world tiles per second, used by the map
+        to guess which chunks it will need next.
+
+        The velocity is an exponential moving average with a time constant of
+        PREFETCH_SMOOTHING_MS, so single frame jitter (collisions, knockback) barely moves it.
+    """
+
+    def __init__(self, smoothing_ms: float = PREFETCH_SMOOTHING_MS):
+        self.smoothing_ms = smoothing_ms
+        self.velocity = np.zeros(2)
+        self._last: Optional[np.ndarray] = None
+
+    @property
+    def speed(self) -> float:
+        return float(np.hypot(*self.velocity))
+
+    def reset(self) -> None:
+        self.velocity = np.zeros(2)
+        self._last = None
+
+    def update(self, center: Coord, dt: float) -> None:
+        """ Add the screen center of this frame, dt is the frame time in ms """
+        location = center.location[:2].copy()
+        if self._last is not None and dt > 0:
+            current = (location - self._last) * (1000 / dt)
+            self.velocity += min(1.0, dt / self.smoothing_ms) * (current - self.velocity)
+        self._last = location
+
+    def predict(self, center: Coord, ms: float) -> Coord:
+        """ Where center will be in ms if it keeps its current velocity """
+        x, y = center.location[:2] + self.velocity * (ms / 1000)
+        return Coord.world(x, y)
+
+
+@dataclass
+class StagedChunk:
+    """
+        A chunk of the next chunk window, started before the window moves.
+
+        `future` is the chunk reader's ChunkLoad (kind "load") or the chunk workers'
+        ChunkTerrain (kind "generate"). `chunk` is set once the map started building it,
+        `built` once it is complete and can be swapped in like a cached chunk.
+    """
+    location: Tuple[int, int]
+    kind: str
+    future: Future
+    chunk: Optional["Chunk"] = None
+    built: bool = False
+
+    def step(self) -> bool:
+        """ Build the chunk for a frame, True when it is done """
+        self.built = self.chunk.step_load() if self.kind == "load" else self.chunk.step_generation()
+        return self.built
@@ -0,0 +1,161 @@
+import logging
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from world.chunk_format import ChunkRecord, encode_chunk, read_chunk
+from world.chunk_writer import chunk_writer
+from world.baked_tiles import BakedTiles, decode_baked
+from world.region_store import ChunkStore
+from world.generation.chunk_workers import generate_chunk_data
+from world.generation.terrain_generator import ChunkTerrain, TerrainGenerator
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChunkLoad:
+    """ A saved chunk read and decoded, ready to be turned into tiles and entities (see Chunk.begin_load_from) """
+    record: ChunkRecord
+    terrain: ChunkTerrain # Tile state with the saved changes applied, tiles are built from this
+    baseline: Optional[ChunkTerrain] # Terrain the chunk was generated from, if known
+    baked: Optional[BakedTiles] = None # Tile groups baked when it was saved, checked against the tiles when they are built
+    delta: bool = False # Stored as a delta save, or queued to be written as one
+    unmatched: bool = False # Delta save made against other terrain, loaded without its tile changes (see prepare_load)
+
+    @property
+    def entities(self) -> List[dict]:
+        return self.record.entities
+
+
+def read_record(store: ChunkStore, x: int, y: int) -> ChunkRecord:
+    return _read_stored(store, x, y)[0]
+
+
+def _read_stored(store: ChunkStore, x: int, y: int) -> Tuple[ChunkRecord, bool]:
+    """ The saved record of chunk (x, y) and whether it is (or will be written as) a delta save """
+    if (snapshot := chunk_writer.pending(store, x, y)) is not None:
+        # Saved but not written yet, the snapshot is newer than the stored chunk. Its record
+        # holds every tile, the snapshot knows the format it will be written in
+        return snapshot.record, snapshot.is_delta
+    if (raw := store.read(x, y)) is None:
+        # Listed but unreadable (region file gone, damaged payload), the chunk is generated again
+        if store.exists(x, y):
+            logger.warning(f"Saved chunk ({x}, {y}) of {store.game_dir.name} can't be read, it will be generated again")
+            store.forget(x, y)
+        raise FileNotFoundError(f"No saved chunk ({x}, {y}) in {store.game_dir}")
+    record = read_chunk(raw)
+    return record, record.is_delta
+
+
+def read_baked(store: ChunkStore, x: int, y: int) -> Optional[BakedTiles]:
+    """ Stored baked tile groups of chunk (x, y), decompressed, None if there are none """
+    raw = store.read_baked(x, y)
+    return decode_baked(raw) if raw is not None else None
+
+
+def prepare_load(record: ChunkRecord, terrain_generator: TerrainGenerator, baseline: Optional[ChunkTerrain] = None) -> ChunkLoad:
+    """
+        Terrain to build the tiles from: the stored tiles of a full save or, for a delta
+        save, the regenerated terrain (baseline, generated here if not given) with the
+        saved changes applied.
+
+        A delta save whose baseline isn't the terrain the generator makes now (it changed
+        since the save) can't be applied, its tile indices would land on other tiles. The
+        chunk is loaded from the regenerated terrain instead and the load is marked
+        `unmatched`, read_load keeps the save aside so its changes can be recovered.
+    """
+    if not record.is_delta:
+        origin = (int(record.location.x), int(record.location.y))
+        terrain = ChunkTerrain.from_tile_state(
+            record.size, origin, record.ids, record.is_border(), record.is_water(), record.has_obstacle()
+        )
+        return ChunkLoad(record, terrain, baseline)
+
+    if baseline is None:
+        cx, cy, _ = record.location.as_chunk_coord()
+        baseline = generate_chunk_data(terrain_generator, int(cx), int(cy), record.size)
+    if baseline.fingerprint() != record.baseline:
+        logger.warning(
+            f"Chunk {record.id} was saved against other terrain (generator version {record.generator_version}, "
+            f"now {terrain_generator.VERSION}), loading it without its tile changes"
+        )
+        return ChunkLoad(record, baseline.copy(), baseline, delta=True, unmatched=True)
+
+    terrain = baseline.copy()
+    terrain.apply_tile_changes(record.indices, record.ids, record.is_water(), record.has_obstacle())
+    return ChunkLoad(record, terrain, baseline, delta=True)
+
+
+def read_load(store: ChunkStore, x: int, y: int, terrain_generator: TerrainGenerator, baseline: Optional[ChunkTerrain] = None) -> ChunkLoad:
+    """ Read and prepare saved chunk (x, y), delta saves that no longer match the terrain are kept aside """
+    record, delta = _read_stored(store, x, y)
+    load = prepare_load(record, terrain_generator, baseline)
+    load.delta = delta
+    if load.unmatched:
+        path = store.keep_aside(x, y, encode_chunk(record), "unmatched")
+        logger.warning(f"Kept the save of chunk ({x}, {y}) at {path}")
+    load.baked = read_baked(store, x, y)
+    return load
+
+
+def load_here(store: ChunkStore, x: int, y: int, terrain_generator: TerrainGenerator) -> Optional[ChunkLoad]:
+    """
+        read_load on the calling thread, for a background read that failed (e.g. its
+        baseline's worker died). None if the chunk has to be generated again: it isn't
+        saved after all, or its save can't be decoded (kept under <game>/unreadable).
+    """
+    try:
+        return read_load(store, x, y, terrain_generator)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.exception(f"Saved chunk ({x}, {y}) of {store.game_dir.name} can't be loaded, it will be generated again")
+        if (raw := store.read(x, y)) is not None:
+            logger.warning(f"Kept the save of chunk ({x}, {y}) at {store.keep_aside(x, y, raw, 'unreadable')}")
+        store.forget(x, y)
+        return None
+
+
+def _read_and_prepare(
+    store: ChunkStore, x: int, y: int, terrain_generator: TerrainGenerator, baseline: Optional[Future]
+) -> Optional[ChunkLoad]:
+    try:
+        return read_load(store, x, y, terrain_generator, baseline.result() if baseline is not None else None)
+    except FileNotFoundError:
+        if baseline is not None: baseline.cancel()
+        return None
+
+
+class ChunkReader:
+    """
+        Reads and decodes saved chunks (and their baked tile groups) on a background thread.
+
+        submit() returns a Future resolving to a ChunkLoad, so the main thread only has to
+        build Tile/Entity objects from it (Chunk.step_load) and never waits on the disk.
+        It resolves to None if the chunk turned out not to be saved (region file missing,
+        damaged save), the chunk is dropped from the manifest and has to be generated.
+        `baseline` can be a Future of the chunk's regenerated terrain (e.g. from the chunk
+        worker pool), the reader waits for it instead of the caller.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(
+        self, store: ChunkStore, x: int, y: int,
+        terrain_generator: TerrainGenerator, baseline: Optional[Future] = None
+    ) -> Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-reader")
+        return self._executor.submit(_read_and_prepare, store, x, y, terrain_generator, baseline)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Shared reader used by the game
+chunk_reader = ChunkReader()
@@ -0,0 +1,153 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple, Union
+
+from constants import CHUNK_SAVE_BINARY, CHUNK_SAVE_DELTAS
+from world.chunk_format import CHUNK_FORMAT_VERSION, ChunkRecord, encode_chunk, record_to_json
+from world.region_store import ChunkStore
+from world.baked_tiles import BakedSnapshot
+from world.generation.chunk_workers import generate_chunk_data
+from world.generation.terrain_generator import ChunkTerrain, TerrainGenerator
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChunkSnapshot:
+    """
+        A chunk's state at the moment it was saved (see Chunk.snapshot). Holds no
+        references to live tiles or entities, so it can be encoded on any thread.
+    """
+    record: ChunkRecord # Every tile, entities as their jsonify() dicts
+    baseline: Optional[ChunkTerrain]
+    terrain_generator: TerrainGenerator
+    delta: Optional[bool] = None # Save as a delta, None => CHUNK_SAVE_DELTAS
+
+    @property
+    def is_delta(self) -> bool:
+        return CHUNK_SAVE_DELTAS if self.delta is None else self.delta
+
+    def delta_record(self) -> ChunkRecord:
+        """ The record with only the tiles that differ from the terrain the chunk was generated from """
+        baseline = self.baseline
+        if baseline is None:
+            # Chunk came from a full save, regenerate its terrain
+            cx, cy, _ = self.record.location.as_chunk_coord()
+            baseline = generate_chunk_data(self.terrain_generator, int(cx), int(cy), self.record.size)
+
+        indices = baseline.changed_tiles(self.record.ids, self.record.is_water(), self.record.has_obstacle())
+        return replace(
+            self.record, ids=self.record.ids[indices], flags=self.record.flags[indices],
+            indices=indices, baseline=baseline.fingerprint(), generator_version=self.terrain_generator.VERSION
+        )
+
+    def encode(self) -> bytes:
+        """ Save file bytes (a delta save if is_delta) """
+        record = self.delta_record() if self.is_delta else self.record
+        if CHUNK_SAVE_BINARY: return encode_chunk(record)
+        return json.dumps(record_to_json(record), ensure_ascii=False).encode('utf-8')
+
+
+def is_current(record: ChunkRecord, delta: Optional[bool] = None) -> bool:
+    """
+        True if record is stored the way the writer saves chunks now, so it needs no rewrite.
+        Full saves in the current format are kept full (e.g. pregenerated chunks, see pregenerate.py).
+        `delta` is the format it is stored in if the record doesn't show it (a pending snapshot's record).
+    """
+    version = CHUNK_FORMAT_VERSION if CHUNK_SAVE_BINARY else 0
+    delta = record.is_delta if delta is None else delta
+    return record.version == version and (delta == CHUNK_SAVE_DELTAS or not delta)
+
+
+class ChunkWriter:
+    """
+        Write-behind chunk saving.
+
+        submit() only queues a snapshot, encoding (delta, compression) and the region
+        file write happen on a background thread. Saving a chunk again before its last
+        save was written replaces the queued snapshot, so only the newest one is written.
+        Until a save is on disk pending() hands out its snapshot, loads must use it
+        instead of the (older) stored chunk. A store's manifest is synced whenever the
+        writer runs out of saves for it.
+
+        Baked tile groups (submit_baked) go through the same queue, keyed apart from the
+        chunk's save.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queued: Dict[Tuple[Path, int, int, str], Tuple[ChunkStore, Union[ChunkSnapshot, BakedSnapshot]]] = {}
+        self._writing: Dict[Tuple[Path, int, int, str], Union[ChunkSnapshot, BakedSnapshot]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def submit(self, store: ChunkStore, x: int, y: int, snapshot: ChunkSnapshot) -> None:
+        self._submit(store, (store.game_dir, x, y, "chunk"), snapshot)
+
+    def submit_baked(self, store: ChunkStore, x: int, y: int, baked: BakedSnapshot) -> None:
+        self._submit(store, (store.game_dir, x, y, "baked"), baked)
+
+    def _submit(self, store: ChunkStore, key: Tuple[Path, int, int, str], snapshot: Union[ChunkSnapshot, BakedSnapshot]) -> None:
+        with self._cond:
+            self._queued.pop(key, None) # Re-queue at the back
+            self._queued[key] = (store, snapshot)
+
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="chunk-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def pending(self, store: ChunkStore, x: int, y: int) -> Optional[ChunkSnapshot]:
+        """ Newest snapshot of chunk (x, y) that is not written yet """
+        with self._cond:
+            key = (store.game_dir, x, y, "chunk")
+            if (queued := self._queued.get(key)) is not None: return queued[1]
+            return self._writing.get(key)
+
+    def flush(self) -> None:
+        """ Block until every submitted save is written """
+        with self._cond:
+            self._cond.wait_for(lambda: not self._queued and not self._writing)
+
+    def shutdown(self) -> None:
+        self.flush()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None: thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queued or self._stopping)
+                if not self._queued: return
+
+                key = next(iter(self._queued))
+                store, snapshot = self._queued.pop(key)
+                self._writing[key] = snapshot
+
+            _, x, y, kind = key
+            try:
+                if kind == "chunk": store.write(x, y, snapshot.encode())
+                else: store.write_baked(x, y, snapshot.encode())
+
+                # Persist the manifest once the store has no more saves queued
+                with self._cond:
+                    idle = all(queued is not store for queued, _ in self._queued.values())
+                if idle: store.sync()
+            except Exception:
+                logger.exception(f"Failed to save {kind} ({x}, {y}) of {store.game_dir.name}")
+            finally:
+                with self._cond:
+                    del self._writing[key]
+                    self._cond.notify_all()
+
+
+# Shared writer used by the game
+chunk_writer = ChunkWriter()
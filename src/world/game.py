@@ -7,6 +7,9 @@ from utils.paths import data_root
 from system.entities.sprites.player import Player
 from world.map import Map
 from world.generation.terrain_generator import TerrainGenerator
+from world.generation.spawn_locator import SpawnLocator
+from world.region_store import close_chunk_stores
+from world.chunk_writer import chunk_writer
 from utils.coords import Coord
 from typing import Dict, List, Optional
 from decorators import singleton
@@ -39,6 +42,7 @@ class Game:
         self.map = None
 
         if not defer_load:
+            (self.PATH / self.name).mkdir(parents=True, exist_ok=True)
             self.terrain_generator = TerrainGenerator(
                 seed, water_level, forest_size, temperature
             )
@@ -78,25 +82,8 @@ class Game:
    
             pygame.image.save(banner_surface, str((self.PATH / self.name / 'banner.png')))
 
-    def _check_spot(self, location: Coord) -> bool:
-        adj = [
-            Coord.world(-1, 1), Coord.world(-1, 0), Coord.world(-1, 1),
-            Coord.world(0, 1), Coord.world(0, 0), Coord.world(0, 1),
-            Coord.world(1, 1), Coord.world(1, 0), Coord.world(1, 1),
-        ]
-
-        for c in adj:
-            loc = c + location
-            tile, _ = self.terrain_generator.generate_tile(loc.x, loc.y, False)
-            if tile.has_obsticle or tile.is_water: return False
-        
-        return True
-    
     def _find_load_spot(self):
-        location = Coord.world(0, 0)
-        while True:
-            if self._check_spot(location): return location
-            location += Coord.world(1, 1)
+        return SpawnLocator(self.terrain_generator).find_spawn(Coord.world(0, 0))
 
     def _save_player(self):
         path = self.PATH / self.name / 'player'
@@ -189,4 +176,6 @@ class GameManager:
     def delete_game(self, game_name: str):
         if self.game and self.game.name == game_name: self.set_game(None)
         path = self.PATH / game_name
+        chunk_writer.flush()
+        close_chunk_stores(path)
         if path.is_dir(): shutil.rmtree(path)
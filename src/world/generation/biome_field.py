@@ -0,0 +1,113 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, Sequence, Tuple
+
+
+# Lattice spacing in tiles (must divide the chunk size)
+BIOME_LATTICE_STEP = 8
+
+# Max expected |interpolated - exact| biome value for BIOME_LATTICE_STEP.
+# Measured worst case is ~0.01 at step 8, this leaves a safety factor of 3.
+BIOME_LATTICE_TOLERANCE = 0.03
+
+# Number of chunk lattice blocks kept around
+BIOME_CACHE_BLOCKS = 64
+
+
+class BiomeFieldCache:
+    """
+        Coarse lattice cache for the biome value field.
+
+        The biome field varies slowly (noise at x / 200, latitude at cos(y / 200)), so it is
+        sampled every `step` tiles and bilinearly interpolated per tile. Lattice blocks are
+        stored per chunk in an LRU.
+
+        Biome weights only change inside the blend bands around the biome thresholds.
+        Tiles whose interpolated value lands within `margin + tolerance` of a threshold
+        are sampled exactly, so as long as the interpolation error stays under
+        `tolerance` the resulting weights are identical to sampling every tile.
+
+        Safe to share between threads (the game generates terrain on the main thread, the
+        chunk reader and the chunk writer). The LRU is only touched under a lock, blocks
+        are sampled outside of it.
+    """
+
+    def __init__(
+        self,
+        sample: Callable[[np.ndarray, np.ndarray], np.ndarray],
+        step: int = BIOME_LATTICE_STEP,
+        tolerance: float = BIOME_LATTICE_TOLERANCE,
+        max_blocks: int = BIOME_CACHE_BLOCKS
+    ):
+        self.sample = sample
+        self.step = step
+        self.tolerance = tolerance
+        self.max_blocks = max_blocks
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._blocks: OrderedDict[Tuple[int, int, int], np.ndarray] = OrderedDict()
+        self._weights: Dict[int, Tuple[np.ndarray, ...]] = {}
+
+    def _lattice_block(self, cx: int, cy: int, size: int) -> np.ndarray:
+        """ Field values at local (i * step, j * step) for i, j in [0, size // step] """
+        key = (cx, cy, size)
+        with self._lock:
+            if (block := self._blocks.get(key)) is not None:
+                self._blocks.move_to_end(key)
+                self.hits += 1
+                return block
+            self.misses += 1
+
+        n = size // self.step + 1
+        offsets = np.arange(n) * self.step
+        lx, ly = np.meshgrid(offsets, offsets, indexing='ij')
+        block = self.sample(
+            (cx * size + lx.ravel()).astype(np.float64),
+            (cy * size - ly.ravel()).astype(np.float64),
+        ).reshape(n, n)
+
+        with self._lock:
+            self._blocks[key] = block
+            self._blocks.move_to_end(key)
+            if len(self._blocks) > self.max_blocks: self._blocks.popitem(last=False)
+        return block
+
+    def _interpolation_weights(self, size: int) -> Tuple[np.ndarray, ...]:
+        """ Lattice indices and bilinear weights for every tile of a chunk (same for all chunks) """
+        if size not in self._weights:
+            local_x, local_y = np.divmod(np.arange(size * size), size)
+            gx, rx = np.divmod(local_x, self.step)
+            gy, ry = np.divmod(local_y, self.step)
+            fx, fy = rx / self.step, ry / self.step
+            self._weights[size] = (gx, gy, (1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy)
+        return self._weights[size]
+
+    def chunk_field(self, cx: int, cy: int, size: int, thresholds: Sequence[float], margin: float) -> np.ndarray:
+        """
+        Field value for every tile of chunk (cx, cy) in chunk tile order.
+        Values within margin + tolerance of any threshold are exact samples.
+        """
+        if size % self.step != 0:
+            raise ValueError(f"Chunk size {size} is not a multiple of the lattice step {self.step}")
+
+        block = self._lattice_block(cx, cy, size)
+        gx, gy, w00, w10, w01, w11 = self._interpolation_weights(size)
+        values = (
+            block[gx, gy] * w00 + block[gx + 1, gy] * w10 +
+            block[gx, gy + 1] * w01 + block[gx + 1, gy + 1] * w11
+        )
+
+        near = np.zeros(values.shape, dtype=bool)
+        for threshold in thresholds:
+            near |= np.abs(values - threshold) < margin + self.tolerance
+
+        if near.any():
+            local_x, local_y = np.divmod(np.flatnonzero(near), size)
+            values[near] = self.sample(
+                (cx * size + local_x).astype(np.float64),
+                (cy * size - local_y).astype(np.float64),
+            )
+        return values
@@ -0,0 +1,98 @@
+import signal
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from constants import CHUNK_SIZE, CHUNK_WORKERS
+from metrics.stage_profiler import profile_stage
+from world.generation.spawner_placement import place_spawners
+from world.generation.terrain_generator import ChunkTerrain, TerrainGenerator
+
+
+logger = logging.getLogger(__name__)
+
+def generate_chunk_data(generator: TerrainGenerator, cx: int, cy: int, size: int = CHUNK_SIZE) -> ChunkTerrain:
+    """ Everything about a new chunk that does not need the main process: terrain, trees and spawner placements """
+    terrain = generator.generate_chunk_terrain(cx, cy, size)
+    with profile_stage("spawners"):
+        place_spawners(terrain, generator.seed)
+    return terrain
+
+
+# -----------------------------------------------------------------------------
+# Worker process side
+# -----------------------------------------------------------------------------
+
+# One generator per world the worker has been asked about, keyed by TerrainGenerator.params()
+_worker_generators: Dict[Tuple, TerrainGenerator] = {}
+
+def _init_worker() -> None:
+    # Ctrl+C is handled by the main process, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _generate_in_worker(params: Tuple, cx: int, cy: int, size: int) -> ChunkTerrain:
+    import system.entities.spawners # Fills CHUNK_SPAWNER_REGISTRY in a freshly spawned worker
+
+    if (generator := _worker_generators.get(params)) is None:
+        generator = _worker_generators[params] = TerrainGenerator(*params)
+    return generate_chunk_data(generator, cx, cy, size)
+
+
+# -----------------------------------------------------------------------------
+# Main process side
+# -----------------------------------------------------------------------------
+
+class ChunkWorkerPool:
+    """
+        Generates new chunks on a pool of worker processes.
+
+        submit() returns a Future resolving to a ChunkTerrain (plain arrays plus spawner
+        placements). The main process turns it into a Chunk with Chunk.start_generation(),
+        which is where Tile/Entity objects and entity ids get created.
+
+        - Workers rebuild the TerrainGenerator from its saved params, so one pool serves
+          every game and survives switching saves.
+        - Processes are started lazily on first use (or with start()) using the "spawn"
+          method so workers never inherit pygame/SDL state.
+        - With CHUNK_WORKERS = 0 chunks are generated synchronously in submit().
+        - A pool that broke (a worker died) is replaced on the next submit(). Futures
+          of the broken pool raise BrokenProcessPool, callers generate those themselves.
+    """
+
+    def __init__(self, workers: int = CHUNK_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+
+    def submit(self, generator: TerrainGenerator, cx: int, cy: int, size: int = CHUNK_SIZE) -> Future:
+        self.start()
+        if self._executor is not None:
+            try:
+                return self._executor.submit(_generate_in_worker, generator.params(), cx, cy, size)
+            except BrokenProcessPool:
+                logger.warning("A chunk worker died, starting new chunk workers")
+                self.shutdown()
+                self.start()
+                return self._executor.submit(_generate_in_worker, generator.params(), cx, cy, size)
+
+        future = Future()
+        future.set_result(generate_chunk_data(generator, cx, cy, size))
+        return future
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Shared pool used by the game
+chunk_worker_pool = ChunkWorkerPool()
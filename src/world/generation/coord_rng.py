@@ -0,0 +1,54 @@
+"""
+    Counter based random numbers for world generation.
+
+    Every draw is a pure function of (seed, x, y, stream), so a tile gets the same
+    numbers no matter which order (or which process) its chunk is generated in.
+    Values come from chaining the splitmix64 finalizer over the inputs.
+
+    All functions take scalars or arrays (broadcast together).
+"""
+
+import numpy as np
+from enum import IntEnum
+
+
+class RngStream(IntEnum):
+    """ Independent random streams, one per kind of decision made for a tile """
+    TILE = 0
+    TREE = 1
+    SPAWNER = 2
+
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_A = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_B = np.uint64(0x94D049BB133111EB)
+_TO_UNIT = 2.0 ** -53
+
+
+def _as_u64(v) -> np.ndarray:
+    return np.atleast_1d(np.asarray(v)).astype(np.int64).view(np.uint64)
+
+
+def _mix(z: np.ndarray) -> np.ndarray:
+    """ splitmix64 finalizer """
+    z = (z ^ (z >> np.uint64(30))) * _MIX_A
+    z = (z ^ (z >> np.uint64(27))) * _MIX_B
+    return z ^ (z >> np.uint64(31))
+
+
+def hash_coords(seed, x, y, stream: RngStream) -> np.ndarray:
+    """ 64 bit hash of (seed, x, y, stream) """
+    h = _mix(_as_u64(seed) + _GOLDEN)
+    for v in (x, y, int(stream)):
+        h = _mix(h ^ _mix(_as_u64(v) + _GOLDEN))
+    return h
+
+
+def random_floats(seed, x, y, stream: RngStream) -> np.ndarray:
+    """ Uniform floats in [0, 1) """
+    return (hash_coords(seed, x, y, stream) >> np.uint64(11)).astype(np.float64) * _TO_UNIT
+
+
+def random_ints(seed, x, y, stream: RngStream, high) -> np.ndarray:
+    """ Uniform ints in [0, high] (inclusive like random.randint(0, high)) """
+    return np.floor(random_floats(seed, x, y, stream) * (np.asarray(high) + 1)).astype(np.int64)
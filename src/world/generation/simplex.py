@@ -0,0 +1,323 @@
+"""
+    Pure NumPy port of the simplex noise in the `noise` C extension (noise.snoise2).
+
+    Every function here works on whole arrays of coordinates at once and reproduces
+    the C implementation bit for bit: all math is done in float32 with the same
+    operation order, lookup tables and constants as noise/_simplex.c.
+
+    Like the C version, snoise2 switches implementation based on the repeat args:
+    - no repeat:      2D simplex noise at (x + base, y + base)
+    - repeatx only:   3D simplex noise with x wrapped onto a circle
+    - repeaty only:   3D simplex noise with y wrapped onto a circle
+    - both repeats:   4D simplex noise with x and y wrapped onto a torus
+"""
+
+import numpy as np
+from typing import Optional
+
+f32 = np.float32
+
+# -----------------------------------------------------------------------------
+# Tables (copied from noise/_noise.h)
+# -----------------------------------------------------------------------------
+
+_PERM_BASE = [
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225, 140, 36,
+    103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148, 247, 120, 234, 75, 0,
+    26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32, 57, 177, 33, 88, 237, 149, 56,
+    87, 174, 20, 125, 136, 171, 168, 68, 175, 74, 165, 71, 134, 139, 48, 27, 166,
+    77, 146, 158, 231, 83, 111, 229, 122, 60, 211, 133, 230, 220, 105, 92, 41, 55,
+    46, 245, 40, 244, 102, 143, 54, 65, 25, 63, 161, 1, 216, 80, 73, 209, 76, 132,
+    187, 208, 89, 18, 169, 200, 196, 135, 130, 116, 188, 159, 86, 164, 100, 109,
+    198, 173, 186, 3, 64, 52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126,
+    255, 82, 85, 212, 207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183,
+    170, 213, 119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43,
+    172, 9, 129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112,
+    104, 218, 246, 97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162,
+    241, 81, 51, 145, 235, 249, 14, 239, 107, 49, 192, 214, 31, 181, 199, 106,
+    157, 184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205,
+    93, 222, 114, 67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+]
+PERM = np.array(_PERM_BASE * 2, dtype=np.int64)
+
+GRAD3 = np.array([
+    [1, 1, 0], [-1, 1, 0], [1, -1, 0], [-1, -1, 0],
+    [1, 0, 1], [-1, 0, 1], [1, 0, -1], [-1, 0, -1],
+    [0, 1, 1], [0, -1, 1], [0, 1, -1], [0, -1, -1],
+    [1, 0, -1], [-1, 0, -1], [0, -1, 1], [0, 1, 1],
+], dtype=np.float32)
+
+GRAD4 = np.array([
+    [0, 1, 1, 1], [0, 1, 1, -1], [0, 1, -1, 1], [0, 1, -1, -1],
+    [0, -1, 1, 1], [0, -1, 1, -1], [0, -1, -1, 1], [0, -1, -1, -1],
+    [1, 0, 1, 1], [1, 0, 1, -1], [1, 0, -1, 1], [1, 0, -1, -1],
+    [-1, 0, 1, 1], [-1, 0, 1, -1], [-1, 0, -1, 1], [-1, 0, -1, -1],
+    [1, 1, 0, 1], [1, 1, 0, -1], [1, -1, 0, 1], [1, -1, 0, -1],
+    [-1, 1, 0, 1], [-1, 1, 0, -1], [-1, -1, 0, 1], [-1, -1, 0, -1],
+    [1, 1, 1, 0], [1, 1, -1, 0], [1, -1, 1, 0], [1, -1, -1, 0],
+    [-1, 1, 1, 0], [-1, 1, -1, 0], [-1, -1, 1, 0], [-1, -1, -1, 0],
+], dtype=np.float32)
+
+# Lookup of the traversal order through a 4D simplex, indexed by magnitude ordering of (x0, y0, z0, w0)
+SIMPLEX = np.array([
+    [0, 1, 2, 3], [0, 1, 3, 2], [0, 0, 0, 0], [0, 2, 3, 1], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [1, 2, 3, 0],
+    [0, 2, 1, 3], [0, 0, 0, 0], [0, 3, 1, 2], [0, 3, 2, 1], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [1, 3, 2, 0],
+    [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0],
+    [1, 2, 0, 3], [0, 0, 0, 0], [1, 3, 0, 2], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [2, 3, 0, 1], [2, 3, 1, 0],
+    [1, 0, 2, 3], [1, 0, 3, 2], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [2, 0, 3, 1], [0, 0, 0, 0], [2, 1, 3, 0],
+    [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0],
+    [2, 0, 1, 3], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [3, 0, 1, 2], [3, 0, 2, 1], [0, 0, 0, 0], [3, 1, 2, 0],
+    [2, 1, 0, 3], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [3, 1, 0, 2], [0, 0, 0, 0], [3, 2, 0, 1], [3, 2, 1, 0],
+], dtype=np.int64)
+
+# (o1, o2) corner offsets for each branch of the 3D simplex traversal
+_NOISE3_OFFSETS = np.array([
+    [[1, 0, 0], [1, 1, 0]],
+    [[1, 0, 0], [1, 0, 1]],
+    [[0, 0, 1], [1, 0, 1]],
+    [[0, 0, 1], [0, 1, 1]],
+    [[0, 1, 0], [0, 1, 1]],
+    [[0, 1, 0], [1, 1, 0]],
+], dtype=np.int64)
+
+# -----------------------------------------------------------------------------
+# Constants (float32, as in the C source)
+# -----------------------------------------------------------------------------
+
+F2 = f32(0.3660254037844386)    # 0.5 * (sqrt(3) - 1)
+G2 = f32(0.21132486540518713)   # (3 - sqrt(3)) / 6
+F3 = f32(1.0 / 3.0)
+G3 = f32(1.0 / 6.0)
+F4 = f32(0.30901699437494745)   # (sqrt(5) - 1) / 4
+G4 = f32(0.1381966011250105)    # (5 - sqrt(5)) / 20
+
+ONE = f32(1.0)
+HALF = f32(0.5)
+POINT_SIX = f32(0.6)
+
+# fast_sinf() helpers: wrapping offset and the parabola refinement constants
+_WRAP = f32(25165824.0)
+_SIN_Q = f32(3.1)
+_SIN_P = f32(3.6)
+_INV_PI = 0.31830988618379067154 # M_1_PI (double)
+
+# -----------------------------------------------------------------------------
+# Core noise functions (single octave, float32 arrays in / out)
+# -----------------------------------------------------------------------------
+
+def _lattice(v: np.ndarray) -> np.ndarray:
+    """ (int) v & 255 for already floored float32 values """
+    return v.astype(np.int64) & 255
+
+
+def noise2(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """ Single octave 2D simplex noise """
+    s = (x + y) * F2
+    i = np.floor(x + s)
+    j = np.floor(y + s)
+    t = (i + j) * G2
+
+    x0 = x - (i - t)
+    y0 = y - (j - t)
+
+    i1 = (x0 > y0).astype(np.float32)
+    j1 = (x0 <= y0).astype(np.float32)
+
+    x1 = x0 - i1 + G2
+    y1 = y0 - j1 + G2
+    x2 = x0 + G2 * f32(2.0) - ONE
+    y2 = y0 + G2 * f32(2.0) - ONE
+
+    I, J = _lattice(i), _lattice(j)
+    i1, j1 = i1.astype(np.int64), j1.astype(np.int64)
+    g0 = PERM[I + PERM[J]] % 12
+    g1 = PERM[I + i1 + PERM[J + j1]] % 12
+    g2 = PERM[I + 1 + PERM[J + 1]] % 12
+
+    total = np.zeros_like(x)
+    for xc, yc, g in ((x0, y0, g0), (x1, y1, g1), (x2, y2, g2)):
+        f = HALF - xc * xc - yc * yc
+        grad = GRAD3[g]
+        n = f * f * f * f * (grad[..., 0] * xc + grad[..., 1] * yc)
+        total = total + np.where(f > 0, n, f32(0.0))
+
+    return total * f32(70.0)
+
+
+def noise3(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """ Single octave 3D simplex noise """
+    s = (x + y + z) * F3
+    i = np.floor(x + s)
+    j = np.floor(y + s)
+    k = np.floor(z + s)
+    t = (i + j + k) * G3
+
+    x0 = x - (i - t)
+    y0 = y - (j - t)
+    z0 = z - (k - t)
+
+    # Offsets of the second (o1) and third (o2) simplex corners, picked by the same
+    # branch structure as the C source (see _NOISE3_OFFSETS)
+    case = np.select(
+        [
+            (x0 >= y0) & (y0 >= z0),
+            (x0 >= y0) & (x0 >= z0),
+            (x0 >= y0),
+            (y0 < z0),
+            (x0 < z0),
+        ],
+        [0, 1, 2, 3, 4],
+        default=5,
+    )
+    o1i = np.moveaxis(_NOISE3_OFFSETS[case, 0], -1, 0)
+    o2i = np.moveaxis(_NOISE3_OFFSETS[case, 1], -1, 0)
+    o1f, o2f = o1i.astype(np.float32), o2i.astype(np.float32)
+
+    corners = (
+        (x0, y0, z0),
+        (x0 - o1f[0] + G3, y0 - o1f[1] + G3, z0 - o1f[2] + G3),
+        (x0 - o2f[0] + f32(2.0) * G3, y0 - o2f[1] + f32(2.0) * G3, z0 - o2f[2] + f32(2.0) * G3),
+        (x0 - ONE + f32(3.0) * G3, y0 - ONE + f32(3.0) * G3, z0 - ONE + f32(3.0) * G3),
+    )
+
+    I, J, K = _lattice(i), _lattice(j), _lattice(k)
+    grads = (
+        PERM[I + PERM[J + PERM[K]]] % 12,
+        PERM[I + o1i[0] + PERM[J + o1i[1] + PERM[o1i[2] + K]]] % 12,
+        PERM[I + o2i[0] + PERM[J + o2i[1] + PERM[o2i[2] + K]]] % 12,
+        PERM[I + 1 + PERM[J + 1 + PERM[K + 1]]] % 12,
+    )
+
+    total = np.zeros_like(x)
+    for (xc, yc, zc), g in zip(corners, grads):
+        f = POINT_SIX - xc * xc - yc * yc - zc * zc
+        grad = GRAD3[g]
+        n = f * f * f * f * (xc * grad[..., 0] + yc * grad[..., 1] + zc * grad[..., 2])
+        total = total + np.where(f > 0, n, f32(0.0))
+
+    return total * f32(32.0)
+
+
+def noise4(x: np.ndarray, y: np.ndarray, z: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """ Single octave 4D simplex noise """
+    s = (x + y + z + w) * F4
+    i = np.floor(x + s)
+    j = np.floor(y + s)
+    k = np.floor(z + s)
+    l = np.floor(w + s)
+    t = (i + j + k + l) * G4
+
+    x0 = x - (i - t)
+    y0 = y - (j - t)
+    z0 = z - (k - t)
+    w0 = w - (l - t)
+
+    c = (
+        (x0 > y0).astype(np.int64) * 32 + (x0 > z0).astype(np.int64) * 16 +
+        (y0 > z0).astype(np.int64) * 8 + (x0 > w0).astype(np.int64) * 4 +
+        (y0 > w0).astype(np.int64) * 2 + (z0 > w0).astype(np.int64)
+    )
+    order = SIMPLEX[c]
+
+    I, J, K, L = _lattice(i), _lattice(j), _lattice(k), _lattice(l)
+    position = (x0, y0, z0, w0)
+
+    total = np.zeros_like(x)
+    for corner, threshold in enumerate((None, 3, 2, 1, 0)):
+        if threshold is None:
+            offset = np.zeros_like(order)
+            corner_offset = f32(0.0)
+        elif threshold == 0:
+            offset = np.ones_like(order)
+            corner_offset = f32(4.0) * G4
+        else:
+            offset = (order >= threshold).astype(np.int64)
+            corner_offset = f32(corner) * G4
+
+        if threshold == 0:
+            xc, yc, zc, wc = (p - ONE + corner_offset for p in position)
+        elif threshold is None:
+            xc, yc, zc, wc = position
+        else:
+            xc, yc, zc, wc = (p - offset[..., a].astype(np.float32) + corner_offset for a, p in enumerate(position))
+
+        g = PERM[I + offset[..., 0] + PERM[J + offset[..., 1] + PERM[K + offset[..., 2] + PERM[L + offset[..., 3]]]]] & 0x1f
+        grad = GRAD4[g]
+
+        f = POINT_SIX - xc * xc - yc * yc - zc * zc - wc * wc
+        f2 = f * f
+        n = f2 * f2 * (grad[..., 0] * xc + grad[..., 1] * yc + grad[..., 2] * zc + grad[..., 3] * wc)
+        total = total + np.where(f >= 0, n, f32(0.0))
+
+    return total * f32(27.0)
+
+# -----------------------------------------------------------------------------
+# Octaves / tiling (mirrors py_noise2 in noise/_simplex.c)
+# -----------------------------------------------------------------------------
+
+def _fast_sin(x: np.ndarray) -> np.ndarray:
+    """ fast_sinf from the C source: approximates sin(pi * x) """
+    x = x - ((x + _WRAP) - _WRAP)
+    y = x - x * np.abs(x)
+    return y * (_SIN_Q + _SIN_P * np.abs(y))
+
+
+def _wrap(v: np.ndarray, repeat: float):
+    """ Map one axis onto a circle so that it repeats every `repeat` units """
+    angle = (v.astype(np.float64) * 2.0 / np.float64(repeat)).astype(np.float32)
+    radius = f32(np.float64(repeat) * _INV_PI * 0.5)
+    return _fast_sin(angle) * radius, _fast_sin(angle + HALF) * radius
+
+
+def snoise2(
+    x,
+    y,
+    octaves: int = 1,
+    persistence: float = 0.5,
+    lacunarity: float = 2.0,
+    repeatx: Optional[float] = None,
+    repeaty: Optional[float] = None,
+    base: float = 0.0
+) -> np.ndarray:
+    """
+    Array version of noise.snoise2 with the same arguments and semantics.
+    x and y can be scalars or arrays (broadcast together). Returns float64 values.
+    """
+    if octaves <= 0:
+        raise ValueError("Expected octaves value > 0")
+
+    x = np.asarray(x, dtype=np.float64).astype(np.float32)
+    y = np.asarray(y, dtype=np.float64).astype(np.float32)
+    x, y = np.broadcast_arrays(x, y)
+    persistence, lacunarity, base = f32(persistence), f32(lacunarity), f32(base)
+
+    # The C extension treats FLT_MAX as "no repeat"
+    max_float = np.finfo(np.float32).max
+    repeatx = max_float if repeatx is None else f32(repeatx)
+    repeaty = max_float if repeaty is None else f32(repeaty)
+
+    if repeatx == max_float and repeaty == max_float:
+        def sample(freq): return noise2(x * freq + base, base + y * freq)
+    elif repeaty == max_float:
+        sx, cx = _wrap(x, repeatx)
+        cx = cx + base
+        def sample(freq): return noise3(sx * freq, y * freq, cx * freq)
+    elif repeatx == max_float:
+        sy, cy = _wrap(y, repeaty)
+        cy = cy + base
+        def sample(freq): return noise3(x * freq, sy * freq, cy * freq)
+    else:
+        sx, cx = _wrap(x, repeatx)
+        sy, cy = _wrap(y, repeaty)
+        cx, cy = cx + base, cy + base
+        def sample(freq): return noise4(sx * freq, sy * freq, cx * freq, cy * freq)
+
+    freq, amp, max_amp = ONE, ONE, ONE
+    total = sample(freq)
+    for _ in range(1, octaves):
+        freq = freq * lacunarity
+        amp = amp * persistence
+        max_amp = max_amp + amp
+        total = total + sample(freq) * amp
+
+    return (total / max_amp).astype(np.float64)
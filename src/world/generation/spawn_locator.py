@@ -0,0 +1,75 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+from constants import CHUNK_SIZE
+from utils.coords import Coord
+from world.generation.terrain_generator import TerrainGenerator
+from world.generation.chunk_workers import generate_chunk_data
+
+
+# Give up after searching this many chunks out from the origin
+SPAWN_SEARCH_MAX_RADIUS = 32
+
+
+class SpawnLocator:
+    """
+        Finds the nearest spot where the player can spawn: a tile whose whole 3x3
+        neighbourhood is dry and free of obstacles (trees, spawners).
+
+        Works on generated terrain masks a window of chunks at a time, growing the
+        window until the best candidate is provably the nearest one. Only peeks at
+        terrain arrays, no Tile/Entity objects (or entity ids) are created.
+    """
+
+    def __init__(self, terrain_generator: TerrainGenerator, size: int = CHUNK_SIZE):
+        self.terrain_generator = terrain_generator
+        self.size = size
+        self._masks: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def peek_blocked(self, cx: int, cy: int) -> np.ndarray:
+        """
+        Blocked mask of chunk (cx, cy) as a (size, size) array indexed [x, y] in world
+        axis order, i.e. [0, 0] is world tile (cx * size, cy * size - size + 1).
+        """
+        if (cx, cy) not in self._masks:
+            terrain = generate_chunk_data(self.terrain_generator, cx, cy, self.size)
+            blocked = (terrain.is_water | terrain.has_obstacle).reshape(self.size, self.size)
+            self._masks[(cx, cy)] = blocked[:, ::-1]
+        return self._masks[(cx, cy)]
+
+    def _window(self, ocx: int, ocy: int, radius: int) -> Tuple[np.ndarray, int, int]:
+        """ Blocked mask of the (2 * radius + 1)^2 chunks around (ocx, ocy) and its world origin """
+        n = 2 * radius + 1
+        blocked = np.empty((n * self.size, n * self.size), dtype=bool)
+        for i in range(n):
+            for j in range(n):
+                blocked[
+                    i * self.size:(i + 1) * self.size,
+                    j * self.size:(j + 1) * self.size
+                ] = self.peek_blocked(ocx - radius + i, ocy - radius + j)
+        return blocked, (ocx - radius) * self.size, (ocy - radius) * self.size - self.size + 1
+
+    def find_spawn(self, origin: Optional[Coord] = None, max_radius: int = SPAWN_SEARCH_MAX_RADIUS) -> Coord:
+        """ World coord of the clear 3x3 spot closest to origin (defaults to the world origin) """
+        origin = origin if origin is not None else Coord.world(0, 0)
+        ox, oy = float(origin.x), float(origin.y)
+        ocx, ocy = int(np.floor(ox / self.size)), int(np.ceil(oy / self.size))
+
+        for radius in range(max_radius + 1):
+            blocked, x0, y0 = self._window(ocx, ocy, radius)
+
+            # Centers whose 3x3 neighbourhood is fully clear
+            windows = np.lib.stride_tricks.sliding_window_view(blocked, (3, 3))
+            xs, ys = np.nonzero(~windows.any(axis=(2, 3)))
+            if len(xs) == 0: continue
+
+            xs, ys = xs + x0 + 1, ys + y0 + 1
+            dist = (xs - ox) ** 2 + (ys - oy) ** 2
+            best = int(np.argmin(dist))
+
+            # Anything outside this window is at least this far away
+            x1, y1 = x0 + blocked.shape[0] - 1, y0 + blocked.shape[1] - 1
+            edge = min(ox - x0, x1 - ox, oy - y0, y1 - oy)
+            if edge > 0 and dist[best] <= edge ** 2 or radius == max_radius:
+                return Coord.world(int(xs[best]), int(ys[best]))
+
+        raise ValueError(f"No spawn spot within {max_radius} chunks of {origin}")
@@ -0,0 +1,45 @@
+import numpy as np
+from typing import Dict, Optional
+from regestries import ChunkSpawnerRegistry
+from world.generation.terrain_generator import ChunkTerrain
+from world.generation.coord_rng import RngStream, random_ints
+
+
+def place_spawners(terrain: ChunkTerrain, seed: int, registry: Optional[ChunkSpawnerRegistry] = None) -> None:
+    """
+        Roll chunk spawners (FoxBurrow, Outpost, ...) for every tile of `terrain`.
+        Each tile's roll is keyed on (seed, x, y) so placements don't depend on generation order.
+
+        All tiles are rolled at once and only the few that hit a spawner are looked at,
+        their footprints are checked against the spawner's CAN_SPAWN_SPAWNER mask.
+        Hits are resolved in tile order so an earlier spawner blocks later overlapping ones.
+
+        Placements are recorded in terrain.spawners as (classname, tile index) and their
+        footprint is marked in terrain.has_obstacle. Spawner entities themselves are built
+        later by the chunk, so this can run without touching the id generator.
+    """
+    registry = registry or ChunkSpawnerRegistry()
+    size = terrain.size
+
+    x0, y0 = terrain.origin
+    local_x, local_y = np.divmod(np.arange(size * size), size)
+    rolls = random_ints(seed, x0 + local_x, y0 - local_y, RngStream.SPAWNER, registry.max_roll)
+
+    # Tiles that rolled a spawner and which one (same pick as ChunkSpawnerRegistry.choose_random_type)
+    hits = np.flatnonzero(rolls > registry.weights[0])
+    type_indices = np.searchsorted(registry.weights, rolls[hits], side='left') - 1
+
+    obstacles = terrain.has_obstacle.reshape(size, size) # View, writes go to terrain.has_obstacle
+    valid: Dict[type, np.ndarray] = {} # Per type mask of tiles it may cover, rebuilt after each placement
+
+    for i, type_index in zip(hits.tolist(), type_indices.tolist()):
+        e_type = registry.types[type_index]
+        x, y = divmod(i, size)
+        w, h = int(e_type.SIZE.x), int(e_type.SIZE.y)
+        if x + w > size or y + h > size: continue
+
+        if e_type not in valid: valid[e_type] = e_type.CAN_SPAWN_SPAWNER(terrain).reshape(size, size)
+        if valid[e_type][x:x + w, y:y + h].all():
+            terrain.spawners.append((e_type.__name__, i))
+            obstacles[x:x + w, y:y + h] = True
+            valid.clear()
@@ -1,20 +1,26 @@
 import json
 import math
+import zlib
 import noise
-import random
+import numpy as np
 from pathlib import Path
 from utils.paths import data_root
 from bisect import bisect_left
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field, replace
 from typing import Optional, Tuple, Dict, List
 
 from world.tile import Tile
+from world.generation import simplex
+from world.generation.coord_rng import RngStream, random_floats, random_ints
+from world.generation.biome_field import BiomeFieldCache
 from utils.coords import Coord
+from metrics.stage_profiler import profile_stage
 from world.generation.types import Biome
 from system.entities.entity import Entity
 from world.generation.types import Degree
 from system.entities.sprites.tree import Tree
 from world.biome_tile_weights import TILE_WEIGHTS
+from constants import CHUNK_SIZE
 
 
 # -----------------------------------------------------------------------------
@@ -51,7 +57,82 @@ class NoiseParams:
     repeatx: int
     repeaty: int
     base: float
-       
+
+
+# Tile ids with fixed meaning during generation
+DESERT_TILE_ID = 12
+WATER_TILE_IDS = (13, 14, 15) # (grassland, tundra, desert) water
+
+
+@dataclass
+class ChunkTerrain:
+    """
+        Array form of one generated chunk.
+
+        Every array is flat and laid out in chunk tile order, i.e. index i maps to
+        local (x, y) = (i // size, i % size) and world (x0 + x, y0 - y). Tile and
+        Tree objects are only built on request so callers can amortize that cost.
+
+        Holds no entity ids or pygame objects so it can be cheaply sent between
+        processes (see world.generation.chunk_workers).
+    """
+    size: int
+    origin: Tuple[int, int]
+    ids: np.ndarray
+    is_border: np.ndarray
+    is_water: np.ndarray
+    has_tree: np.ndarray
+    is_snowy: np.ndarray
+    has_obstacle: np.ndarray
+    spawners: List[Tuple[str, int]] = field(default_factory=list) # (classname, tile index)
+
+    def world_location(self, i: int) -> Tuple[int, int]:
+        return self.origin[0] + i // self.size, self.origin[1] - i % self.size
+
+    def build_tile(self, i: int) -> Tile:
+        x, y = self.world_location(i)
+        return Tile(
+            int(self.ids[i]),
+            Coord.world(x, y),
+            is_chunk_border=bool(self.is_border[i]),
+            is_water=bool(self.is_water[i]),
+            has_obsticle=bool(self.has_obstacle[i]),
+        )
+
+    def build_tree(self, i: int) -> Optional[Tree]:
+        if not self.has_tree[i]: return None
+        x, y = self.world_location(i)
+        return Tree(Coord.world(x - 0.5, y + 0.5), snowy=bool(self.is_snowy[i]))
+
+    # ---- Deltas against this terrain (see Chunk.save) ---- #
+
+    def copy(self) -> "ChunkTerrain":
+        """ Copy with its own tile state arrays """
+        return replace(
+            self, ids=self.ids.copy(), is_water=self.is_water.copy(),
+            has_obstacle=self.has_obstacle.copy(), spawners=list(self.spawners)
+        )
+
+    def fingerprint(self) -> int:
+        """ Checksum of the tile state, used to notice the generator changing under a saved delta """
+        return zlib.crc32(self.ids.tobytes() + self.is_water.tobytes() + self.has_obstacle.tobytes())
+
+    def changed_tiles(self, ids: np.ndarray, is_water: np.ndarray, has_obstacle: np.ndarray) -> np.ndarray:
+        """ Indices of the tiles whose state differs from this terrain """
+        return np.flatnonzero((ids != self.ids) | (is_water != self.is_water) | (has_obstacle != self.has_obstacle))
+
+    def apply_tile_changes(self, indices: np.ndarray, ids: np.ndarray, is_water: np.ndarray, has_obstacle: np.ndarray) -> None:
+        """ Overwrite the state of the tiles at indices (inverse of changed_tiles()) """
+        self.ids[indices] = ids
+        self.is_water[indices] = is_water
+        self.has_obstacle[indices] = has_obstacle
+
+    @classmethod
+    def from_tile_state(cls, size: int, origin: Tuple[int, int], ids, is_border, is_water, has_obstacle) -> "ChunkTerrain":
+        """ Terrain holding only tile state (e.g. read back from a full save), without trees """
+        no_trees = np.zeros(size * size, dtype=bool)
+        return cls(size, origin, ids, is_border, is_water, no_trees, no_trees, has_obstacle)
+
 
 class TerrainGenerator:
     """
@@ -67,8 +148,18 @@ class TerrainGenerator:
         - Compute water using lake noise + blended threshold
         - If not water, pick a biome (highest weight) and sample a ground tile id
         - If not water, possibly spawn a tree based on forest noise + density
+
+        generate_chunk() runs the same pipeline for a whole chunk at once on NumPy
+        arrays and produces identical tiles/trees to calling generate_tile().
+
+        Random draws come from coord_rng keyed on (seed, x, y), so a tile's content
+        does not depend on what else was generated before it.
     """
 
+    # Bump whenever the generated terrain changes. Delta saves record it, so saves made
+    # against an older generator can be told apart (see chunk_reader.prepare_load).
+    VERSION = 1
+
     def __init__(
         self, 
         seed, 
@@ -91,6 +182,7 @@ class TerrainGenerator:
         # Internal caches
         self.nvs = []
         self.occupied_tiles = {}
+        self.biome_field = BiomeFieldCache(self._biome_values)
 
         # Convert Degree sliders into scalar modifiers for noise frequency.
         # Smaller modifier => higher frequency noise => "smaller" features.
@@ -106,9 +198,6 @@ class TerrainGenerator:
         elif water_level == Degree.High:
             self.water_level_modifier = 200
 
-        # Deterministic RNG for weighted tile picks / tree chance.
-        self.rng = random.Random(seed)
-
         # Temperature thresholds for biome transitions (tunable).
         # Lower value means "more desert"; higher means "more tundra".
         self._t_desert = -0.35 + self.temperature * 0.1
@@ -196,7 +285,7 @@ class TerrainGenerator:
         )
 
         return Tile(
-            self._get_id_from_weight(weights),
+            self._get_id_from_weight(weights, x, y),
             Coord.world(x, y),
             is_chunk_border=onborder,
             is_water=True,
@@ -208,17 +297,17 @@ class TerrainGenerator:
         return 13 <= tile.id <= 15 
     
     #TODO: replace with sample_from_weighted_list
-    def _get_id_from_weight(self, weights: List[Tuple[int, int]]) -> int:
+    def _get_id_from_weight(self, weights: List[Tuple[int, int]], x: int, y: int) -> int:
         """ 
         Given (ids, weights) returns random id influenced by the weights
-        Implementation: build cumulative sums and binary search.
+        Implementation: build cumulative sums and binary search on the tile's roll.
         """
         csum, sums, ids = 0, [], []
         for id, weight in weights:
             csum += weight
             sums.append(csum)
             ids.append(id)
-        return ids[bisect_left(sums, self.rng.randint(0, csum))]
+        return ids[bisect_left(sums, int(random_ints(self.seed, x, y, RngStream.TILE, csum)[0]))]
     
     def _get_tile(self, x: int, y: int, biome_w: Dict[Biome, float], onborder: bool) -> Tile:
         """ Create a Tile at (x, y) based on water and biome """
@@ -226,7 +315,7 @@ class TerrainGenerator:
         biome = self._get_biome(biome_w)
         if biome == Biome.DESERT: return Tile(12, Coord.world(x, y), is_chunk_border=onborder)
         return Tile(
-            self._get_id_from_weight(TILE_WEIGHTS[biome]),
+            self._get_id_from_weight(TILE_WEIGHTS[biome], x, y),
             Coord.world(x, y), is_chunk_border=onborder
         )
     
@@ -252,7 +341,7 @@ class TerrainGenerator:
             **asdict(self.forest_noise),
         )
 
-        if noise_value < 0 and self.rng.random() < FOREST_DENSITY:
+        if noise_value < 0 and random_floats(self.seed, x, y, RngStream.TREE)[0] < FOREST_DENSITY:
             return Tree(Coord.world(x - 0.5, y + 0.5), snowy=(biome==Biome.TUNDRA))
         
     # -------------------------------------------------------------------------
@@ -276,6 +365,141 @@ class TerrainGenerator:
             return tile, tree
         return tile, None
 
+    def generate_chunk(self, cx: int, cy: int, size: int = CHUNK_SIZE) -> Tuple[List[Tile], List[Entity]]:
+        """
+        Procedurally generate every tile and entity of chunk (cx, cy).
+
+        Returns:
+            (tiles in chunk tile order, entities)
+        """
+        terrain = self.generate_chunk_terrain(cx, cy, size)
+        tiles = [terrain.build_tile(i) for i in range(size * size)]
+        entities = [terrain.build_tree(i) for i in np.flatnonzero(terrain.has_tree)]
+        return tiles, entities
+
+    def generate_chunk_terrain(self, cx: int, cy: int, size: int = CHUNK_SIZE) -> ChunkTerrain:
+        """
+        Run the generation pipeline for chunk (cx, cy) as array operations.
+        No Tile/Entity objects are created (see ChunkTerrain.build_*).
+        """
+        x0, y0 = cx * size, cy * size
+        local_x, local_y = np.divmod(np.arange(size * size), size)
+        xs = (x0 + local_x).astype(np.float64)
+        ys = (y0 - local_y).astype(np.float64)
+
+        is_border = (local_x == 0) | (local_x == size - 1) | (local_y == 0) | (local_y == size - 1)
+
+        # Biome weights, stacked as (DESERT, GRASSLAND, TUNDRA)
+        with profile_stage("biome_weights"):
+            biome_w = self._biome_weights_from_values(self.biome_field.chunk_field(
+                cx, cy, size, (self._t_desert, self._t_tundra), BIOME_BLEND_WIDTH
+            ))
+            biome = np.argmax(biome_w, axis=0)
+            is_desert = biome == 0
+
+        # Water
+        with profile_stage("water"):
+            lake_noise = self._noise_grid(
+                xs / self.water_level_modifier,
+                ys / self.water_level_modifier,
+                self.lake_noise,
+            ) + 0.5
+            blended_thresh = (
+                biome_w[0] * WATER_THRESHOLDS[Biome.DESERT] +
+                biome_w[1] * WATER_THRESHOLDS[Biome.GRASSLAND] +
+                biome_w[2] * WATER_THRESHOLDS[Biome.TUNDRA]
+            )
+            m = self.smoothstep_array(
+                blended_thresh - WATER_EDGE_SOFTNESS,
+                blended_thresh + WATER_EDGE_SOFTNESS,
+                lake_noise
+            )
+            is_water = m >= 0.5
+
+        # Weighted id pick from a cumulative weight table per tile
+        # (water tiles use their biome blend, land tiles use TILE_WEIGHTS of their biome)
+        with profile_stage("tile_pick"):
+            needs_pick = is_water | ~is_desert
+            cum_weights, pick_ids = self._tile_weight_tables(biome_w, biome, is_water)
+            rolls = random_ints(self.seed, xs, ys, RngStream.TILE, cum_weights[:, -1])
+
+            ids = np.full(size * size, DESERT_TILE_ID, dtype=np.uint8)
+            picked = np.sum(cum_weights < rolls[:, None], axis=1)
+            ids[needs_pick] = np.take_along_axis(pick_ids, picked[:, None], axis=1)[needs_pick, 0]
+
+        # Forest
+        with profile_stage("trees"):
+            forest_noise = self._noise_grid(
+                xs / self.forest_size_modifier,
+                ys / self.forest_size_modifier,
+                self.forest_noise,
+            )
+            tree_rolls = random_floats(self.seed, xs, ys, RngStream.TREE)
+            has_tree = ~is_water & ~is_desert & (forest_noise < 0) & (tree_rolls < FOREST_DENSITY)
+
+        return ChunkTerrain(
+            size=size,
+            origin=(x0, y0),
+            ids=ids,
+            is_border=is_border,
+            is_water=is_water,
+            has_tree=has_tree,
+            is_snowy=biome == 2,
+            has_obstacle=has_tree.copy(),
+        )
+
+    # -------------------------------------------------------------------------
+    # Chunk (array) helpers
+    # -------------------------------------------------------------------------
+
+    def _noise_grid(self, xs: np.ndarray, ys: np.ndarray, params: NoiseParams) -> np.ndarray:
+        """ Sample snoise2 at every (xs[i], ys[i]). Bit identical to calling noise.snoise2 per point """
+        return simplex.snoise2(xs, ys, **asdict(params))
+
+    def _biome_values(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """ Array version of _get_biome_value """
+        return self._noise_grid(xs / 200, ys / 200, self.biome_noise) + 0.4 * np.cos(ys / 200)
+
+    def _biome_weights_array(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """ Array version of _biome_weights. Returns shape (3, n) stacked as (DESERT, GRASSLAND, TUNDRA) """
+        return self._biome_weights_from_values(self._biome_values(xs, ys))
+
+    def _biome_weights_from_values(self, v: np.ndarray) -> np.ndarray:
+        """ Biome weights (3, n) for biome field values v """
+        d_to_g = self.smoothstep_array(self._t_desert - BIOME_BLEND_WIDTH, self._t_desert + BIOME_BLEND_WIDTH, v)
+        g_to_t = self.smoothstep_array(self._t_tundra - BIOME_BLEND_WIDTH, self._t_tundra + BIOME_BLEND_WIDTH, v)
+
+        w = np.stack((1.0 - d_to_g, d_to_g * (1.0 - g_to_t), g_to_t))
+        s = w[0] + w[1] + w[2]
+        degenerate = s <= 1e-6
+        w = w * (1.0 / np.where(degenerate, 1.0, s))
+        w[:, degenerate] = np.array([[0.0], [1.0], [0.0]])
+        return w
+
+    @staticmethod
+    def _tile_weight_tables(biome_w: np.ndarray, biome: np.ndarray, is_water: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build per-tile cumulative weights + matching ids for the weighted tile pick.
+        Tables are padded to a common width by repeating the last entry (zero extra weight).
+        """
+        width = max(len(weights) for weights in TILE_WEIGHTS.values())
+        n = biome.shape[0]
+        cum_weights = np.zeros((n, width), dtype=np.int64)
+        pick_ids = np.zeros((n, width), dtype=np.uint8)
+
+        for biome_index, biome_type in ((1, Biome.GRASSLAND), (2, Biome.TUNDRA)):
+            ids, weights = zip(*TILE_WEIGHTS[biome_type])
+            mask = ~is_water & (biome == biome_index)
+            cum_weights[mask] = np.pad(np.cumsum(weights), (0, width - len(weights)), mode='edge')
+            pick_ids[mask] = np.pad(ids, (0, width - len(ids)), mode='edge')
+
+        # Water ids are weighted by the biome blend, ordered (GRASSLAND, TUNDRA, DESERT) like _get_water
+        water_weights = np.floor(biome_w[[1, 2, 0]][:, is_water].T * 1000).astype(np.int64)
+        cum_weights[is_water] = np.pad(np.cumsum(water_weights, axis=1), ((0, 0), (0, width - 3)), mode='edge')
+        pick_ids[is_water] = np.pad(WATER_TILE_IDS, (0, width - 3), mode='edge')
+
+        return cum_weights, pick_ids
+
     # -------------------------------------------------------------------------
     # Math helpers / persistence
     # -------------------------------------------------------------------------
@@ -288,14 +512,22 @@ class TerrainGenerator:
         """
         t = max(0.0, min(1.0, (x - edge0) / (edge1 - edge0)))
         return t * t * (3 - 2 * t)
+
+    @staticmethod
+    def smoothstep_array(edge0, edge1, x: np.ndarray) -> np.ndarray:
+        """ Elementwise smoothstep (same arithmetic as smoothstep) """
+        t = np.clip((x - edge0) / (edge1 - edge0), 0.0, 1.0)
+        return t * t * (3 - 2 * t)
     
+    def params(self) -> Tuple:
+        """ Constructor args that recreate this generator (what save() persists) """
+        return (self.seed, self.water_level, self.forest_size, self.temperature)
+
     def save(self, game_name: str):
         """ Persist generator settings so the same world can be regenerated later """
         path = data_root() / 'games' / game_name / 'terrain_generator'
         path.write_text(json.dumps(
-            {"data": [
-                self.seed, self.water_level, self.forest_size, self.temperature
-            ]}, ensure_ascii=False, indent=2
+            {"data": list(self.params())}, ensure_ascii=False, indent=2
         ), encoding='utf-8') 
 
     @staticmethod
@@ -1,57 +1,96 @@
 import math
-import random
+import logging
 import numpy as np
 from pygame.locals import *
 from utils.coords import Coord
-from world.chunk import Chunk
-from world.biome_tile_weights import BIOME_TILE_WEIGHTS
+from world.chunk import Chunk, TileDrawItem
 from system.entities.entity import Entity
 from system.entities.entity_manager import EntityManager
-from constants import DISPLAY_SIZE, PADDING
+from constants import (
+    DISPLAY_SIZE, PADDING, CHUNK_SIZE, CHUNK_RECENTER_MARGIN,
+    CHUNK_LOAD_RADIUS, PREFETCH_LOOKAHEAD_MS, PREFETCH_MIN_SPEED
+)
 from system.entities.sprites.tree import Tree
 from system.game_clock import game_clock
 from system.entities.spawners.fox_burrow import FoxBurrow
 from system.entities.sprites.fox import Fox
 from world.tile import Tile
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 from pathlib import Path
 from world.path_finder import path_finder
+from world.generation.chunk_workers import chunk_worker_pool, generate_chunk_data
+from world.generation.terrain_generator import ChunkTerrain
+from world.chunk_reader import chunk_reader, load_here
+from world.chunk_cache import ChunkCache
+from world.tile_baker import TileBaker
+from world.chunk_prefetcher import MotionPredictor, StagedChunk
+from concurrent.futures import Future
 from metrics.simple_metrics import timeit
 
 from functools import lru_cache
 
-# Updates chunk list based on player location
-# Chunk ordering:
-#     1   4   7
-#     2   5   8
-#     3   6   9
+
+logger = logging.getLogger(__name__)
+
+# Keeps the chunks within load_radius of the chunk at the screen center loaded,
+# in a dict keyed by chunk coordinate (x, y). With a radius of 1:
+#     (x-1, y+1)   (x, y+1)   (x+1, y+1)
+#     (x-1, y  )   (x, y  )   (x+1, y  )
+#     (x-1, y-1)   (x, y-1)   (x+1, y-1)
+
+
+def view_load_radius() -> int:
+    """ Smallest load radius that keeps DISPLAY_SIZE covered while the map waits out the recenter margin """
+    reach = max(
+        np.abs(Coord.view(sx * DISPLAY_SIZE[0] / 2, sy * DISPLAY_SIZE[1] / 2, 0).location[:2]).max()
+        for sx in (-1, 1) for sy in (-1, 1)
+    )
+    return max(1, math.ceil((reach + CHUNK_RECENTER_MARGIN) / CHUNK_SIZE))
 
 
 class Map:
     def __init__(self, game_name, screen, player, terrain_generator, assets=None):
         self.game_name = game_name
-        self.chunks = []
+        self.load_radius = CHUNK_LOAD_RADIUS if CHUNK_LOAD_RADIUS is not None else view_load_radius()
+        self.chunks: Dict[Tuple[int, int], Chunk] = {}
         self.player = None
         self.screen = screen
         self.entity_manager = EntityManager(self.screen)
         self.entities_to_render = []
         self.terrain_generator = terrain_generator
         self.assets = assets
+        self.chunk_cache = ChunkCache(self._persist_chunk)
+        self.tile_baker = TileBaker()
 
-        self.bind_player(player)
-        self.init_map_chunks()
+        # Telemetry: window rebuilds, and chunk changes the recenter margin absorbed
+        self.recenters = 0
+        self.recenters_avoided = 0
+        self.prefetch_hits = 0
+        self.prefetch_wasted = 0
+        self.saves_skipped = 0 # Chunks left unwritten because nothing in them changed
 
-        path_finder.bind_map(self)
+        self.motion = MotionPredictor()
 
         # ---- Load chunks over a few frames ---- #        
         self._is_loading_chunks: bool = False
-        self._loading_chunks: List[Optional[Chunk]] = [None] * 9
+        self._loading_chunks: Dict[Tuple[int, int], Chunk] = {}
+
+        # Queues hold chunk coordinates, nearest to the center first
+        self._chunk_loading: Optional[Tuple[Tuple[int, int], Chunk]] = None
+        self._chunk_generating: Optional[Tuple[Tuple[int, int], Chunk]] = None
+        self._chunks_to_save: List[Tuple[int, int]] = []
+        self._chunks_to_load: List[Tuple[Tuple[int, int], Future]] = []
+        self._chunks_to_generate: List[Tuple[Tuple[int, int], Future]] = []
 
-        self._chunk_loading: Optional[Tuple[int, Chunk]] = None
-        self._chunk_generating: Optional[Tuple[int, Chunk]] = None
-        self._chunks_to_save: set[int] = []
-        self._chunks_to_load: List[Tuple[int, Tuple[int, int]]] = []
-        self._chunks_to_generate: List[Tuple[int, Tuple[int, int]]] = []
+        # ---- Stage the next chunk window in the direction of travel ---- #
+        self._prefetch_target: Optional[Tuple[int, int]] = None
+        self._staged: Dict[Tuple[int, int], StagedChunk] = {}
+        self._staging: Optional[StagedChunk] = None
+
+        self.bind_player(player)
+        self.init_map_chunks()
+
+        path_finder.bind_map(self)
 
     def bind_player(self, player):
         self.player = player
@@ -60,6 +99,8 @@ class Map:
         self.entity_manager.set_player(player)
         self.entity_manager.add_entity(player)
         self.chunk_center = self.screen.get_screen_center().as_chunk_coord()
+        self._last_center_chunk = self.chunk_center
+        self.motion.reset()
 
 
     def unbind_player(self):
@@ -76,52 +117,79 @@ class Map:
         self.player.smooth_movement()
         self.screen.update()
         self.entities_to_render = self.entity_manager.get_entity_render_objs(self.player)
+        if self.assets is not None: self.tile_baker.step(self._bake_chunks(), self.screen.get_screen_center())
         
 
     def get_tiles_to_render(self, min_x, max_x, min_y, max_y):
 
         tiles_to_render = []
-        for chunk in self.chunks:
+        for chunk in self.chunks.values():
             tiles_to_render.extend(chunk.get_tiles_in_chunk(min_x, max_x, min_y, max_y))
 
         return tiles_to_render
     
-    def get_tile_surfaces_to_render(self, min_x, max_x, min_y, max_y):
+    def get_tile_surfaces_to_render(self, min_x, max_x, min_y, max_y) -> List[TileDrawItem]:
+        """ Draw items of the tile groups on screen, in draw order (see Chunk.get_tile_groups_in_region) """
         tile_surfaces_to_render = []
         region = (
             Coord.world(min_x, min_y),
             Coord.world(max_x - min_x, max_y - min_y, 1) 
         )
 
-        for chunk in self.chunks:
+        for chunk in self.chunks.values():
             tile_surfaces_to_render.extend(chunk.get_tile_groups_in_region(region))
 
         return tile_surfaces_to_render
 
+    def _bake_chunks(self):
+        """ Chunks whose tile groups the baker works on: the map's, then staged chunks that are built """
+        yield from self.chunks.values()
+        yield from (staged.chunk for staged in self._staged.values() if staged.built)
+
     
     @timeit()
     def handle_chunk_loading(self):
-        if np.array_equal(
-            self.chunk_center,
-            self.screen.get_screen_center().as_chunk_coord()
-        ) and not self._is_loading_chunks: return
-        
         if not self._is_loading_chunks:
+            center = self.screen.get_screen_center()
+            self.motion.update(center, game_clock.dt)
+            chunk = center.as_chunk_coord()
+            moved = not np.array_equal(chunk, self._last_center_chunk)
+            self._last_center_chunk = chunk
+            if np.array_equal(chunk, self.chunk_center):
+                self._handle_prefetch(center)
+                return
+
+            if not self._past_recenter_margin(center):
+                # Without the margin this chunk change would have rebuilt the window
+                if moved: self.recenters_avoided += 1
+                self._handle_prefetch(center)
+                return
+
+            self.recenters += 1
             self._is_loading_chunks = True
-            self.chunk_center = self.screen.get_screen_center().as_chunk_coord()
-            chunks_reused = set()
-
-            for i, (x, y) in enumerate(self.get_chunk_locations()):
-                if (c_indx := self.get_chunk_index(self.chunks, Coord.chunk(x, y))):
-                    # new chunk location is in previous chunks list
-                    self._loading_chunks[i] = self.chunks[c_indx - 1]
-                    chunks_reused.add(c_indx - 1)                    
+            self.chunk_center = chunk
+
+            # Nearest chunks first, so they are read/generated first
+            locations = self.get_chunk_locations()
+            for location in locations:
+                if location in self.chunks:
+                    self._loading_chunks[location] = self.chunks[location]
+                elif (chunk := self.chunk_cache.take(location)) is not None:
+                    # Left the map recently and is still whole in memory
+                    self._loading_chunks[location] = chunk
+                    for entity in chunk.entities:
+                        self.entity_manager.add_entity(entity)
+                elif (staged := self._staged.pop(location, None)) is not None:
+                    self._use_staged(staged)
                 else: 
-                    if self.check_dir_exists(x, y):
-                        self._chunks_to_load.append((i, (x, y)))
-                    else: self._chunks_to_generate.append((i, (x, y)))
-
-            self._chunks_to_save = set(range(9)) - chunks_reused
+                    if Chunk.exists(*location, self.game_name):
+                        self._chunks_to_load.append((location, self._submit_load(*location)))
+                    else: self._chunks_to_generate.append(
+                        (location, chunk_worker_pool.submit(self.terrain_generator, *location))
+                    )
+
+            self._chunks_to_save = [location for location in self.chunks if location not in self._loading_chunks]
+            self._clear_staged()
                     
                 
         if self._handle_saving_queue(): return
@@ -132,19 +200,111 @@ class Map:
         self._reset_chunk_loading()
         path_finder.clear_cache()
 
+    def _past_recenter_margin(self, center: Coord) -> bool:
+        """ True once center is more than CHUNK_RECENTER_MARGIN tiles outside the center chunk """
+        cx, cy, _ = self.chunk_center
+        x0, y0 = cx * CHUNK_SIZE, cy * CHUNK_SIZE # Chunk spans x in [x0, x0 + SIZE), y in (y0 - SIZE, y0]
+        return (
+            center.x < x0 - CHUNK_RECENTER_MARGIN or center.x >= x0 + CHUNK_SIZE + CHUNK_RECENTER_MARGIN or
+            center.y > y0 + CHUNK_RECENTER_MARGIN or center.y <= y0 - CHUNK_SIZE - CHUNK_RECENTER_MARGIN
+        )
+
+    # ---- Prefetching ---- #
+    def _handle_prefetch(self, center: Coord) -> None:
+        """ Stage the window the screen center is heading to, and build one staged chunk a frame """
+        target = self._predict_window(center)
+        if target is not None and target != self._prefetch_target:
+            self._prefetch_target = target
+            self._stage_window(target)
+
+        if self._staging is None:
+            staged = next((s for s in self._staged.values() if s.chunk is None and s.future.done()), None)
+            if staged is None: return
+            self._staging = staged
+            if staged.kind == "load": staged.chunk = self._begin_chunk_load(staged.location, staged.future)
+            else: staged.chunk = self._new_chunk(*staged.location, self._terrain(staged.location, staged.future))
+
+            if staged.chunk is None:
+                # Not saved after all, generate it instead
+                staged.kind, staged.future = "generate", chunk_worker_pool.submit(self.terrain_generator, *staged.location)
+                self._staging = None
+                return
+
+        if self._staging.step(): self._staging = None
+
+    def _predict_window(self, center: Coord) -> Optional[Tuple[int, int]]:
+        """ Center of the next chunk window if the screen center keeps moving, None if it stays """
+        if self.motion.speed < PREFETCH_MIN_SPEED: return None
+        predicted = self.motion.predict(center, PREFETCH_LOOKAHEAD_MS)
+        if not self._past_recenter_margin(predicted): return None
+
+        # Only the window next to the current one, it is the one the map moves to first
+        step = np.clip(predicted.as_chunk_coord()[:2] - self.chunk_center[:2], -1, 1)
+        return int(self.chunk_center[0] + step[0]), int(self.chunk_center[1] + step[1])
+
+    def _stage_window(self, target: Tuple[int, int]) -> None:
+        current = set(self.get_chunk_locations())
+        wanted = [location for location in self.get_chunk_locations(target) if location not in current]
+
+        self._clear_staged(keep=wanted)
+        for x, y in wanted: # Nearest the target first
+            if (x, y) in self._staged or (x, y) in self.chunk_cache: continue
+            if Chunk.exists(x, y, self.game_name):
+                self._staged[(x, y)] = StagedChunk((x, y), "load", self._submit_load(x, y))
+            else:
+                self._staged[(x, y)] = StagedChunk((x, y), "generate", chunk_worker_pool.submit(self.terrain_generator, x, y))
+
+    def _use_staged(self, staged: StagedChunk) -> None:
+        """ Put a staged chunk in the new window, in whatever state its prefetch got to """
+        self.prefetch_hits += 1
+        if staged.built:
+            self._loading_chunks[staged.location] = staged.chunk
+            for entity in staged.chunk.entities:
+                self.entity_manager.add_entity(entity)
+        elif staged.chunk is not None:
+            # Half built, the loading/generation queue finishes it
+            if staged.kind == "load": self._chunk_loading = (staged.location, staged.chunk)
+            else: self._chunk_generating = (staged.location, staged.chunk)
+        elif staged.kind == "load": self._chunks_to_load.append((staged.location, staged.future))
+        else: self._chunks_to_generate.append((staged.location, staged.future))
+
+        if staged is self._staging: self._staging = None
+
+    def _clear_staged(self, keep=frozenset()) -> None:
+        """ Drop staged chunks the map no longer heads to, built ones are kept in the chunk cache """
+        for location in [location for location in self._staged if location not in keep]:
+            staged = self._staged.pop(location)
+            self.prefetch_wasted += 1
+            if staged.built: self.chunk_cache.put(location, staged.chunk)
+            else: staged.future.cancel()
+            if staged is self._staging: self._staging = None
+        if not keep: self._prefetch_target = None
+
     def _handle_saving_queue(self) -> bool:
         if len(self._chunks_to_save) > 0:
-            chunk = self.chunks[self._chunks_to_save.pop()]
+            location = self._chunks_to_save.pop()
+            chunk = self.chunks[location]
             chunk.entities = list(self.entity_manager.get_and_removed_chunk_entities(chunk))
-            chunk.save(self.game_name)
+
+            # Saved once it falls out of the cache (see _persist_chunk)
+            self.chunk_cache.put(location, chunk)
             return True
         return False
     
     def _handle_loading_queue(self):
         if len(self._chunks_to_load) > 0 or self._chunk_loading:
             if not self._chunk_loading:
-                index, (x, y) = self._chunks_to_load.pop()
-                self._chunk_loading = (index, Chunk.begin_load(x, y, self.game_name, assets=self.assets))
+                # Chunks are read and decoded by the chunk reader, wait for any of them to finish
+                job = next((job for job in self._chunks_to_load if job[1].done()), None)
+                if job is None: return True
+
+                self._chunks_to_load.remove(job)
+                location, future = job
+                if (chunk := self._begin_chunk_load(location, future)) is None:
+                    # Not saved after all, generate it instead
+                    self._chunks_to_generate.append((location, chunk_worker_pool.submit(self.terrain_generator, *location)))
+                    return True
+                self._chunk_loading = (location, chunk)
             
             if self._chunk_loading[1].step_load():
                 # Could add seperate task to handle adding entities if this lags frames
@@ -160,14 +320,13 @@ class Map:
     def _handle_generation_queue(self):
         if len(self._chunks_to_generate) > 0 or self._chunk_generating:
             if not self._chunk_generating:
-                index, (x, y) = self._chunks_to_generate.pop()
-                self._chunk_generating = (index, Chunk(
-                    Coord.chunk(x, y), 
-                    terrain_generator=self.terrain_generator,
-                    assets=self.assets,
-                    auto_gen=False
-                ))
-                self._chunk_generating[1].start_generation()
+                # Terrain is generated by the chunk workers, wait for any of them to finish
+                job = next((job for job in self._chunks_to_generate if job[1].done()), None)
+                if job is None: return True
+
+                self._chunks_to_generate.remove(job)
+                location, future = job
+                self._chunk_generating = (location, self._new_chunk(*location, self._terrain(location, future)))
 
             if self._chunk_generating[1].step_generation():
                 # Could add seperate task to handle adding entities if this lags frames
@@ -186,58 +345,103 @@ class Map:
         self._chunks_to_save = []
         self._chunks_to_load = []
         self._chunks_to_generate = []
-        self._loading_chunks = [None] * 9
+        self._loading_chunks = {}
+
+    def _new_chunk(self, x, y, terrain) -> Chunk:
+        chunk = Chunk(
+            Coord.chunk(x, y), 
+            terrain_generator=self.terrain_generator,
+            assets=self.assets,
+            auto_gen=False
+        )
+        chunk.start_generation(terrain)
+        return chunk
+
+    def _persist_chunk(self, chunk: Chunk) -> None:
+        if not chunk.save(self.game_name): self.saves_skipped += 1
+
+    def _submit_load(self, x, y) -> Future:
+        """ Read a saved chunk in the background, delta saves also need their regenerated terrain """
+        baseline = chunk_worker_pool.submit(self.terrain_generator, x, y) if Chunk.is_delta(x, y, self.game_name) else None
+        return chunk_reader.submit(Chunk.get_store(self.game_name), int(x), int(y), self.terrain_generator, baseline)
+
+    def _begin_chunk_load(self, location: Tuple[int, int], future: Future) -> Optional[Chunk]:
+        """ Start building a chunk the chunk reader read, None if it has to be generated instead """
+        try:
+            load = future.result()
+        except Exception:
+            logger.exception(f"Reading chunk {location} failed, reading it here")
+            load = load_here(Chunk.get_store(self.game_name), *location, self.terrain_generator)
+
+        if load is None: return None
+        return Chunk.begin_load_from(load, terrain_generator=self.terrain_generator, assets=self.assets)
+
+    def _terrain(self, location: Tuple[int, int], future: Future) -> ChunkTerrain:
+        """ Terrain a chunk worker generated, generated here if the job failed (e.g. the worker died) """
+        try:
+            return future.result()
+        except Exception:
+            logger.exception(f"Generating chunk {location} failed on the chunk workers, generating it here")
+            return generate_chunk_data(self.terrain_generator, *location)
 
     # setups map with a chunk grid based on location
     def init_map_chunks(self):
-        chunk_locations = self.get_chunk_locations()
-        self.chunks = [
-            Chunk.load(x, y, self.game_name, assets=self.assets) if self.check_dir_exists(x, y) else Chunk(Coord.chunk(x, y), terrain_generator=self.terrain_generator, assets=self.assets)
-            for x, y in chunk_locations
-        ]
-
-        for chunk in self.chunks:
+        """ 
+            Build the chunk window around chunk_center (a new map, or a respawn). Chunks still
+            in the chunk cache (built staged ones go there) are newer than their saves, they are
+            taken from it so no location is held twice.
+        """
+        self._clear_staged()
+        self.chunks = {}
+
+        # Submit every chunk first so they generate in parallel
+        jobs = []
+        for x, y in self.get_chunk_locations():
+            if (chunk := self.chunk_cache.take((x, y))) is not None:
+                self.chunks[(x, y)] = chunk
+                continue
+            exists = Chunk.exists(x, y, self.game_name)
+            future = self._submit_load(x, y) if exists else chunk_worker_pool.submit(self.terrain_generator, x, y)
+            jobs.append((x, y, exists, future))
+
+        for x, y, exists, future in jobs:
+            if exists and (chunk := self._begin_chunk_load((x, y), future)) is not None:
+                chunk.finish_load()
+            else:
+                if exists: future = chunk_worker_pool.submit(self.terrain_generator, x, y) # Not saved after all
+                chunk = self._new_chunk(x, y, self._terrain((x, y), future))
+                chunk.step_generation(chunk.SIZE * chunk.SIZE)
+            self.chunks[(x, y)] = chunk
+
+        for chunk in self.chunks.values():
             for entity in chunk.entities: 
                 self.entity_manager.add_entity(entity)
 
-    def generate_loaded_chunks(self):
-        for i, chunk in enumerate(self.chunks):
-            neighbor_biomes = []
-            if len(chunk.tiles) == 0:
-                neighbor_biomes.append(self.chunks[i - 3].biome if i - 3 >= 0 else None)       
-                neighbor_biomes.append(self.chunks[i + 3].biome if i + 3 < len(self.chunks) else None)
-                neighbor_biomes.append(self.chunks[i - 1].biome if i % 3 > 0 else None)
-                neighbor_biomes.append(self.chunks[i + 1].biome if i % 3 < 2 else None)
-                chunk.generate(neighbor_biomes)
-                chunk.save(self.game_name)
-
-    # For now randomly choose a biome
-    def choose_biome(self):
-        biomes = list(BIOME_TILE_WEIGHTS.keys())
-        return biomes[random.randint(0, len(biomes) - 1)]
+    # Gets all chunk locations within load_radius, nearest first
+    def get_chunk_locations(self, center: Optional[Tuple[int, int]] = None) -> List[Tuple[int, int]]:
+        center_x, center_y = center if center is not None else self.chunk_center[:2]
+        center_x, center_y = int(center_x), int(center_y)
+        offsets = range(-self.load_radius, self.load_radius + 1)
+        return sorted(
+            ((center_x + dx, center_y + dy) for dx in offsets for dy in offsets),
+            key=lambda location: (location[0] - center_x) ** 2 + (location[1] - center_y) ** 2
+        )
 
-        
-    # Gets all chunk locations
-    def get_chunk_locations(self):
-        center_x, center_y, _ = self.chunk_center
-        return [
-            (center_x - 1, center_y + 1),
-            (center_x - 1, center_y),
-            (center_x - 1, center_y - 1),
-            (center_x, center_y + 1),
-            (center_x, center_y),
-            (center_x, center_y - 1),
-            (center_x + 1, center_y + 1),
-            (center_x + 1,  center_y),
-            (center_x + 1, center_y - 1)
-        ]
+    def loaded_bounds(self) -> Tuple[int, int, int, int]:
+        """ World tile bounds of the loaded chunks: x_min, x_max, y_min, y_max (inclusive) """
+        xs = [x for x, _ in self.chunks]
+        ys = [y for _, y in self.chunks]
+        return (
+            min(xs) * CHUNK_SIZE, max(xs) * CHUNK_SIZE + CHUNK_SIZE - 1,
+            min(ys) * CHUNK_SIZE - CHUNK_SIZE + 1, max(ys) * CHUNK_SIZE
+        )
 
     def get_entities_to_render(self):
         return self.entities_to_render
     
     def get_tile(self, coord: Coord) -> Optional[Tile]:
-        for chunk in self.chunks:
-            if chunk.contains_coord(coord): return chunk.get_tile(coord)
+        x, y, _ = coord.as_chunk_coord()
+        if (chunk := self.chunks.get((int(x), int(y)))) is not None: return chunk.get_tile(coord)
         
 
     def finish_chunk_loading(self):
@@ -245,20 +449,10 @@ class Map:
 
     def save(self):
         self.finish_chunk_loading()
-        for chunk in self.chunks: 
+        for chunk in self.chunks.values(): 
             chunk.entities = list(self.entity_manager.get_chunk_entities(chunk))
-            chunk.save(self.game_name)
-            
+            self._persist_chunk(chunk)
 
-    def check_dir_exists(self, x, y):
-        path = Chunk.get_data_path(x, y, self.game_name)
-        return path.is_dir() and any(path.iterdir())
-    
-    @staticmethod
-    def get_chunk_index(chunk_list, location):
-        for i, chunk in enumerate(chunk_list):
-            if np.array_equal(
-                location.as_chunk_coord(),
-                chunk.location.as_chunk_coord()
-            ): return i + 1
-        return None
+        # Chunks that left the map are only saved when evicted, save them too
+        for chunk in self.chunk_cache:
+            self._persist_chunk(chunk)
@@ -37,9 +37,7 @@ class PathFinder(AstarManager):
 
         point = point.copy()
 
-        # Get loaded bounds from corner chunks 1 and 9
-        x_min, y_max, _ = self.map.chunks[0].tiles[0].location.location
-        x_max, y_min, _ = self.map.chunks[-1].tiles[-1].location.location
+        x_min, x_max, y_min, y_max = self.map.loaded_bounds()
 
         if self._in_bounds(point, x_max, x_min, y_max, y_min): 
             return self._find_closest_unblocked_point(point, self._default_is_blocked)
@@ -0,0 +1,320 @@
+"""
+    Region files: chunk saves packed REGION_SIZE x REGION_SIZE chunks to a file.
+
+    Region file layout (little endian):
+        header      magic, version, region size
+        index       one REGION_ENTRY per chunk of the region (offset, length, capacity, crc32)
+        payloads    chunk save bytes at their offsets, in slots of `capacity` bytes
+
+    A chunk's save is never written over: every rewrite goes to the first gap big enough
+    (slots freed by earlier rewrites) or to the end of the file. The payload is written
+    before its index entry, and the old slot is only free once the index points at the
+    new one, so a crash while saving leaves the previous save readable. The crc catches
+    payloads damaged some other way.
+"""
+
+import zlib
+import struct
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+from world.chunk_format import chunk_file_is_delta, chunk_file_version
+from world.chunk_manifest import LEGACY_OFFSET, MANIFEST_NAME, ChunkManifest
+
+
+logger = logging.getLogger(__name__)
+
+# Chunks per region side
+REGION_SIZE = 16
+
+# Slots are allocated in multiples of this many bytes so saves can grow a little in place
+REGION_SECTOR = 512
+
+# Region files kept open per game
+REGION_MAX_OPEN = 8
+
+REGION_MAGIC = b"MDGR"
+REGION_VERSION = 1
+REGION_HEADER = struct.Struct("<4sHH")
+REGION_ENTRY = struct.Struct("<IIII")
+
+
+class RegionFile:
+    """ One region file, chunks are addressed by their local (x, y) inside the region """
+
+    def __init__(self, path: Path, size: int = REGION_SIZE):
+        self.path = path
+        self.size = size
+        self._lock = threading.Lock()
+        self._data_start = REGION_HEADER.size + REGION_ENTRY.size * size * size
+
+        if path.exists():
+            self._file = open(path, "r+b")
+            magic, version, stored_size = REGION_HEADER.unpack(self._file.read(REGION_HEADER.size))
+            if magic != REGION_MAGIC:
+                raise ValueError(f"{path} is not a region file")
+            if version > REGION_VERSION or stored_size != size:
+                raise ValueError(f"{path} has an unsupported version ({version}) or region size ({stored_size})")
+            index = self._file.read(self._data_start - REGION_HEADER.size)
+            self._index: List[Tuple[int, int, int, int]] = list(REGION_ENTRY.iter_unpack(index))
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, "w+b")
+            self._index = [(0, 0, 0, 0)] * (size * size)
+            self._file.write(REGION_HEADER.pack(REGION_MAGIC, REGION_VERSION, size))
+            self._file.write(b"".join(REGION_ENTRY.pack(*entry) for entry in self._index))
+            self._file.flush()
+
+    def _slot(self, lx: int, ly: int) -> int:
+        return lx * self.size + ly
+
+    def contains(self, lx: int, ly: int) -> bool:
+        return self._index[self._slot(lx, ly)][1] > 0
+
+    def entries(self) -> Iterator[Tuple[int, int, int, int]]:
+        """ (lx, ly, offset, length) of every chunk stored in this region """
+        for slot, (offset, length, _, _) in enumerate(self._index):
+            if length > 0: yield *divmod(slot, self.size), offset, length
+
+    def peek(self, lx: int, ly: int, n: int) -> bytes:
+        """ First n bytes of a stored chunk """
+        offset, length, _, _ = self._index[self._slot(lx, ly)]
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(min(n, length))
+
+    def read(self, lx: int, ly: int) -> Optional[bytes]:
+        with self._lock:
+            offset, length, _, crc = self._index[self._slot(lx, ly)]
+            if length == 0: return None
+            self._file.seek(offset)
+            data = self._file.read(length)
+
+        if len(data) != length or zlib.crc32(data) != crc:
+            logger.warning(f"Chunk ({lx}, {ly}) in {self.path.name} is damaged, ignoring it")
+            return None
+        return data
+
+    def write(self, lx: int, ly: int, data: bytes) -> int:
+        """ Store data as chunk (lx, ly), returns the offset it was written at """
+        slot = self._slot(lx, ly)
+        with self._lock:
+            # Into a free gap, the current save stays intact until the index moves off it
+            capacity = -(-len(data) // REGION_SECTOR) * REGION_SECTOR
+            offset = self._allocate(capacity)
+
+            self._file.seek(offset)
+            self._file.write(data)
+            self._file.flush()
+
+            # Only now point the index at the new payload, which frees the old slot
+            self._index[slot] = (offset, len(data), capacity, zlib.crc32(data))
+            self._file.seek(REGION_HEADER.size + slot * REGION_ENTRY.size)
+            self._file.write(REGION_ENTRY.pack(*self._index[slot]))
+            self._file.flush()
+            return offset
+
+    def _allocate(self, capacity: int) -> int:
+        """ Offset of the first gap of at least capacity bytes (the rewritten chunk's current slot stays taken) """
+        used = sorted((offset, cap) for offset, length, cap, _ in self._index if length > 0 or cap > 0)
+        end = self._data_start
+        for offset, cap in used:
+            if offset - end >= capacity: return end
+            end = max(end, offset + cap)
+        return end
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ChunkStore:
+    """
+        Every saved chunk of one game, stored in region files under <game>/regions.
+
+        Baked tile groups (see world/baked_tiles.py) are kept in their own region files
+        under <game>/baked. They are only a cache, a missing or damaged one is baked again.
+
+        Saves the game can't use are kept whole next to the regions (see keep_aside):
+        delta saves that no longer match the generated terrain under <game>/unmatched,
+        saves that fail to decode under <game>/unreadable. They are never written over.
+
+        Chunks saved before region files existed (<game>/chunks/<x>/<y>/<id>.chunk) are
+        still read, and move into their region the next time they are saved.
+
+        Which chunks exist is answered from the ChunkManifest, loaded once when the store
+        opens. Region files written after the manifest was last flushed (e.g. the game
+        crashed) are re-indexed on open, so a stale manifest never hides a saved chunk.
+
+        Safe to use from several threads (the chunk writer saves while the game loads),
+        operations on one store run one at a time.
+    """
+
+    def __init__(self, game_dir: Path, region_size: int = REGION_SIZE, max_open: int = REGION_MAX_OPEN):
+        self.game_dir = game_dir
+        self.region_size = region_size
+        self.max_open = max_open
+
+        self._lock = threading.RLock()
+        self._regions: OrderedDict[Tuple[int, int], RegionFile] = OrderedDict()
+        self._baked_regions: OrderedDict[Tuple[int, int], RegionFile] = OrderedDict()
+        self._region_dir = game_dir / "regions"
+        self._baked_dir = game_dir / "baked"
+        self._legacy_dir = game_dir / "chunks"
+        self.manifest = self._load_manifest()
+
+    def _locate(self, x: int, y: int) -> Tuple[Tuple[int, int], int, int]:
+        rx, lx = divmod(x, self.region_size)
+        ry, ly = divmod(y, self.region_size)
+        return (rx, ry), lx, ly
+
+    def _region(self, key: Tuple[int, int], create: bool, baked: bool = False) -> Optional[RegionFile]:
+        regions = self._baked_regions if baked else self._regions
+        with self._lock:
+            if (region := regions.get(key)) is not None:
+                regions.move_to_end(key)
+                return region
+
+            path = self._baked_dir / f"r.{key[0]}.{key[1]}.baked" if baked else self._region_dir / f"r.{key[0]}.{key[1]}.region"
+            if not create and not path.exists(): return None
+
+            region = regions[key] = RegionFile(path, self.region_size)
+            if len(regions) > self.max_open: regions.popitem(last=False)[1].close()
+            return region
+
+    def _load_manifest(self) -> ChunkManifest:
+        path = self.game_dir / MANIFEST_NAME
+        manifest = ChunkManifest.load(path)
+        regions = sorted(self._region_dir.glob("r.*.region")) if self._region_dir.is_dir() else []
+
+        if manifest is None:
+            manifest = ChunkManifest(path)
+            self._index_legacy(manifest)
+            stale = regions
+        else:
+            flushed = path.stat().st_mtime_ns
+            stale = [region for region in regions if region.stat().st_mtime_ns >= flushed]
+
+        for region_path in stale:
+            _, rx, ry, _ = region_path.name.split(".")
+            self._index_region(manifest, int(rx), int(ry))
+        return manifest
+
+    def _index_region(self, manifest: ChunkManifest, rx: int, ry: int) -> None:
+        for x, y in [(x, y) for x, y in manifest if (x // self.region_size, y // self.region_size) == (rx, ry)]:
+            if manifest.entries[(x, y)][0] != LEGACY_OFFSET: manifest.remove(x, y)
+
+        region = self._region((rx, ry), create=False)
+        for lx, ly, offset, length in region.entries():
+            head = region.peek(lx, ly, 8)
+            version = chunk_file_version(head)
+            if version == 0: head = region.read(lx, ly) or b"" # JSON saves say if they are deltas further in
+            manifest.set(rx * self.region_size + lx, ry * self.region_size + ly, offset, length, version, chunk_file_is_delta(head))
+
+    def _index_legacy(self, manifest: ChunkManifest) -> None:
+        if not self._legacy_dir.is_dir(): return
+        for x_dir in self._legacy_dir.iterdir():
+            for y_dir in x_dir.iterdir() if x_dir.is_dir() else []:
+                if (path := self._legacy_file(int(x_dir.name), int(y_dir.name))) is not None:
+                    raw = path.read_bytes()
+                    manifest.set(
+                        int(x_dir.name), int(y_dir.name), LEGACY_OFFSET, len(raw), chunk_file_version(raw), chunk_file_is_delta(raw)
+                    )
+
+    def _legacy_file(self, x: int, y: int) -> Optional[Path]:
+        path = self._legacy_dir / f"{x}" / f"{y}"
+        return next(path.iterdir(), None) if path.is_dir() else None
+
+    def exists(self, x: int, y: int) -> bool:
+        with self._lock:
+            return (x, y) in self.manifest
+
+    def is_delta(self, x: int, y: int) -> bool:
+        """ True if chunk (x, y) is stored as a delta save (loading it needs its regenerated terrain) """
+        with self._lock:
+            entry = self.manifest.entries.get((x, y))
+            return entry is not None and bool(entry[3])
+
+    def forget(self, x: int, y: int) -> None:
+        """ Drop chunk (x, y) from the manifest, e.g. its region file is gone or its save is damaged """
+        with self._lock:
+            self.manifest.remove(x, y)
+
+    def read(self, x: int, y: int) -> Optional[bytes]:
+        key, lx, ly = self._locate(x, y)
+        with self._lock:
+            if (entry := self.manifest.entries.get((x, y))) is None: return None
+            if entry[0] != LEGACY_OFFSET:
+                region = self._region(key, create=False)
+                return region.read(lx, ly) if region is not None else None
+            legacy = self._legacy_file(x, y)
+            return legacy.read_bytes() if legacy is not None else None
+
+    def write(self, x: int, y: int, data: bytes) -> None:
+        key, lx, ly = self._locate(x, y)
+        with self._lock:
+            was_legacy = self.manifest.entries.get((x, y), (None,))[0] == LEGACY_OFFSET
+            offset = self._region(key, create=True).write(lx, ly, data)
+            self.manifest.set(x, y, offset, len(data), chunk_file_version(data), chunk_file_is_delta(data))
+
+            if was_legacy and (legacy := self._legacy_file(x, y)) is not None:
+                legacy.unlink()
+                for directory in (legacy.parent, legacy.parent.parent):
+                    if any(directory.iterdir()): break
+                    directory.rmdir()
+
+    def read_baked(self, x: int, y: int) -> Optional[bytes]:
+        key, lx, ly = self._locate(x, y)
+        with self._lock:
+            region = self._region(key, create=False, baked=True)
+            return region.read(lx, ly) if region is not None and region.contains(lx, ly) else None
+
+    def write_baked(self, x: int, y: int, data: bytes) -> None:
+        key, lx, ly = self._locate(x, y)
+        with self._lock:
+            self._region(key, create=True, baked=True).write(lx, ly, data)
+
+    def keep_aside(self, x: int, y: int, data: bytes, folder: str) -> Path:
+        """ Keep a chunk save the game can't use in <game>/<folder>, returns where """
+        path = self.game_dir / folder / f"{x}.{y}.{zlib.crc32(data):08x}.chunk"
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f".{path.name}.tmp")
+                tmp_path.write_bytes(data)
+                tmp_path.replace(path)
+        return path
+
+    def sync(self) -> None:
+        """ Write the manifest if chunks were saved since the last sync """
+        with self._lock:
+            self.manifest.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self.manifest.flush()
+            for region in (*self._regions.values(), *self._baked_regions.values()): region.close()
+            self._regions.clear()
+            self._baked_regions.clear()
+
+
+# Open stores, one per game directory (two stores must never share region files)
+_stores: Dict[Path, ChunkStore] = {}
+_stores_lock = threading.Lock()
+
+
+def chunk_store(game_dir: Path) -> ChunkStore:
+    with _stores_lock:
+        if (store := _stores.get(game_dir)) is None:
+            store = _stores[game_dir] = ChunkStore(game_dir)
+        return store
+
+
+def close_chunk_stores(game_dir: Optional[Path] = None) -> None:
+    """ Close the store of game_dir (every store if None), e.g. before deleting a save """
+    with _stores_lock:
+        stores = [_stores.pop(path, None) for path in ([game_dir] if game_dir is not None else list(_stores))]
+    for store in stores:
+        if store is not None: store.close()
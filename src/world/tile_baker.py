@@ -0,0 +1,53 @@
+import time
+import numpy as np
+from typing import TYPE_CHECKING, Iterable
+from utils.coords import Coord, CoordArray
+from constants import TILE_BAKE_BUDGET_MS
+
+if TYPE_CHECKING:
+    from world.chunk import Chunk
+
+
+class TileBaker:
+    """
+        Bakes tile group surfaces a few at a time, ahead of when they are drawn.
+
+        Every frame step() bakes unbaked groups of the given chunks, nearest to the screen
+        center first, until `budget_ms` is used up. At least one group is baked per step so
+        baking always moves on. A group that isn't baked when it is drawn (just loaded, or
+        its tiles changed) is drawn tile by tile instead, see Chunk.get_tile_groups_in_region.
+
+        Baking only happens here, between updates, never while a frame is drawn.
+    """
+
+    def __init__(self, budget_ms: float = TILE_BAKE_BUDGET_MS):
+        self.budget_ms = budget_ms
+
+        # Telemetry
+        self.baked = 0 # Groups baked so far
+        self.pending = 0 # Groups left unbaked after the last step
+
+    def step(self, chunks: Iterable["Chunk"], center: Coord) -> int:
+        """ Bake for up to budget_ms, returns the number of groups baked """
+        start = time.perf_counter()
+        groups = []
+        for chunk in chunks:
+            if not chunk.needs_bake: continue
+            unbaked = [group for group in chunk.tile_groups if not group.is_baked()]
+            chunk.needs_bake = bool(unbaked)
+            groups.extend(unbaked)
+
+        if not groups:
+            self.pending = 0
+            return 0
+
+        centers = CoordArray.world([group.center[0] for group in groups], [group.center[1] for group in groups])
+        baked = 0
+        for i in np.argsort(centers.euclidean_2D(center), kind="stable").tolist():
+            if baked and (time.perf_counter() - start) * 1000 >= self.budget_ms: break
+            groups[i].bake()
+            baked += 1
+
+        self.baked += baked
+        self.pending = len(groups) - baked
+        return baked
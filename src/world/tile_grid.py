@@ -0,0 +1,168 @@
+import numpy as np
+from utils.coords import Coord
+from world.chunk_format import TILE_BORDER, TILE_WATER, TILE_OBSTACLE, pack_tile_flags
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    from world.generation.terrain_generator import ChunkTerrain
+
+
+class TileView:
+    """
+        A tile of a TileGrid, with the same interface as Tile.
+
+        Reads and writes go straight to the grid's arrays. The location is made on first
+        use. Like Tile, changes are announced with notify_subscribers().
+    """
+    __slots__ = ("grid", "index", "_location")
+
+    size = Coord.math(1, 1, 0)
+
+    def __init__(self, grid: "TileGrid", index: int):
+        self.grid = grid
+        self.index = index
+        self._location: Optional[Coord] = None
+
+    @property
+    def location(self) -> Coord:
+        if self._location is None: self._location = Coord.world(*self.grid.world_location(self.index))
+        return self._location
+
+    @property
+    def id(self) -> int: return int(self.grid.ids[self.index])
+
+    @id.setter
+    def id(self, value: int): self.grid.ids[self.index] = value
+
+    @property
+    def is_chunk_border(self) -> bool: return self.grid.has_flag(self.index, TILE_BORDER)
+
+    @is_chunk_border.setter
+    def is_chunk_border(self, value: bool): self.grid.set_flag(self.index, TILE_BORDER, value)
+
+    @property
+    def is_water(self) -> bool: return self.grid.has_flag(self.index, TILE_WATER)
+
+    @is_water.setter
+    def is_water(self, value: bool): self.grid.set_flag(self.index, TILE_WATER, value)
+
+    @property
+    def has_obsticle(self) -> bool: return self.grid.has_flag(self.index, TILE_OBSTACLE)
+
+    @has_obsticle.setter
+    def has_obsticle(self, value: bool): self.grid.set_flag(self.index, TILE_OBSTACLE, value)
+
+    def subscribe(self, subscriber):
+        self.grid.subscribe(subscriber, self.index)
+
+    def unsubscribe(self, subscriber):
+        self.grid.unsubscribe(subscriber, self.index)
+
+    def notify_subscribers(self):
+        self.grid.notify(self.index)
+
+    def jsonify(self):
+        return {
+            "id": self.id,
+            "location": self.location.jsonify(),
+            "is_chunk_border": self.is_chunk_border,
+            "is_water": self.is_water,
+            "has_obsticle": self.has_obsticle
+        }
+
+    def __str__(self):
+        return f"Id: {self.id} -- Location {str(self.location)} -- Is Chunk Border { self.is_chunk_border }"
+
+
+class TileGrid:
+    """
+        The tiles of a chunk as arrays, in chunk tile order: index i is local
+        (x, y) = (i // size, i % size) and world (x0 + x, y0 - y).
+
+        Per tile state is an id (uint8) and a flags bitfield (TILE_BORDER, TILE_WATER,
+        TILE_OBSTACLE, see chunk_format). Locations follow from the origin. TileView
+        objects are only made when a tile is asked for. They are kept, so callers can
+        hold on to them.
+
+        Subscribers of the whole grid get tile_update(tile) for every notified tile.
+        Subscribers of a single tile only get it for that tile.
+    """
+
+    def __init__(self, size: int, origin: Tuple[int, int], ids: np.ndarray, flags: np.ndarray):
+        self.size = size
+        self.origin = origin
+        self.ids = ids
+        self.flags = flags
+
+        self._views: Dict[int, TileView] = {}
+        self._subscribers: Set = set()
+        self._tile_subscribers: Dict[int, Set] = {}
+
+    @classmethod
+    def empty(cls, size: int, origin: Tuple[int, int]) -> "TileGrid":
+        return cls(size, origin, np.zeros(size * size, dtype=np.uint8), np.zeros(size * size, dtype=np.uint8))
+
+    @classmethod
+    def from_terrain(cls, terrain: "ChunkTerrain") -> "TileGrid":
+        return cls(
+            terrain.size, terrain.origin, terrain.ids.copy(),
+            pack_tile_flags(terrain.is_border, terrain.is_water, terrain.has_obstacle)
+        )
+
+    def __len__(self) -> int:
+        return self.size * self.size
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[TileView, List[TileView]]:
+        if isinstance(key, slice): return [self.view(i) for i in range(*key.indices(len(self)))]
+        return self.view(key if key >= 0 else len(self) + key)
+
+    def __iter__(self) -> Iterator[TileView]:
+        return (self.view(i) for i in range(len(self)))
+
+    def view(self, i: int) -> TileView:
+        if (tile := self._views.get(i)) is None:
+            tile = self._views[i] = TileView(self, i)
+        return tile
+
+    @property
+    def view_count(self) -> int:
+        return len(self._views)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.flags.nbytes
+
+    def world_location(self, i: int) -> Tuple[int, int]:
+        return self.origin[0] + i // self.size, self.origin[1] - i % self.size
+
+    def world_locations(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ world_location for an array of indices, as (xs, ys) """
+        return self.origin[0] + indices // self.size, self.origin[1] - indices % self.size
+
+    # ---- Flags ---- #
+
+    def has_flag(self, i: int, flag: int) -> bool:
+        return bool(self.flags[i] & flag)
+
+    def set_flag(self, i: int, flag: int, value: bool) -> None:
+        self.flags[i] = (self.flags[i] | flag) if value else (self.flags[i] & (0xFF ^ flag))
+
+    def is_border(self) -> np.ndarray: return (self.flags & TILE_BORDER) != 0
+    def is_water(self) -> np.ndarray: return (self.flags & TILE_WATER) != 0
+    def has_obstacle(self) -> np.ndarray: return (self.flags & TILE_OBSTACLE) != 0
+    def is_blocked(self) -> np.ndarray: return (self.flags & (TILE_WATER | TILE_OBSTACLE)) != 0
+
+    # ---- Change notifications ---- #
+
+    def subscribe(self, subscriber, i: Optional[int] = None) -> None:
+        if i is None: self._subscribers.add(subscriber)
+        else: self._tile_subscribers.setdefault(i, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber, i: Optional[int] = None) -> None:
+        subscribers = self._subscribers if i is None else self._tile_subscribers.get(i, set())
+        subscribers.discard(subscriber)
+
+    def notify(self, i: int) -> None:
+        tile = self.view(i)
+        for subscriber in (*self._subscribers, *self._tile_subscribers.get(i, ())):
+            subscriber.tile_update(tile)
@@ -1,55 +1,84 @@
 import pygame
-from world.tile import Tile
-from utils.coords import Coord
+import numpy as np
+from utils.coords import Coord, CoordArray
+from world.tile_grid import TileGrid, TileView
+from world.baked_tiles import BakedGroup
 from system.entities.physics.collisions import check_collision
 from typing import List, Optional, Tuple
 from constants import TILE_GROUP_DRAW_SIZE, TILE_SIZE, TILE_ASSET_SHOWN_SIZE
 
 class TileGroup:
-    def __init__(self, tile_imgs: List[pygame.Surface]):
+    """ A TILE_GROUP_DRAW_SIZE square of a chunk's TileGrid, drawn as one baked surface """
+    def __init__(self, tile_imgs: List[pygame.Surface], grid: TileGrid, gx: int, gy: int):
         self._tile_imgs = tile_imgs
-        self._has_tiled_changed = False
-        self._tiles: List[Tile] = []
+        self._grid = grid
+        self._has_tiled_changed = True
         self.tile_group_surface: Optional[pygame.Surface] = None
         self._tile_group_top_left: Tuple[int, int] = (0, 0)
+        self._baked: Optional[BakedGroup] = None # Stored bake to use instead of baking (see use_baked)
 
+        # Grid indices of the group in chunk tile order, [0] and [-1] are opposite corners
+        xs = np.arange(gx * TILE_GROUP_DRAW_SIZE, (gx + 1) * TILE_GROUP_DRAW_SIZE)
+        ys = np.arange(gy * TILE_GROUP_DRAW_SIZE, (gy + 1) * TILE_GROUP_DRAW_SIZE)
+        self._indices = (xs[:, None] * grid.size + ys[None, :]).ravel()
+        self._first = Coord.world(*grid.world_location(int(self._indices[0])))
+        self._last = Coord.world(*grid.world_location(int(self._indices[-1])))
+        self.center = ((self._first.x + self._last.x) / 2, (self._first.y + self._last.y) / 2) # World XY, for bake order
 
-    def add_tile(self, tile: Tile):
+    def tile_update(self, tile: TileView):
         self._has_tiled_changed = True
-        self._tiles.append(tile)
-        tile.subscribe(self)
-    
-    def tile_upate(self, tile: Tile):
-        self._has_tiled_changed = True
-    
+        self._baked = None
+
+    def use_baked(self, baked: BakedGroup):
+        """ Take the surface from a stored bake of the same tiles the first time it is needed """
+        self._baked = baked
+
+    def is_baked(self) -> bool:
+        return self.tile_group_surface is not None and not self._has_tiled_changed
+
+    def bake(self):
+        """ Bake the group's surface now (the TileBaker decides when) """
+        self._build_tile_group_surface()
+
+    def tiles(self) -> List[TileView]:
+        """ The group's tiles in draw order, to draw it tile by tile while it isn't baked """
+        return [self._grid.view(i) for i in self._indices.tolist()]
+
+    def baked_surface(self) -> Tuple[Tuple[int, int], pygame.Surface]:
+        return self._tile_group_top_left, self.tile_group_surface
+
     def _build_tile_group_surface(self):
+        if self._baked is not None:
+            self.tile_group_surface, self._tile_group_top_left = self._baked.surface(), self._baked.top_left
+            self._baked = None
+            self._has_tiled_changed = False
+            return
+
         min_x, min_y, w, h = self._get_bounding_box()
         tile_group = pygame.Surface((w, h), flags=pygame.SRCALPHA).convert_alpha()
 
         self._tile_group_top_left = (min_x, min_y)
 
-        for tile in self._tiles:
-            tile_img = self._tile_imgs[tile.id]
-            center_view = tile.location.as_view_coord()
-            rect_view = tile_img.get_rect(center=center_view)
-
-            # shift so that view(min_x, min_y) maps to chunk(0,0)
-            rect = rect_view.move(-min_x, -min_y)
-            tile_group.blit(tile_img, rect)
+        # Project every tile center at once, shifted so that view(min_x, min_y) maps to chunk(0,0)
+        centers = CoordArray.world(*self._grid.world_locations(self._indices)).as_view_coord() - (min_x, min_y)
+        tile_imgs = [self._tile_imgs[tile_id] for tile_id in self._grid.ids[self._indices].tolist()]
+        tile_group.blits(
+            [(tile_img, tile_img.get_rect(center=center)) for tile_img, center in zip(tile_imgs, centers.tolist())],
+            doreturn=False
+        )
 
         self.tile_group_surface = tile_group
         self._has_tiled_changed = False
 
 
     def get_surface(self, region: Tuple[Coord, Coord]) -> Optional[Tuple[pygame.Surface, Tuple[int, int]]]:
-        if self.tile_group_surface is None or self._has_tiled_changed == True:
-            self._build_tile_group_surface()
-
-        return (self.tile_group_surface, self._tile_group_top_left) if self._is_overlaping(region) else None
+        """ The baked surface and its top left if the group overlaps region, None if it doesn't or isn't baked """
+        if not self.is_baked(): return None
+        return (self.tile_group_surface, self._tile_group_top_left) if self.is_overlaping(region) else None
 
-    def _is_overlaping(self, region: Tuple[Coord, Coord]):
+    def is_overlaping(self, region: Tuple[Coord, Coord]):
         region_location, region_size = region
-        tile_group_location = Coord.world(self._tiles[0].location.x, self._tiles[-1].location.y)
+        tile_group_location = Coord.world(self._first.x, self._last.y)
         tile_group_size = Coord.world(TILE_GROUP_DRAW_SIZE, TILE_GROUP_DRAW_SIZE, 1)
         return check_collision(
             tile_group_location, tile_group_size,
@@ -61,22 +90,18 @@ class TileGroup:
             Returns (min_x, min_y, width, height) in VIEW coords.
 
             Uses the assumption:
-            - tiles[0] is one corner
-            - tiles[-1] is the opposite corner
+            - the first tile is one corner
+            - the last tile is the opposite corner
         """
 
         # Get the tl and br in world coords
-        top_left, bottom_right = self._tiles[0].location, self._tiles[-1].location
-
-        # Create tr and bl from what we know about tl and br
-        top_right = Coord.world(bottom_right.x, top_left.y)
-        bottom_left = Coord.world(top_left.x, bottom_right.y)
+        top_left, bottom_right = self._first, self._last
 
-        # Convert to view corrd
-        top_left = top_left.as_view_coord()
-        bottom_right = bottom_right.as_view_coord()
-        top_right = top_right.as_view_coord()
-        bottom_left = bottom_left.as_view_coord()
+        # Create tr and bl from what we know about tl and br and convert all four to view coords
+        top_left, bottom_right, top_right, bottom_left = CoordArray.world(
+            (top_left.x, bottom_right.x, bottom_right.x, top_left.x),
+            (top_left.y, bottom_right.y, top_left.y, bottom_right.y)
+        ).as_view_coord().tolist()
 
         # Note location measure top left position so some positions  
         # need adjusting by tile size to get the proper bounding box